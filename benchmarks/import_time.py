@@ -0,0 +1,84 @@
+"""Benchmark the cold-start import time of surface_coatings.
+
+Each statement is timed in a fresh interpreter, so nothing is served from
+`sys.modules`, as in a newly spawned worker process. `import mbuild` is
+reported as the floor every statement pays. To measure the improvement over
+another revision, run the script again with `--root` pointing to a checkout
+of that revision, e.g., one created with `git worktree add`.
+
+Usage::
+
+    python benchmarks/import_time.py
+    python benchmarks/import_time.py --root /path/to/other/checkout
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+STATEMENTS = [
+    "import mbuild",
+    "import surface_coatings",
+    "import surface_coatings.chains",
+    "import surface_coatings.monomers",
+    "import surface_coatings.surfaces",
+    "from surface_coatings.chains import VBCPolymer",
+    "from surface_coatings.chains.nbdac_polymer import pNBDAC",
+    "from surface_coatings import Monolayer",
+]
+
+TIMER = (
+    "import time; start = time.perf_counter(); {statement}; "
+    "print(time.perf_counter() - start)"
+)
+
+
+def time_statement(statement, root, repeat):
+    """Return the wall times (in s) of `statement` in fresh interpreters."""
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(
+        [root] + [path for path in [env.get("PYTHONPATH")] if path]
+    )
+    times = list()
+    for _ in range(repeat):
+        output = subprocess.run(
+            [sys.executable, "-c", TIMER.format(statement=statement)],
+            env=env,
+            cwd=root,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout
+        times.append(float(output.split()[-1]))
+    return times
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument(
+        "--root",
+        default=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+        help="Root of the checkout to benchmark.",
+    )
+    parser.add_argument(
+        "--repeat", type=int, default=5, help="Number of fresh imports."
+    )
+    args = parser.parse_args()
+
+    print(f"{'statement':<60}{'median (s)':>12}{'min (s)':>10}")
+    for statement in STATEMENTS:
+        try:
+            times = time_statement(statement, args.root, args.repeat)
+        except subprocess.CalledProcessError as error:
+            print(f"{statement:<60}{'failed':>12}")
+            print(error.stderr.strip().splitlines()[-1], file=sys.stderr)
+            continue
+        print(
+            f"{statement:<60}{statistics.median(times):>12.3f}"
+            f"{min(times):>10.3f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
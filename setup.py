@@ -1,4 +1,4 @@
-from setuptools import setup
+from setuptools import find_packages, setup
 
 setup(
     name="surface_coatings",
@@ -7,7 +7,11 @@ setup(
     author="Co D. Quach",
     author_email="daico007@gmail.com",
     license="MIT",
-    packages=["surface_coatings"],
+    packages=find_packages(),
+    # Generated before building a release, see "Packaged data" in README.md
+    package_data={
+        "surface_coatings": ["assets.bundle", "utils/geometries/*.npz"]
+    },
     zip_safe=False,
     # Temporarily turn off entry point setup
     #   entry_points={
@@ -1 +1,15 @@
 """__init__ file for surface_coatings module."""
+from surface_coatings.utils.lazy import attach
+
+__version__ = "0.1.0"
+
+__getattr__, __dir__, __all__ = attach(
+    __name__,
+    {
+        "Monolayer": ".monolayer",
+        "DualMonolayer": ".monolayer",
+        "MonolayerSpec": ".monolayer",
+        "SolvatedMonolayer": ".solvated_monolayer",
+        "SolvatedDualMonolayer": ".solvated_monolayer",
+    },
+)
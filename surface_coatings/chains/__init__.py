@@ -1,4 +1,11 @@
 """__init__ file for chains module."""
-from .alkylsilane import Alkylsilane
-from .silane_polymer import SilanePolymer
-from .vbc_polymer import VBCPolymer
+from surface_coatings.utils.lazy import attach
+
+__getattr__, __dir__, __all__ = attach(
+    __name__,
+    {
+        "Alkylsilane": ".alkylsilane",
+        "SilanePolymer": ".silane_polymer",
+        "VBCPolymer": ".vbc_polymer",
+    },
+)
@@ -1,25 +1,34 @@
 """Routine to create nBDAC polymer."""
+import functools
 import warnings
 
 import mbuild as mb
 import numpy as np
 from mbuild.lib.atoms import H
 from mbuild.lib.moieties import CH2, Silane
-from mbuild.lib.recipes import Polymer
 
 from surface_coatings.monomers import mNBDAC
 from surface_coatings.monomers.mnbdac.side_chains import AminoPropyl
 from surface_coatings.monomers.mnbdac.terminal_groups import Acetaldehyde
+from surface_coatings.utils.polymer import build_polymer
+from surface_coatings.utils.templates import template
+
+
+@functools.lru_cache(maxsize=None)
+def _ch2_cap():
+    """Create the custom ch2 cap for the polymer.
+
+    The cap is only created on first use, clone it when provided to the
+    polymer.
+    """
+    ch2_cap = CH2()
+    ch2_cap.remove(ch2_cap["down"])
+    return ch2_cap
 
-# Create custom ch2 cap for the polymer
-# clone this when provided to the polymer
-ch2_cap = CH2()
-ch2_cap.remove(
-    ch2_cap["down"]
-)
 
 class O(mb.Compound):
     """An oxygen with two ports attached."""
+
     def __init__(self):
         super(O, self).__init__()
         oxygen = mb.Compound(name="O", element="O")
@@ -30,34 +39,45 @@ class O(mb.Compound):
         self.add(mb.Port(anchor=self[0]), "down")
         self["down"].translate([0, -0.07, 0])
 
+
+@template
 class fmNBDAC(mb.Compound):
     """Functionalized NBDAC monomer.
 
+    The monomer is assembled once per combination of side chains and
+    terminal groups (compared by content), later instances are copies.
+
     Parameters
     ----------
-    side_chains : mb.Compound or list of Compounds (len 2)
-        Side chains attached to the NBDAC monomer
-    terminal_groups : mb.Compound or list of Compounds (len 2)
-        Terminal groups which will be matched side chains
+    side_chains : mb.Compound or list of Compounds (len 2), optional, default=None
+        Side chains attached to the NBDAC monomer, AminoPropyl if None
+    terminal_groups : mb.Compound or list of Compounds (len 2), optional, default=None
+        Terminal groups which will be matched side chains, Acetaldehyde if None
     """
 
-    def __init__(
-        self, side_chains=AminoPropyl(), terminal_groups=Acetaldehyde()
-    ):
+    def __init__(self, side_chains=None, terminal_groups=None):
         super(fmNBDAC, self).__init__()
+        if side_chains is None:
+            side_chains = AminoPropyl()
+        if terminal_groups is None:
+            terminal_groups = Acetaldehyde()
         if isinstance(side_chains, list):
             assert all(
                 isinstance(side_chain, mb.Compound)
                 for side_chain in side_chains
             )
+            side_chains = [mb.clone(side_chain) for side_chain in side_chains]
         elif isinstance(side_chains, mb.Compound):
             side_chains = [mb.clone(side_chains), mb.clone(side_chains)]
 
         if isinstance(terminal_groups, list):
             assert all(
-                isinstance(terminal_groups, mb.Compound)
+                isinstance(terminal_group, mb.Compound)
                 for terminal_group in terminal_groups
             )
+            terminal_groups = [
+                mb.clone(terminal_group) for terminal_group in terminal_groups
+            ]
         elif isinstance(terminal_groups, mb.Compound):
             terminal_groups = [
                 mb.clone(terminal_groups),
@@ -92,10 +112,10 @@ class pNBDAC(mb.Compound):
 
     Parameters
     ----------
-    side_chains : mb.Compound or list of Compounds (len 2)
-        Side chains attached to NBDAC monomer
-    terminal_groups: mb.Compound or list of Compounds (len 2)
-        Terminal groups which will be matched with side chains
+    side_chains : mb.Compound or list of Compounds (len 2), optional, default=None
+        Side chains attached to NBDAC monomer, AminoPropyl if None
+    terminal_groups: mb.Compound or list of Compounds (len 2), optional, default=None
+        Terminal groups which will be matched with side chains, Acetaldehyde if None
     cap_front : bool, optional, default=True
         Cap the front of the polymer (NBDAC end) with a CH2
     cap_end : bool, optional, default=False
@@ -118,8 +138,8 @@ class pNBDAC(mb.Compound):
     def __init__(
         self,
         monomer,
-        side_chains=AminoPropyl(),
-        terminal_groups=Acetaldehyde(),
+        side_chains=None,
+        terminal_groups=None,
         buffer=None,
         buffer_length=1,
         cap_front=True,
@@ -140,15 +160,12 @@ class pNBDAC(mb.Compound):
         else:
             monomer = fmNBDAC(side_chains, terminal_groups)
 
-        polymer = Polymer(monomers=[monomer])
-        polymer.build(n=n, add_hydrogens=False)
+        polymer = build_polymer([monomer], n=n)
         self.add(polymer, "Polymer")
 
         if buffer:
             tail = mb.Compound(name="tail")
-            buffer_options = {"alkyl": CH2,
-                              "ether": O,
-                              "silane": Silane}
+            buffer_options = {"alkyl": CH2, "ether": O, "silane": Silane}
             tail.add(buffer_options.get(buffer.lower())(), "Buffer")
             tail.add(CH2(), "CH2_0")
 
@@ -191,7 +208,7 @@ class pNBDAC(mb.Compound):
             self.labels["down"] = self["Polymer"]["down"]
 
         if cap_front:
-            front_cap = mb.clone(ch2_cap)
+            front_cap = mb.clone(_ch2_cap())
             self.add(front_cap, "front_cap")
             mb.force_overlap(
                 move_this=front_cap,
@@ -199,7 +216,7 @@ class pNBDAC(mb.Compound):
                 to_positions=self["up"],
             )
         if cap_end:
-            end_cap = mb.clone(ch2_cap)
+            end_cap = mb.clone(_ch2_cap())
             self.add(end_cap, "end_cap")
             mb.force_overlap(
                 move_this=end_cap,
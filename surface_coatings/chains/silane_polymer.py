@@ -4,9 +4,9 @@ import mbuild as mb
 import numpy as np
 from mbuild.lib.atoms import H
 from mbuild.lib.moieties import Silane
-from mbuild.lib.recipes import Polymer
 
 from surface_coatings.monomers import MPC
+from surface_coatings.utils.polymer import build_polymer
 
 
 class SilanePolymer(mb.Compound):
@@ -14,8 +14,9 @@ class SilanePolymer(mb.Compound):
 
     Parameters
     ----------
-    monomers: list of monomer
-        List of monomers to be connected to get connected together
+    monomers: list of monomer, optional, default=None
+        List of monomers to be connected to get connected together,
+        [MPC()] if None
     n: int, optional, defautl=1
         Number of repeat for the monomer
     sequence: str
@@ -27,13 +28,15 @@ class SilanePolymer(mb.Compound):
 
     def __init__(
         self,
-        monomers=[MPC()],
+        monomers=None,
         n=1,
         sequence="A",
         initiator=None,
         port_labels=("up", "down"),
     ):
         super(SilanePolymer, self).__init__()
+        if monomers is None:
+            monomers = [MPC()]
         if initiator:
             silane = Silane()
             surface_end = mb.Compound([silane, initiator])
@@ -48,8 +51,9 @@ class SilanePolymer(mb.Compound):
             surface_end = Silane()
 
         end_groups = [H(), surface_end]
-        polymer = Polymer(monomers=monomers, end_groups=end_groups)
-        polymer.build(n=n, sequence=sequence, add_hydrogens=False)
+        polymer = build_polymer(
+            monomers, n=n, sequence=sequence, end_groups=end_groups
+        )
         self.add(polymer, label="Polymer")
         for i in range(n):
             assert polymer.children[i] not in end_groups
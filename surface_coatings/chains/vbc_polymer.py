@@ -1,7 +1,6 @@
 """Routine to create VBC polymer."""
 import mbuild as mb
 import numpy as np
-from mbuild.lib.recipes import Polymer
 
 from surface_coatings.monomers import (
     SBMA,
@@ -10,6 +9,7 @@ from surface_coatings.monomers import (
     Methacrylate,
     TriazoleBiotin,
 )
+from surface_coatings.utils.polymer import build_polymer
 
 
 class VBCPolymer(mb.Compound):
@@ -17,8 +17,9 @@ class VBCPolymer(mb.Compound):
 
     Parameters
     ----------
-    monomers: list of monomer
-        List of monomers to be connected together
+    monomers: list of monomer, optional, default=None
+        List of monomers to be connected together,
+        [Methacrylate(), SBMA(), AzPMA(), TriazoleBiotin()] if None
     n: int, optional, default=1
         Number of repeat for the polymer
     sequence: str
@@ -30,14 +31,15 @@ class VBCPolymer(mb.Compound):
 
     def __init__(
         self,
-        monomers=[Methacrylate(), SBMA(), AzPMA(), TriazoleBiotin()],
+        monomers=None,
         n=1,
         sequence="AABCBBD",
         port_labels=("up", "down"),
     ):
         super(VBCPolymer, self).__init__()
-        polymer = Polymer(monomers=monomers)
-        polymer.build(n=n, sequence=sequence, add_hydrogens=False)
+        if monomers is None:
+            monomers = [Methacrylate(), SBMA(), AzPMA(), TriazoleBiotin()]
+        polymer = build_polymer(monomers, n=n, sequence=sequence)
         self.add(polymer, label="Polymer")
         vbc = VBC()
         self.add(vbc, label="VBC")
@@ -1,2 +1,9 @@
 """__init__ file for OnePort module."""
-from .one_port import OnePort
+from surface_coatings.utils.lazy import attach
+
+__getattr__, __dir__, __all__ = attach(
+    __name__,
+    {
+        "OnePort": ".one_port",
+    },
+)
@@ -1,7 +1,10 @@
 """Routine to create different terminal group with one connection point/port."""
 import mbuild as mb
 
+from surface_coatings.utils.templates import template
 
+
+@template
 class OnePort(mb.Compound):
     """A methyl group."""
 
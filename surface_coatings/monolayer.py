@@ -1,12 +1,23 @@
 """Routines to create (dual) monolayer systems."""
-from copy import deepcopy
+from functools import partial
 from warnings import warn
-from surface_coatings.utils.utils import boundary_positions
 
 import mbuild as mb
 import numpy as np
 from mbuild.lib.atoms import H
 
+from surface_coatings.utils.arrays import CompoundArrays
+from surface_coatings.utils.extents import Extents
+from surface_coatings.utils.grafting import (
+    graft_chains,
+    match_sites,
+    port_transforms,
+    rotation_matrices,
+    spin_chains,
+)
+from surface_coatings.utils.tiling import TiledSurface
+from surface_coatings.utils.utils import partition_pattern
+
 
 class Monolayer(mb.Compound):
     """A surface coated by a monolayer.
@@ -25,14 +36,19 @@ class Monolayer(mb.Compound):
         The list of fractions to fill for each compound in `chains`. If
         the value is not specified, the chains will be proportional on
         the surface.
-    backfill: mb.Compound, optional, default=H()
+    backfill: mb.Compound, optional, default=None
         Compound used to backfill leftover ports (after all chains have been attached.
+        Defaults to a hydrogen, H(). Pass False to leave the ports empty.
     tile_x, tile_y: int, optional, default=(1, 1)
         The number of surface tiles.
     rotate_chains: bool, optional, default=True
         Options to rotate the chain randomly.
     seed: int, optional, default= 12345
         Random seed used for any subprocess.
+    batch_graft: bool, optional, default=False
+        Place all copies of each chain with a single batch of rigid
+        transforms (see `surface_coatings.utils.grafting.graft_chains`)
+        instead of cloning and overlapping the chain one site at a time.
     """
 
     def __init__(
@@ -42,103 +58,76 @@ class Monolayer(mb.Compound):
         chains,
         n_chains,
         fractions=None,
-        backfill=H(),
+        backfill=None,
         tile_x=1,
         tile_y=1,
         rotate_chains=True,
         seed=12345,
+        batch_graft=False,
         **kwargs,
     ):
         super(Monolayer, self).__init__()
+        if backfill is None:
+            backfill = H()
 
-        tiled_compound = mb.lib.recipes.TiledCompound(
-            surface, n_tiles=(tile_x, tile_y, 1)
-        )
+        if (tile_x, tile_y) == (1, 1):
+            # A single clone of the surface, keeping its hierarchy
+            tiled_compound = mb.lib.recipes.TiledCompound(
+                surface, n_tiles=(1, 1, 1)
+            )
+        else:
+            # One flat copy, instead of one clone of the surface per tile
+            tiled_compound = TiledSurface(
+                surface, n_tiles=(tile_x, tile_y, 1)
+            ).to_compound()
         self.add(tiled_compound, label="tiled_surface")
 
         msg = "pattern must be the type of mb.Pattern"
         assert isinstance(pattern, mb.Pattern), msg
         # pattern = mb.Random2DPattern(n_chains, seed=seed)
 
-        if not isinstance(chains, list):
-            assert isinstance(chains, mb.Compound)
-            chains = [chains]
-        for chain in chains:
-            assert isinstance(
-                chain, mb.Compound
-            ), "Please provide chains as a list of mbuild.Compound"
-        if not fractions:
-            fractions = [1 / len(chains) for _ in range(len(chains))]
-        if isinstance(fractions, (float, int)):
-            assert fractions == 1
-            fractions = list(fractions)
-        elif isinstance(fractions, (list, tuple)):
-            assert np.sum(fractions) == 1
-        else:
-            raise TypeError(
-                f"Fractions has been provided as type {type(fractions)}. Please provide a list of floats."
-            )
-        if len(chains) != len(fractions):
-            raise ValueError(
-                "Number of fractions does not match the number of chain types provided."
-            )
+        chains, fractions = _check_chains(chains, fractions)
 
-        # Attach final chains, remaining sites get a backfill)
-        # Attach chains of each type to binding sites based on
-        # respective fractions.
+        # Split the pattern among the chain types based on their
+        # respective fractions, attach each chain type to its binding
+        # sites, and backfill the remaining sites with the last type.
         if len(chains) > 1:
-            for chain, fraction in zip(chains[:-1], fractions[:-1]):
-                # Create sub-pattern for this chain type
-                subpattern = deepcopy(pattern)
-                n_points = int(round(fraction * n_chains))
-                warn("\n Adding {} of chain {}".format(n_points, chain))
-                pick = np.random.choice(
-                    subpattern.points.shape[0], n_points, replace=False
-                )
-                points = subpattern.points[pick]
-                subpattern.points = points
-
-                # Remove now-occupied points from overall pattern
-                pattern.points = np.array(
-                    [
-                        point
-                        for point in pattern.points.tolist()
-                        if point not in subpattern.points.tolist()
-                    ]
-                )
-
-                # Attach chains to the surface
-                attached_chains, backfills = subpattern.apply_to_compound(
-                    guest=chain,
-                    host=self["tiled_surface"],
-                    backfill=backfill,
-                    **kwargs,
-                )
-                self.add(attached_chains)
-                self.add(backfills)
-
+            subpatterns = partition_pattern(
+                pattern, fractions, n_chains, seed=seed
+            )
         else:
             warn("\n No fractions provided. Assuming a single chain type.")
+            subpatterns = [pattern]
 
-            attached_chains, backfills = pattern.apply_to_compound(
-                guest=chains[-1],
+        all_chains = list()
+        for i, (chain, subpattern) in enumerate(zip(chains, subpatterns)):
+            if len(chains) > 1:
+                warn("\n Adding {} of chain {}".format(len(subpattern), chain))
+            if batch_graft:
+                apply_pattern = partial(graft_chains, subpattern)
+            else:
+                apply_pattern = subpattern.apply_to_compound
+            attached_chains, backfills = apply_pattern(
+                guest=chain,
                 host=self["tiled_surface"],
-                backfill=backfill,
+                backfill=backfill if i == len(chains) - 1 else None,
                 **kwargs,
             )
             self.add(attached_chains)
             self.add(backfills)
+            all_chains.extend(attached_chains)
 
         if rotate_chains:
-            np.random.seed(seed)
-            for chain in attached_chains:
-                rotation = np.random.random() * np.pi * 2.0
-                chain.spin(rotation, [0, 0, 1], anchor=chain[0])
+            rotations = np.random.RandomState(seed).random_sample(
+                len(all_chains)
+            )
+            spin_chains(all_chains, rotations * np.pi * 2.0, [0, 0, 1])
 
+        extents = Extents()
         system_box_lengths = [
-            self["tiled_surface"].get_boundingbox().lengths[0],
-            self["tiled_surface"].get_boundingbox().lengths[1],
-            self.get_boundingbox().lengths[2],
+            extents.lengths(self["tiled_surface"])[0],
+            extents.lengths(self["tiled_surface"])[1],
+            extents.lengths(self)[2],
         ]
 
         self.box = mb.Box(system_box_lengths)
@@ -166,14 +155,15 @@ class DualMonolayer(mb.Compound):
         self, top, bottom, separation=0.8, shift=True, surface_idx=None
     ):
         super(DualMonolayer, self).__init__()
-        top.spin(np.pi, around=[0, 1, 0])
+        extents = Extents()
+        extents.spin(top, np.pi, around=[0, 1, 0])
 
-        bot_box = bottom.get_boundingbox()
-        top_box = top.get_boundingbox()
-        top_min, top_max = boundary_positions(top)
-        bot_min, bot_max = boundary_positions(bottom)
+        bot_lengths = extents.lengths(bottom)
+        top_lengths = extents.lengths(top)
+        top_min, top_max = extents.bounds(top)
+        bot_min, bot_max = extents.bounds(bottom)
 
-        top.translate([0, 0, bot_max[2] - top_min[2] + separation])
+        extents.translate(top, [0, 0, bot_max[2] - top_min[2] + separation])
 
         if surface_idx:
             if isinstance(surface_idx, dict):
@@ -186,39 +176,24 @@ class DualMonolayer(mb.Compound):
         else:
             surface_idx = dict()
 
-        # Calculated top surface coords
-        xs, ys, zs = list(), list(), list()
+        # Calculated top and bottom surface coords
         if surface_idx.get("top"):
-            for idx in surface_idx["top"]:
-                xs.append(top[idx].pos[0]), ys.append(
-                    top[idx].pos[1]
-                ), zs.append(top[idx].pos[2])
+            top_coords = extents.bounds(top, indices=surface_idx["top"])
         else:
-            for pos in top["tiled_surface"].xyz:
-                xs.append(pos[0]), ys.append(pos[1]), zs.append(pos[2])
-        xs.sort(), ys.sort(), zs.sort()
-        top_coords = ((xs[0], xs[-1]), (ys[0], ys[-1]), (zs[0], zs[-1]))
-
-        # Calculate bottom surface coords
-        xs, ys, zs = list(), list(), list()
+            top_coords = extents.bounds(top["tiled_surface"])
         if surface_idx.get("bottom"):
-            for idx in surface_idx["bottom"]:
-                xs.append(top[idx].pos[0]), ys.append(
-                    top[idx].pos[1]
-                ), zs.append(top[idx].pos[2])
+            bot_coords = extents.bounds(bottom, indices=surface_idx["bottom"])
         else:
-            for pos in bottom["tiled_surface"].xyz:
-                xs.append(pos[0]), ys.append(pos[1]), zs.append(pos[2])
-        xs.sort(), ys.sort(), zs.sort()
-        bot_coords = ((xs[0], xs[-1]), (ys[0], ys[-1]), (zs[0], zs[-1]))
+            bot_coords = extents.bounds(bottom["tiled_surface"])
 
         if shift:
-            top.translate(
+            extents.translate(
+                top,
                 [
                     bot_coords[0][0] - top_coords[0][0],
-                    bot_coords[1][0] - top_coords[1][0],
+                    bot_coords[0][1] - top_coords[0][1],
                     0,
-                ]
+                ],
             )
 
         if (top.name and bottom.name) and (top.name != bottom.name):
@@ -229,9 +204,295 @@ class DualMonolayer(mb.Compound):
             self.add(bottom, label="bottom_monolayer")
 
         system_box_lengths = [
-            max(top_box.lengths[0], bot_box.lengths[0]),
-            max(top_box.lengths[1], bot_box.lengths[1]),
-            self.get_boundingbox().lengths[2],
+            max(top_lengths[0], bot_lengths[0]),
+            max(top_lengths[1], bot_lengths[1]),
+            extents.lengths(top, bottom)[2],
         ]
         self.box = mb.Box(system_box_lengths)
         self.periodicity = bottom.periodicity
+
+
+class MonolayerSpec(object):
+    """A lazily built, array-backed monolayer.
+
+    Records the recipe of a `Monolayer` and computes its struct-of-arrays
+    representation (positions, element codes, bonds and residue offsets)
+    without creating one Python object per particle. An mb.Compound is only
+    created when `compound` is accessed.
+
+    Parameters
+    ----------
+    surface: mb.Compound
+        The surface with ports at its surface.
+    pattern : mb.Pattern
+        Pattern of chains to be attached to the surface.
+    chains: list of mb.Compound
+        The chains that are to be attached to the surface.
+    n_chains: int
+        The number of chains to be attached.
+    fractions: list of fraction of floats, default=None
+        The list of fractions to fill for each compound in `chains`. If
+        the value is not specified, the chains will be proportional on
+        the surface.
+    backfill: mb.Compound, optional, default=None
+        Compound used to backfill leftover ports (after all chains have been attached.
+        Defaults to a hydrogen, H(). Pass False to leave the ports empty.
+    tile_x, tile_y: int, optional, default=(1, 1)
+        The number of surface tiles.
+    rotate_chains: bool, optional, default=True
+        Options to rotate the chain randomly.
+    seed: int, optional, default= 12345
+        Random seed used for any subprocess.
+    dtype: np.dtype, optional, default=np.float64
+        Floating point type of the computed positions.
+    guest_port_name: str, optional, default="down"
+        The port of the chains attached to the surface.
+    backfill_port_name: str, optional, default="up"
+        The port of the backfill attached to the surface.
+    scale: bool, optional, default=True
+        Scale the pattern to the bounding box of the tiled surface.
+    """
+
+    def __init__(
+        self,
+        surface,
+        pattern,
+        chains,
+        n_chains,
+        fractions=None,
+        backfill=None,
+        tile_x=1,
+        tile_y=1,
+        rotate_chains=True,
+        seed=12345,
+        dtype=np.float64,
+        guest_port_name="down",
+        backfill_port_name="up",
+        scale=True,
+    ):
+        msg = "pattern must be the type of mb.Pattern"
+        assert isinstance(pattern, mb.Pattern), msg
+        self.chains, self.fractions = _check_chains(chains, fractions)
+        self.surface = surface
+        self.pattern = pattern
+        self.n_chains = n_chains
+        self.backfill = H() if backfill is None else backfill
+        self.tile_x = tile_x
+        self.tile_y = tile_y
+        self.rotate_chains = rotate_chains
+        self.seed = seed
+        self.dtype = dtype
+        self.guest_port_name = guest_port_name
+        self.backfill_port_name = backfill_port_name
+        self.scale = scale
+        self._arrays = None
+        self._residues = None
+        self._compound = None
+
+    @property
+    def arrays(self):
+        """The `CompoundArrays` of the whole monolayer, built on first use."""
+        if self._arrays is None:
+            self._arrays, self._residues = self._build_arrays()
+        return self._arrays
+
+    @property
+    def xyz(self):
+        """Positions of all particles."""
+        return self.arrays.xyz
+
+    @property
+    def elements(self):
+        """Atomic number of all particles, 0 for particles without one."""
+        return self.arrays.elements
+
+    @property
+    def bonds(self):
+        """Indices of all bonded particle pairs."""
+        return self.arrays.bonds
+
+    @property
+    def residue_offsets(self):
+        """Index of the first particle of each residue, and the total count.
+
+        The tiled surface is the first residue, followed by every chain and
+        backfill in the order `Monolayer` adds them.
+        """
+        self.arrays
+        return self._residues[1]
+
+    @property
+    def residue_names(self):
+        """Name of each residue."""
+        self.arrays
+        return self._residues[0]
+
+    @property
+    def box(self):
+        """The box of the monolayer, as `Monolayer` would set it."""
+        return mb.Box(self.arrays.box_lengths)
+
+    @property
+    def periodicity(self):
+        """Periodicity of the monolayer."""
+        return self.surface.periodicity
+
+    @property
+    def compound(self):
+        """The monolayer as an mb.Compound, built on first access."""
+        if self._compound is None:
+            self._compound = self.to_compound()
+        return self._compound
+
+    def to_compound(self):
+        """Create an mb.Compound from the arrays.
+
+        The tiled surface is labeled "tiled_surface" (as in `Monolayer`) and
+        every chain and backfill is a flat sub-compound of its own.
+        """
+        arrays = self.arrays
+        names, offsets = self._residues
+        particles = arrays.create_particles()
+        monolayer = mb.Compound(name="Monolayer")
+        residues = list()
+        for i, name in enumerate(names):
+            residue = mb.Compound(
+                subcompounds=particles[offsets[i] : offsets[i + 1]], name=name
+            )
+            monolayer.add(residue, label="tiled_surface" if i == 0 else None)
+            residues.append(residue)
+        for i, j in arrays.bonds:
+            monolayer.add_bond((particles[i], particles[j]))
+        owners = np.searchsorted(offsets, arrays.port_anchors, side="right")
+        for i, (label, owner) in enumerate(zip(arrays.port_labels, owners)):
+            residues[owner - 1].add(
+                arrays.create_port(i, particles), label or None
+            )
+
+        monolayer.box = self.box
+        monolayer.periodicity = self.periodicity
+        return monolayer
+
+    def _build_arrays(self):
+        """Compute the arrays and residues of the monolayer."""
+        surface = TiledSurface(
+            self.surface, n_tiles=(self.tile_x, self.tile_y, 1)
+        ).arrays()
+        box_lengths = surface.box_lengths
+        surface_mins = surface.xyz.min(axis=0)
+        surface_lengths = np.ptp(surface.xyz, axis=0)
+        surface_lengths[np.isclose(surface_lengths, 0)] = 0.1
+
+        if len(self.chains) > 1:
+            subpatterns = partition_pattern(
+                self.pattern, self.fractions, self.n_chains, seed=self.seed
+            )
+        else:
+            subpatterns = [self.pattern]
+
+        # Match the pattern points to the surface ports, one chain type
+        # after the other, and backfill the remaining ports.
+        port_positions = surface.port_xyz[:, 0]
+        available = np.ones(len(surface.port_labels), dtype=bool)
+        placements = list()
+        for chain, subpattern in zip(self.chains, subpatterns):
+            points = np.array(subpattern.points, dtype=float)
+            if self.scale:
+                points = points * surface_lengths + surface_mins
+            candidates = np.flatnonzero(available)
+            sites = candidates[
+                match_sites(points, port_positions[candidates], box_lengths)
+            ]
+            available[sites] = False
+            placements.append((chain, self.guest_port_name, sites, True))
+        if self.backfill:
+            placements.append(
+                (
+                    self.backfill,
+                    self.backfill_port_name,
+                    np.flatnonzero(available),
+                    False,
+                )
+            )
+
+        n_rotated = sum(
+            len(sites) for _, _, sites, rotate in placements if rotate
+        )
+        if self.rotate_chains:
+            thetas = np.random.RandomState(self.seed).random_sample(n_rotated)
+            spins = rotation_matrices(thetas * np.pi * 2.0, [0, 0, 1])
+
+        parts = [surface.without_ports(np.flatnonzero(~available))]
+        names = [surface.name]
+        counts = [surface.n_particles]
+        bonds = list()
+        n_particles = surface.n_particles
+        n_spun = 0
+        for compound, port_name, sites, rotate in placements:
+            template = CompoundArrays.from_compound(compound)
+            port = template.port(port_name)
+            anchor = template.port_anchors[port]
+            rotations, shifts = port_transforms(
+                template.port_xyz[port],
+                template.xyz[anchor],
+                surface.port_xyz[sites, :4],
+                surface.xyz[surface.port_anchors[sites]],
+            )
+            if rotate and self.rotate_chains:
+                # Spin each chain about its first particle
+                spin = spins[n_spun : n_spun + len(sites)]
+                first = rotations @ template.xyz[0] + shifts
+                rotations = spin @ rotations
+                shifts = np.einsum("nij,nj->ni", spin, shifts - first) + first
+                n_spun += len(sites)
+            copies = template.without_ports([port]).copies(rotations, shifts)
+
+            offsets = n_particles + np.arange(len(sites)) * template.n_particles
+            bonds.append(
+                np.column_stack([offsets + anchor, surface.port_anchors[sites]])
+            )
+            parts.append(copies)
+            names.extend([compound.name] * len(sites))
+            counts.extend([template.n_particles] * len(sites))
+            n_particles += copies.n_particles
+
+        arrays = CompoundArrays.concatenate(
+            parts, name="Monolayer", bonds=np.concatenate(bonds)
+        )
+        arrays.xyz = arrays.xyz.astype(self.dtype)
+        arrays.box_lengths = np.array(
+            [
+                surface_lengths[0],
+                surface_lengths[1],
+                max(np.ptp(arrays.xyz[:, 2]), 0.1),
+            ]
+        )
+        arrays.periodicity = self.periodicity
+        return arrays, (names, np.cumsum([0] + counts))
+
+
+def _check_chains(chains, fractions):
+    """Validate the chains and their fractions of a monolayer."""
+    if not isinstance(chains, list):
+        assert isinstance(chains, mb.Compound)
+        chains = [chains]
+    for chain in chains:
+        assert isinstance(
+            chain, mb.Compound
+        ), "Please provide chains as a list of mbuild.Compound"
+    if not fractions:
+        fractions = [1 / len(chains) for _ in range(len(chains))]
+    if isinstance(fractions, (float, int)):
+        assert fractions == 1
+        fractions = list(fractions)
+    elif isinstance(fractions, (list, tuple)):
+        assert np.sum(fractions) == 1
+    else:
+        raise TypeError(
+            f"Fractions has been provided as type {type(fractions)}. Please provide a list of floats."
+        )
+    if len(chains) != len(fractions):
+        raise ValueError(
+            "Number of fractions does not match the number of chain types provided."
+        )
+    return chains, fractions
@@ -1,9 +1,16 @@
 """__init__ file for monomers module."""
-from .azpma.azpma import AzPMA
-from .initiators.hexylacetate import HexylAcetate
-from .initiators.vbc import VBC
-from .methacrylate.methacrylate import Methacrylate
-from .mnbdac.mnbdac import mNBDAC
-from .mpc.mpc import MPC
-from .sbma.sbma import SBMA
-from .triazolebiotin.triazolebiotin import TriazoleBiotin
+from surface_coatings.utils.lazy import attach
+
+__getattr__, __dir__, __all__ = attach(
+    __name__,
+    {
+        "AzPMA": ".azpma.azpma",
+        "HexylAcetate": ".initiators.hexylacetate",
+        "VBC": ".initiators.vbc",
+        "Methacrylate": ".methacrylate.methacrylate",
+        "mNBDAC": ".mnbdac.mnbdac",
+        "MPC": ".mpc.mpc",
+        "SBMA": ".sbma.sbma",
+        "TriazoleBiotin": ".triazolebiotin.triazolebiotin",
+    },
+)
@@ -3,7 +3,10 @@ import mbuild as mb
 from mbuild.lib.atoms import H
 from mbuild.lib.moieties import CH2, CH3
 
+from surface_coatings.utils.templates import template
 
+
+@template
 class AzPMA(mb.Compound):
     """AzPMA monomer.
 
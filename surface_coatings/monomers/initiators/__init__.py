@@ -1,3 +1,10 @@
 """__init__ file for initiators."""
-from .hexylacetate import HexylAcetate
-from .vbc import VBC
+from surface_coatings.utils.lazy import attach
+
+__getattr__, __dir__, __all__ = attach(
+    __name__,
+    {
+        "HexylAcetate": ".hexylacetate",
+        "VBC": ".vbc",
+    },
+)
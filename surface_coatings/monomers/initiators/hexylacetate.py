@@ -2,8 +2,11 @@
 import mbuild as mb
 import numpy as np
 
+from surface_coatings.utils.templates import template
+
 
 # HexylAcetate initiator for pMPC
+@template
 class HexylAcetate(mb.Compound):
     """HexylAcetate initiator class."""
 
@@ -3,8 +3,12 @@ import mbuild as mb
 from mbuild.lib.atoms import H
 from mbuild.lib.moieties import CH2, CH3
 
+from surface_coatings.utils.removal import remove_particles
+from surface_coatings.utils.templates import template
+
 
 # VBC initiator (already plugged out Cl)
+@template
 class VBC(mb.Compound):
     """VBC initiator class."""
 
@@ -19,18 +23,15 @@ class VBC(mb.Compound):
             infer_hierarchy=False,
         )
         self.translate(-self[1].pos)
+        # The H replaced by the "down" port
+        remove_particles(self, [10], labels=["down"])
+
         bond_vect = self[8].pos - self[7].pos
         self.add(
             mb.Port(anchor=self[8], orientation=bond_vect, separation=0.07),
             "up",
         )
 
-        # Need to find the H that need to be removed (port will be added automatically)
-        self.remove(self[10])
-        for port in self.all_ports():
-            if not port.access_labels:
-                self.labels["down"] = port
-
 
 if __name__ == "__main__":
     compound = VBC()
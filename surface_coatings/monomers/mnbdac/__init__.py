@@ -1,4 +1,11 @@
 """__init__ file for mNBDAC module."""
-from .mnbdac import mNBDAC
-from .side_chains import AminoPropyl
-from .terminal_groups import Acetaldehyde
+from surface_coatings.utils.lazy import attach
+
+__getattr__, __dir__, __all__ = attach(
+    __name__,
+    {
+        "mNBDAC": ".mnbdac",
+        "AminoPropyl": ".side_chains",
+        "Acetaldehyde": ".terminal_groups",
+    },
+)
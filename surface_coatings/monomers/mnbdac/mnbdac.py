@@ -1,29 +1,26 @@
 """NBDAC monomer class."""
 import mbuild as mb
 
+from surface_coatings.utils.removal import remove_particles
+from surface_coatings.utils.smiles import load_smiles
+from surface_coatings.utils.templates import template
+
 
 # Backbone monomer
+@template
 class mNBDAC(mb.Compound):
     """NBDAC monomer class."""
 
+    smiles = "C=CC1C(C(=O)Cl)C(C(=O)Cl)C(C=C)C1"
+
     def __init__(self):
         super().__init__()
-        self.add(mb.load("C=CC1C(C(=O)Cl)C(C(=O)Cl)C(C=C)C1", smiles=True))
+        self.add(load_smiles(self.smiles))
         self.name = "mNBDAC"
 
-        c_to_remove = [self[0], self[13]]
-        h_to_remove = [self[15], self[16], self[23], self[24]]
-        cl_to_remove = [self[6], self[10]]
-
-        for c in c_to_remove:
-            self.remove(c)
-        for h in h_to_remove:
-            self.remove(h)
-
-        self.labels["up"] = self["Compound[0]"].labels.pop("port[1]")
-        self.labels["down"] = self["Compound[0]"].labels.pop("port[7]")
-
-        for cl in cl_to_remove:
-            self.remove(cl)
-        self.labels["side0"] = self["Compound[0]"].labels.pop("port[13]")
-        self.labels["side1"] = self["Compound[0]"].labels.pop("port[15]")
+        # Vinyl CH2s, then Cls; their hydrogens leave no port
+        remove_particles(
+            self,
+            [0, 13, 6, 10, 15, 16, 23, 24],
+            labels=["up", "down", "side0", "side1"],
+        )
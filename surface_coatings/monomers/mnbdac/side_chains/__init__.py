@@ -1,10 +1,17 @@
 """__init__ file for mNBDAC side chains."""
-from .nh import NH
-from .amino_methyl import AminoMethyl
-from .amino_ethyl import AminoEthyl
-from .amino_propyl import AminoPropyl
-from .o import O
-from .methanol import Methanol
-from .cresol import Cresol
-from .propanol import Propanol
-from .toluidine import Toluidine
+from surface_coatings.utils.lazy import attach
+
+__getattr__, __dir__, __all__ = attach(
+    __name__,
+    {
+        "NH": ".nh",
+        "AminoMethyl": ".amino_methyl",
+        "AminoEthyl": ".amino_ethyl",
+        "AminoPropyl": ".amino_propyl",
+        "O": ".o",
+        "Methanol": ".methanol",
+        "Cresol": ".cresol",
+        "Propanol": ".propanol",
+        "Toluidine": ".toluidine",
+    },
+)
@@ -1,7 +1,11 @@
 """AminoEthyl side chain class."""
 import mbuild as mb
 
+from surface_coatings.utils.removal import remove_particles
+from surface_coatings.utils.templates import template
 
+
+@template
 class AminoEthyl(mb.Compound):
     """AminoEthyl side chain class."""
 
@@ -15,9 +19,4 @@ class AminoEthyl(mb.Compound):
             infer_hierarchy=False,
         )
 
-        to_remove = [self[5], self[9]]
-        for part in to_remove:
-            self.remove(part)
-
-        self.labels["terminal"] = self["Compound[0]"].labels.pop("port[1]")
-        self.labels["side"] = self["Compound[0]"].labels.pop("port[3]")
+        remove_particles(self, [5, 9], labels=["terminal", "side"])
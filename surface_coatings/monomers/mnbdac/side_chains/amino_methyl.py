@@ -1,7 +1,11 @@
 """AminoMethyl side chain class."""
 import mbuild as mb
 
+from surface_coatings.utils.removal import remove_particles
+from surface_coatings.utils.templates import template
 
+
+@template
 class AminoMethyl(mb.Compound):
     """AminoEthyl side chain class."""
 
@@ -15,9 +19,4 @@ class AminoMethyl(mb.Compound):
             infer_hierarchy=False,
         )
 
-        to_remove = [self[4], self[6]]
-        for part in to_remove:
-            self.remove(part)
-
-        self.labels["terminal"] = self["Compound[0]"].labels.pop("port[1]")
-        self.labels["side"] = self["Compound[0]"].labels.pop("port[3]")
+        remove_particles(self, [4, 6], labels=["terminal", "side"])
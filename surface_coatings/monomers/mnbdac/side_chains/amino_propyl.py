@@ -1,7 +1,11 @@
 """AminoPropyl side chain class."""
 import mbuild as mb
 
+from surface_coatings.utils.removal import remove_particles
+from surface_coatings.utils.templates import template
 
+
+@template
 class AminoPropyl(mb.Compound):
     """AminoPropyl side chain class."""
 
@@ -15,9 +19,4 @@ class AminoPropyl(mb.Compound):
             infer_hierarchy=False,
         )
 
-        to_remove = [self[5], self[12]]
-        for part in to_remove:
-            self.remove(part)
-
-        self.labels["side"] = self["Compound[0]"].labels.pop("port[1]")
-        self.labels["terminal"] = self["Compound[0]"].labels.pop("port[3]")
+        remove_particles(self, [5, 12], labels=["side", "terminal"])
@@ -1,7 +1,11 @@
 """Cresol side chain class."""
 import mbuild as mb
 
+from surface_coatings.utils.removal import remove_particles
+from surface_coatings.utils.templates import template
 
+
+@template
 class Cresol(mb.Compound):
     """Cresol side chain class."""
 
@@ -15,9 +19,4 @@ class Cresol(mb.Compound):
             infer_hierarchy=False,
         )
 
-        to_remove = [self[8], self[15]]
-        for part in to_remove:
-            self.remove(part)
-
-        self.labels["side"] = self["Compound[0]"].labels.pop("port[3]")
-        self.labels["terminal"] = self["Compound[0]"].labels.pop("port[1]")
+        remove_particles(self, [8, 15], labels=["terminal", "side"])
@@ -1,7 +1,11 @@
 """Methanol side chain class."""
 import mbuild as mb
 
+from surface_coatings.utils.removal import remove_particles
+from surface_coatings.utils.templates import template
 
+
+@template
 class Methanol(mb.Compound):
     """Methanol side chain class."""
 
@@ -15,9 +19,4 @@ class Methanol(mb.Compound):
             infer_hierarchy=False,
         )
 
-        to_remove = [self[3], self[5]]
-        for part in to_remove:
-            self.remove(part)
-
-        self.labels["terminal"] = self["Compound[0]"].labels.pop("port[1]")
-        self.labels["side"] = self["Compound[0]"].labels.pop("port[3]")
+        remove_particles(self, [3, 5], labels=["terminal", "side"])
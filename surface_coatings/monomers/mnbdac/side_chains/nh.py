@@ -1,21 +1,22 @@
 """A NH with 2 ports."""
 
+import mbuild as mb
 import numpy as np
 
-import mbuild as mb
+from surface_coatings.utils.removal import remove_particles
+from surface_coatings.utils.smiles import load_smiles
+from surface_coatings.utils.templates import template
 
 
+@template
 class NH(mb.Compound):
     """A NH with 2 ports."""
 
+    smiles = "N"
+
     def __init__(self):
         super().__init__()
 
-        self.add(mb.load("N", smiles=True))
-
-        h_to_remove = [self[2], self[3]]
-        for h in h_to_remove:
-            self.remove(h)
+        self.add(load_smiles(self.smiles))
 
-        self.labels["side"] = self["Compound[0]"].labels.pop("port[1]")
-        self.labels["terminal"] = self["Compound[0]"].labels.pop("port[3]")
+        remove_particles(self, [2, 3], labels=["side", "terminal"])
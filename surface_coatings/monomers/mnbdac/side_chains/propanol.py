@@ -1,7 +1,11 @@
 """Propanol side chain class."""
 import mbuild as mb
 
+from surface_coatings.utils.removal import remove_particles
+from surface_coatings.utils.templates import template
 
+
+@template
 class Propanol(mb.Compound):
     """Propanol side chain class."""
 
@@ -15,9 +19,4 @@ class Propanol(mb.Compound):
             infer_hierarchy=False,
         )
 
-        to_remove = [self[4], self[11]]
-        for part in to_remove:
-            self.remove(part)
-
-        self.labels["side"] = self["Compound[0]"].labels.pop("port[3]")
-        self.labels["terminal"] = self["Compound[0]"].labels.pop("port[1]")
+        remove_particles(self, [4, 11], labels=["terminal", "side"])
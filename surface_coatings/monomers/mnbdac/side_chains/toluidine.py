@@ -1,7 +1,11 @@
 """Toluidine side chain class."""
 import mbuild as mb
 
+from surface_coatings.utils.removal import remove_particles
+from surface_coatings.utils.templates import template
 
+
+@template
 class Toluidine(mb.Compound):
     """Toluidine side chain class."""
 
@@ -15,9 +19,4 @@ class Toluidine(mb.Compound):
             infer_hierarchy=False,
         )
 
-        to_remove = [self[8], self[15]]
-        for part in to_remove:
-            self.remove(part)
-
-        self.labels["side"] = self["Compound[0]"].labels.pop("port[1]")
-        self.labels["terminal"] = self["Compound[0]"].labels.pop("port[3]")
+        remove_particles(self, [8, 15], labels=["side", "terminal"])
@@ -1,9 +1,16 @@
 """__init__ file for mNBDAC terminal groups."""
-from .acetaldehyde import Acetaldehyde
-from .acetic_acid import AceticAcid
-from .hexafluorobenzene import Hexafluorobenzene
-from .hydroxyl import Hydroxyl
-from .methyl import Methyl
-from .toluene import Toluene
-from .trifluoromethyl import Trifluoromethyl
-from .aniline import Aniline
+from surface_coatings.utils.lazy import attach
+
+__getattr__, __dir__, __all__ = attach(
+    __name__,
+    {
+        "Acetaldehyde": ".acetaldehyde",
+        "AceticAcid": ".acetic_acid",
+        "Hexafluorobenzene": ".hexafluorobenzene",
+        "Hydroxyl": ".hydroxyl",
+        "Methyl": ".methyl",
+        "Toluene": ".toluene",
+        "Trifluoromethyl": ".trifluoromethyl",
+        "Aniline": ".aniline",
+    },
+)
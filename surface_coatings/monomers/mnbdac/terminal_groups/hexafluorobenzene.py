@@ -1,7 +1,11 @@
 """Hexafluorobenzene terminal group class."""
 import mbuild as mb
 
+from surface_coatings.utils.removal import remove_particles
+from surface_coatings.utils.templates import template
 
+
+@template
 class Hexafluorobenzene(mb.Compound):
     """Hexafluorobenzene terminal group class."""
 
@@ -15,5 +19,4 @@ class Hexafluorobenzene(mb.Compound):
             infer_hierarchy=False,
         )
 
-        self.remove(self[7])
-        self.labels["terminal"] = self["Compound[0]"].labels.pop("port[1]")
+        remove_particles(self, [7], labels=["terminal"])
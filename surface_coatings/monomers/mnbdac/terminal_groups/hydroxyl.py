@@ -1,7 +1,11 @@
 """Hydroxyl terminal group class."""
 import mbuild as mb
 
+from surface_coatings.utils.removal import remove_particles
+from surface_coatings.utils.templates import template
 
+
+@template
 class Hydroxyl(mb.Compound):
     """Hydroxyl terminal group class."""
 
@@ -15,5 +19,4 @@ class Hydroxyl(mb.Compound):
             infer_hierarchy=False,
         )
 
-        self.remove(self[1])
-        self.labels["terminal"] = self["Compound[0]"].labels.pop("port[1]")
+        remove_particles(self, [1], labels=["terminal"])
@@ -1,7 +1,10 @@
 """MPC monomer class."""
 import mbuild as mb
 
+from surface_coatings.utils.templates import template
 
+
+@template
 class MPC(mb.Compound):
     """A 2-(methacryloloxy) ethyl phosophorylcholine monomer."""
 
@@ -3,7 +3,11 @@ import mbuild as mb
 from mbuild.lib.atoms import H
 from mbuild.lib.moieties import CH2, CH3
 
+from surface_coatings.utils.removal import remove_particles
+from surface_coatings.utils.templates import template
 
+
+@template
 class TriazoleBiotin(mb.Compound):
     """TriazoleBiotin monomer class.
 
@@ -27,7 +31,7 @@ class TriazoleBiotin(mb.Compound):
         )
         self.translate(-self[1].pos)
 
-        self.remove(self[27])
+        (port,) = remove_particles(self, [27])
 
         ch3 = CH3()
         self.add(ch3)
@@ -35,7 +39,7 @@ class TriazoleBiotin(mb.Compound):
         mb.force_overlap(
             move_this=ch3,
             from_positions=ch3["up"],
-            to_positions=self["Compound[0]"]["port[1]"],
+            to_positions=port,
         )
 
         bond_vect = self[1].pos - self[0].pos
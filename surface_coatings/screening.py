@@ -0,0 +1,280 @@
+"""Parallel screening of pNBDAC-coated dual monolayers."""
+import csv
+import os
+import time
+import traceback
+import zlib
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from itertools import product
+
+import numpy as np
+
+ScreeningJob = namedtuple(
+    "ScreeningJob", ["name", "side_chain", "terminal_group", "n_chains", "seed"]
+)
+ScreeningResult = namedtuple(
+    "ScreeningResult",
+    ["name", "seed", "seconds", "n_particles", "files", "error"],
+)
+
+_WRITERS = {"gro": "write_gro", "data": "write_lammpsdata", "gsd": "write_gsd"}
+
+
+def screening_jobs(
+    side_chains=None, terminal_groups=None, n_chains=(50,), seed=12345
+):
+    """Create the jobs of a side chain x terminal group x density screen.
+
+    Parameters
+    ----------
+    side_chains : list of str, optional, default=None
+        Names of the classes in `surface_coatings.monomers.mnbdac.side_chains`
+        to be screened. All of them if None.
+    terminal_groups : list of str, optional, default=None
+        Names of the classes in
+        `surface_coatings.monomers.mnbdac.terminal_groups` to be screened.
+        All of them if None.
+    n_chains : list of int, optional, default=(50,)
+        Numbers of chains grafted on each monolayer.
+    seed : int, optional, default=12345
+        Seed from which the seed of each job is derived. The seed of a job
+        only depends on `seed` and on the name of the job, so it does not
+        change when the grid is extended.
+
+    Returns
+    -------
+    jobs : list of ScreeningJob
+    """
+    import surface_coatings.monomers.mnbdac.side_chains as side_chain_module
+    import surface_coatings.monomers.mnbdac.terminal_groups as terminal_group_module
+
+    if side_chains is None:
+        side_chains = side_chain_module.__all__
+    if terminal_groups is None:
+        terminal_groups = terminal_group_module.__all__
+    for name in side_chains:
+        if name not in side_chain_module.__all__:
+            raise ValueError(f"Unknown side chain {name}.")
+    for name in terminal_groups:
+        if name not in terminal_group_module.__all__:
+            raise ValueError(f"Unknown terminal group {name}.")
+
+    jobs = list()
+    for side_chain, terminal_group, n in product(
+        side_chains, terminal_groups, n_chains
+    ):
+        name = f"{side_chain}-{terminal_group}-{n}"
+        job_seed = np.random.SeedSequence(
+            [seed, zlib.crc32(name.encode())]
+        ).generate_state(1)[0]
+        jobs.append(
+            ScreeningJob(name, side_chain, terminal_group, n, int(job_seed))
+        )
+    return jobs
+
+
+def run_screen(
+    jobs,
+    output_dir,
+    formats=("gro",),
+    max_workers=None,
+    chain_kwargs=None,
+    surface_kwargs=None,
+    monolayer_kwargs=None,
+    dual_kwargs=None,
+    solvent_kwargs=None,
+    cache_dir=None,
+    callback=None,
+):
+    """Build the systems of a screen on a process pool.
+
+    Each job builds a pNBDAC chain, grafts it on a SilicaInterfaceCarve
+    surface, assembles a DualMonolayer from two copies of the monolayer and
+    solvates it with SolvatedDualMonolayer. Every random step of a job uses
+    the seed of the job. Workers write their system to `output_dir` as soon
+    as it is built, and a line is appended to `output_dir/report.csv` as each
+    job completes, successfully or not.
+
+    Parameters
+    ----------
+    jobs : list of ScreeningJob
+        The jobs to be run, e.g., created with `screening_jobs`.
+    output_dir : str
+        Directory the systems and the report are written to.
+    formats : list of str, optional, default=("gro",)
+        Output formats, among "gro", "data" (LAMMPS) and "gsd".
+    max_workers : int, optional, default=None
+        Number of worker processes, the number of CPUs if None.
+    chain_kwargs, surface_kwargs, monolayer_kwargs : dict, optional
+        Additional arguments of pNBDAC, SilicaInterfaceCarve and Monolayer.
+    dual_kwargs, solvent_kwargs : dict, optional
+        Additional arguments of DualMonolayer and SolvatedDualMonolayer.
+    cache_dir : str, optional, default=None
+        Directory of a `CompoundCache` the surfaces are loaded from, or
+        stored to once carved. Surfaces are not cached if None.
+    callback : callable, optional, default=None
+        Called with each ScreeningResult as soon as its job completes.
+
+    Returns
+    -------
+    results : list of ScreeningResult
+        The results, in order of completion. Failed jobs have their
+        traceback as `error`.
+    """
+    for fmt in formats:
+        if fmt not in _WRITERS:
+            raise ValueError(
+                f"Unsupported format {fmt}, "
+                f"please choose among {list(_WRITERS)}."
+            )
+    os.makedirs(output_dir, exist_ok=True)
+    options = dict(
+        chain_kwargs=chain_kwargs or dict(),
+        surface_kwargs=surface_kwargs or dict(),
+        monolayer_kwargs=monolayer_kwargs or dict(),
+        dual_kwargs=dual_kwargs or dict(),
+        solvent_kwargs=solvent_kwargs or dict(),
+        cache_dir=cache_dir,
+    )
+
+    results = list()
+    with open(os.path.join(output_dir, "report.csv"), "w", newline="") as f:
+        report = csv.writer(f)
+        report.writerow(ScreeningResult._fields)
+        with ProcessPoolExecutor(max_workers=max_workers) as pool:
+            futures = {
+                pool.submit(build_job, job, output_dir, formats, **options): job
+                for job in jobs
+            }
+            for future in as_completed(futures):
+                job = futures[future]
+                try:
+                    result = future.result()
+                except Exception:
+                    # The worker itself died, e.g., out of memory
+                    result = ScreeningResult(
+                        job.name,
+                        job.seed,
+                        np.nan,
+                        0,
+                        [],
+                        traceback.format_exc(),
+                    )
+                report.writerow(
+                    result._replace(
+                        files=";".join(result.files),
+                        error=result.error.strip().splitlines()[-1]
+                        if result.error
+                        else "",
+                    )
+                )
+                f.flush()
+                results.append(result)
+                if callback:
+                    callback(result)
+    return results
+
+
+def build_job(
+    job,
+    output_dir,
+    formats=("gro",),
+    chain_kwargs=None,
+    surface_kwargs=None,
+    monolayer_kwargs=None,
+    dual_kwargs=None,
+    solvent_kwargs=None,
+    cache_dir=None,
+):
+    """Build and write the system of one screening job.
+
+    See `run_screen` for the parameters. Exceptions are not raised but
+    reported in the `error` field of the result.
+
+    Returns
+    -------
+    result : ScreeningResult
+    """
+    start = time.perf_counter()
+    try:
+        from surface_coatings import writers
+
+        system = _build_system(
+            job,
+            chain_kwargs or dict(),
+            surface_kwargs or dict(),
+            monolayer_kwargs or dict(),
+            dual_kwargs or dict(),
+            solvent_kwargs or dict(),
+            cache_dir,
+        )
+        files = list()
+        for fmt in formats:
+            filename = os.path.join(output_dir, f"{job.name}.{fmt}")
+            getattr(writers, _WRITERS[fmt])(system, filename)
+            files.append(filename)
+    except Exception:
+        return ScreeningResult(
+            job.name,
+            job.seed,
+            time.perf_counter() - start,
+            0,
+            [],
+            traceback.format_exc(),
+        )
+    return ScreeningResult(
+        job.name,
+        job.seed,
+        time.perf_counter() - start,
+        system.n_particles,
+        files,
+        "",
+    )
+
+
+def _build_system(
+    job,
+    chain_kwargs,
+    surface_kwargs,
+    monolayer_kwargs,
+    dual_kwargs,
+    solvent_kwargs,
+    cache_dir=None,
+):
+    """Build the solvated dual monolayer of a job."""
+    import mbuild as mb
+
+    from surface_coatings.chains.nbdac_polymer import pNBDAC
+    from surface_coatings.monolayer import DualMonolayer, Monolayer
+    from surface_coatings.monomers.mnbdac import side_chains, terminal_groups
+    from surface_coatings.solvated_monolayer import SolvatedDualMonolayer
+    from surface_coatings.surfaces import SilicaInterfaceCarve
+    from surface_coatings.utils.cache import CompoundCache
+
+    chain = pNBDAC(
+        monomer=None,
+        side_chains=getattr(side_chains, job.side_chain)(),
+        terminal_groups=getattr(terminal_groups, job.terminal_group)(),
+        **chain_kwargs,
+    )
+    surface_kwargs = dict(dict(seed=job.seed), **surface_kwargs)
+    if cache_dir is None:
+        surface = SilicaInterfaceCarve(**surface_kwargs)
+    else:
+        surface = CompoundCache(cache_dir).build(
+            SilicaInterfaceCarve, **surface_kwargs
+        )
+    monolayer_kwargs = dict(dict(seed=job.seed), **monolayer_kwargs)
+    monolayer = Monolayer(
+        surface=surface,
+        pattern=mb.Random2DPattern(job.n_chains, seed=job.seed),
+        chains=chain,
+        n_chains=job.n_chains,
+        **monolayer_kwargs,
+    )
+    dual_monolayer = DualMonolayer(
+        top=mb.clone(monolayer), bottom=monolayer, **dual_kwargs
+    )
+    solvent_kwargs = dict(dict(seed=job.seed), **solvent_kwargs)
+    return SolvatedDualMonolayer(dual_monolayer, **solvent_kwargs)
@@ -6,6 +6,8 @@ import numpy as np
 from mbuild.lib.moieties import H2O
 from mbuild.packing import solvate
 
+from surface_coatings.utils.extents import Extents
+
 
 class SolvatedMonolayer(mb.Compound):
     """Solvated monolayer system.
@@ -14,8 +16,8 @@ class SolvatedMonolayer(mb.Compound):
     ----------
     monolayer: mb.Compound
         The monolayer to be solvated.
-    solvent: mb.Compound, optional, default=H2O()
-        The solvent to be used.
+    solvent: mb.Compound, optional, default=None
+        The solvent to be used, H2O() if None.
     n_solvents: int, optional, default=1000
         The number of solvent compounds used.
     solvent_box_height: float, optional, default=5
@@ -27,26 +29,19 @@ class SolvatedMonolayer(mb.Compound):
     def __init__(
         self,
         monolayer,
-        solvent=H2O(),
+        solvent=None,
         n_solvents=1000,
         solvent_box_height=5,
         seed=12345,
     ):
         super(SolvatedMonolayer, self).__init__()
-        monolayer_box_lengths = monolayer.get_boundingbox().lengths
-        surface_box_lengths = (
-            monolayer["tiled_surface"].get_boundingbox().lengths
-        )
+        if solvent is None:
+            solvent = H2O()
+        extents = Extents()
+        monolayer_box_lengths = extents.lengths(monolayer)
+        surface_box_lengths = extents.lengths(monolayer["tiled_surface"])
         # Calculate surface coords
-        xs, ys, zs = list(), list(), list()
-        for pos in monolayer["tiled_surface"].xyz:
-            xs.append(pos[0]), ys.append(pos[1]), zs.append(pos[2])
-        xs.sort(), ys.sort(), zs.sort()
-        surface_bounding_coords = (
-            (xs[0], xs[-1]),
-            (ys[0], ys[-1]),
-            (zs[0], zs[-1]),
-        )
+        surface_mins, _ = extents.bounds(monolayer["tiled_surface"])
 
         # Change this to solvating the whole system using the solvate method.
         solvent_box = [
@@ -55,14 +50,13 @@ class SolvatedMonolayer(mb.Compound):
             solvent_box_height,
         ]
         box_of_solvent = mb.fill_box(
-            compound=solvent, box=solvent_box, n_compounds=n_solvents
+            compound=solvent,
+            box=solvent_box,
+            n_compounds=n_solvents,
+            seed=seed,
         )
         box_of_solvent.translate(
-            [
-                surface_bounding_coords[0][0],
-                surface_bounding_coords[1][0],
-                monolayer_box_lengths[2],
-            ]
+            [surface_mins[0], surface_mins[1], monolayer_box_lengths[2]]
         )
         self.add(monolayer, label="monolayer")
         self.add(box_of_solvent, label="solvent")
@@ -83,8 +77,8 @@ class SolvatedDualMonolayer(mb.Compound):
     ----------
     dual_monolayer: mb.Compound
         The dual-monolayer system to be solvated.
-    solvent: mb.Compound, optional, default=H2O()
-        The solvent compound to be used.
+    solvent: mb.Compound, optional, default=None
+        The solvent compound to be used, H2O() if None.
     n_solvents: int, optional, n=1000
         The number of solvent molecules to be used.
     seed: int, optional, default=12345
@@ -92,35 +86,32 @@ class SolvatedDualMonolayer(mb.Compound):
     """
 
     def __init__(
-        self, dual_monolayer, solvent=H2O(), n_solvents=1000, seed=12345
+        self, dual_monolayer, solvent=None, n_solvents=1000, seed=12345
     ):
         super(SolvatedDualMonolayer, self).__init__()
+        if solvent is None:
+            solvent = H2O()
+        extents = Extents()
         top_monolayer = dual_monolayer["top_monolayer"]
-        top_monolayer_box_lengths = top_monolayer.get_boundingbox().lengths
-        top_surface_box_lenghts = (
-            top_monolayer["tiled_surface"].get_boundingbox().lengths
+        top_monolayer_box_lengths = extents.lengths(top_monolayer)
+        top_surface_box_lenghts = extents.lengths(
+            top_monolayer["tiled_surface"]
         )
 
         bottom_monolayer = dual_monolayer["bottom_monolayer"]
-        bottom_monolayer_box_lengths = (
-            bottom_monolayer.get_boundingbox().lengths
-        )
+        bottom_monolayer_box_lengths = extents.lengths(bottom_monolayer)
 
         # Calculate surface coords
-        xs, ys, zs = list(), list(), list()
-        for pos in bottom_monolayer["tiled_surface"].xyz:
-            xs.append(pos[0]), ys.append(pos[1]), zs.append(pos[2])
-        xs.sort(), ys.sort(), zs.sort()
-        bottom_surface_coords = (
-            (xs[0], xs[-1]),
-            (ys[0], ys[-1]),
-            (zs[0], zs[-1]),
+        bottom_surface_mins, _ = extents.bounds(
+            bottom_monolayer["tiled_surface"]
         )
-        bottom_surface_box_lengths = (
-            bottom_monolayer["tiled_surface"].get_boundingbox().lengths
+        bottom_surface_box_lengths = extents.lengths(
+            bottom_monolayer["tiled_surface"]
         )
 
-        dual_monolayer_box_lengths = dual_monolayer.get_boundingbox().lengths
+        dual_monolayer_box_lengths = extents.lengths(
+            top_monolayer, bottom_monolayer
+        )
 
         separation = dual_monolayer_box_lengths[2] - (
             top_monolayer_box_lengths[2] + bottom_monolayer_box_lengths[2]
@@ -131,14 +122,18 @@ class SolvatedDualMonolayer(mb.Compound):
             separation,
         ]
         box_of_solvent = mb.fill_box(
-            compound=solvent, box=solvent_box, n_compounds=n_solvents
+            compound=solvent,
+            box=solvent_box,
+            n_compounds=n_solvents,
+            seed=seed,
         )
-        box_of_solvent.translate(
+        extents.translate(
+            box_of_solvent,
             [
-                bottom_surface_coords[0][0],
-                bottom_surface_coords[1][0],
+                bottom_surface_mins[0],
+                bottom_surface_mins[1],
                 bottom_monolayer_box_lengths[2],
-            ]
+            ],
         )
         self.add(dual_monolayer, label="monolayers")
         self.add(box_of_solvent, label="solvents")
@@ -146,7 +141,7 @@ class SolvatedDualMonolayer(mb.Compound):
         system_box_lengths = [
             max(top_surface_box_lenghts[0], bottom_surface_box_lengths[0]),
             max(top_surface_box_lenghts[1], bottom_surface_box_lengths[1]),
-            self.get_boundingbox().lengths[2],
+            extents.lengths(top_monolayer, bottom_monolayer, box_of_solvent)[2],
         ]
         self.box = mb.Box(system_box_lengths)
         self.periodicity = bottom_monolayer.periodicity
@@ -1,6 +1,13 @@
 """__init__ file for surfaces module."""
-from .silica_interface import SilicaInterface
-from .silica_interface_carve import SilicaInterfaceCarve
-from .silicon_interface import SiliconInterface
-from .graphene_interface import GrapheneSheet
-from .au_interface import AuLattice
+from surface_coatings.utils.lazy import attach
+
+__getattr__, __dir__, __all__ = attach(
+    __name__,
+    {
+        "SilicaInterface": ".silica_interface",
+        "SilicaInterfaceCarve": ".silica_interface_carve",
+        "SiliconInterface": ".silicon_interface",
+        "GrapheneSheet": ".graphene_interface",
+        "AuLattice": ".au_interface",
+    },
+)
@@ -2,6 +2,8 @@
 import mbuild as mb
 import numpy as np
 
+from surface_coatings.utils.lattice import lattice_arrays
+
 
 class AuLattice(mb.Compound):
     """A general gold surface recipe exposed to vacuum.
@@ -21,15 +23,15 @@ class AuLattice(mb.Compound):
     see mbuild.Compound
 
     """
+
     def __init__(self, x=5, y=5, n_layers=3):
         super(AuLattice, self).__init__()
 
         # Estimate the number of lattice repeat units
-        replicate = [int(x/0.40782), int(y/0.40782)]
+        replicate = [int(x / 0.40782), int(y / 0.40782)]
         if all(x <= 0 for x in [x, y]):
-            msg = 'Dimension of graphene sheet must be greater than zero'
+            msg = "Dimension of graphene sheet must be greater than zero"
             raise ValueError(msg)
-        au = mb.Compound(name='Au', element='Au')
         # full Au cell position (face center)
         # au_locations = [
         #     [0, 0, 0], [1, 0, 0], [0, 1, 0], [1, 1, 0], [0.5, 0.5, 0],
@@ -38,24 +40,24 @@ class AuLattice(mb.Compound):
         # ]
 
         au_locations = [
-            [0, 0, 0], [0.5, 0.5, 0],
-            [0, 0.5, 0.5], [0.5, 0, 0.5],
+            [0, 0, 0],
+            [0.5, 0.5, 0],
+            [0, 0.5, 0.5],
+            [0.5, 0, 0.5],
         ]
-        basis = {au.name: au_locations}
+        basis = {"Au": au_locations}
         lattice_spacing = [0.40782, 0.40782, 0.40782]
         angles = [90.0, 90.0, 90.0]
 
-        au_lattice = mb.Lattice(lattice_spacing=lattice_spacing,
-                                      angles=angles, lattice_points=basis)
-
-        au_sheet = au_lattice.populate(compound_dict={au.name: au},
-                                             x=replicate[0], y=replicate[1],
-                                             z=n_layers)
-
-
-        self.add(au_sheet)
+        au_sheet = lattice_arrays(
+            lattice_spacing,
+            angles,
+            basis,
+            n_cells=[replicate[0], replicate[1], n_layers],
+            elements={"Au": "Au"},
+        )
+        au_sheet.xyz -= np.min(au_sheet.xyz, axis=0)
 
-        self.xyz -= np.min(self.xyz, axis=0)
-        self.xyz -= np.min(self.xyz, axis=0)
+        self.add(au_sheet.to_compound())
 
-        self.periodicity = (True, True, True)
\ No newline at end of file
+        self.periodicity = (True, True, True)
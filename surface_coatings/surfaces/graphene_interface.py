@@ -2,6 +2,8 @@
 import mbuild as mb
 import numpy as np
 
+from surface_coatings.utils.lattice import lattice_arrays
+
 
 class GrapheneSheet(mb.Compound):
     """A general graphene surface recipe exposed to vacuum.
@@ -22,36 +24,33 @@ class GrapheneSheet(mb.Compound):
     see mbuild.Compound
 
     """
+
     def __init__(self, x=5, y=5, n_layers=3):
         super(GrapheneSheet, self).__init__()
 
-        factor = np.cos(np.pi/6)
+        factor = np.cos(np.pi / 6)
         # Estimate the number of lattice repeat units
-        replicate = [int(x/0.2456), (y/0.2456)*(1/factor)]
+        replicate = [int(x / 0.2456), (y / 0.2456) * (1 / factor)]
         if all(x <= 0 for x in [x, y]):
-            msg = 'Dimension of graphene sheet must be greater than zero'
+            msg = "Dimension of graphene sheet must be greater than zero"
             raise ValueError(msg)
-        carbon = mb.Compound()
-        carbon.name = 'C'
-        carbon_locations = [[0, 0, 0], [2/3, 1/3, 0]]
-        basis = {carbon.name: carbon_locations}
+        carbon_locations = [[0, 0, 0], [2 / 3, 1 / 3, 0]]
+        basis = {"C": carbon_locations}
         lattice_spacing = [0.2456, 0.2456, 0.335]
         angles = [90.0, 90.0, 120.0]
 
-        graphene_lattice = mb.Lattice(lattice_spacing=lattice_spacing,
-                                      angles=angles, lattice_points=basis)
-
-        graphene = graphene_lattice.populate(compound_dict={carbon.name: carbon},
-                                             x=replicate[0], y=replicate[1],
-                                             z=n_layers)
-
-        for particle in graphene.particles():
-            if particle.xyz[0][0] < 0:
-                particle.xyz[0][0] += graphene.box.Lx
-
-        self.add(graphene)
-        self.xyz -= np.min(self.xyz, axis=0)
-
-        self.xyz -= np.min(self.xyz, axis=0)
-
-        self.periodicity = (True, True, False)
\ No newline at end of file
+        # Carbons sheared to negative x are wrapped back into the box
+        graphene = lattice_arrays(
+            lattice_spacing,
+            angles,
+            basis,
+            n_cells=[replicate[0], replicate[1], n_layers],
+            wrap=(True, False, False),
+        )
+        graphene.xyz -= np.min(graphene.xyz, axis=0)
+
+        sheet = graphene.to_compound()
+        sheet.box = mb.Box(graphene.box_lengths, angles=angles)
+        self.add(sheet)
+
+        self.periodicity = (True, True, False)
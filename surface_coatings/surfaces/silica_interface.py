@@ -2,6 +2,8 @@
 import mbuild as mb
 from mbuild.lib.surfaces import Betacristobalite
 
+from surface_coatings.utils.tiling import TiledSurface
+
 
 class SilicaInterface(mb.Compound):
     """A recipe for creating a crystaline silica interface.
@@ -23,17 +25,8 @@ class SilicaInterface(mb.Compound):
         super(SilicaInterface, self).__init__()
         # silica_crystal = Betacristobalite(dimensions)
         silica_crystal = Betacristobalite()
-        tiled_compound = mb.lib.recipes.TiledCompound(
-            mb.clone(silica_crystal), n_tiles=(tile_x, tile_y, 1)
+        # Particles and ports of every tile, directly at this level
+        TiledSurface(silica_crystal, n_tiles=(tile_x, tile_y, 1)).to_compound(
+            compound=self
         )
-        self.add(tiled_compound, "TiledCompound")
-        self._transfer_ports()
         self.periodicity = (True, True, False)
-
-    def _transfer_ports(self):
-        """Transfer available ports from TiledCompound to parents level."""
-        for port in self["TiledCompound"].available_ports():
-            clone_port = mb.clone(port)
-            clone_port.anchor = port.anchor
-            self.remove(port)
-            self.add(clone_port)
@@ -3,10 +3,18 @@ from __future__ import division
 
 import math
 import random
+from warnings import warn
 
 import mbuild as mb
 import numpy as np
 from mbuild.lib.bulk_materials import AmorphousSilicaBulk
+from scipy import sparse
+from scipy.spatial import cKDTree
+
+from surface_coatings.utils.bonds import BondAdjacency
+from surface_coatings.utils.removal import remove_particles
+from surface_coatings.utils.sites import add_site_ports, site_port
+from surface_coatings.utils.tiling import TiledSurface
 
 
 class SilicaInterfaceCarve(mb.Compound):
@@ -68,10 +76,14 @@ class SilicaInterfaceCarve(mb.Compound):
         self.freud_generate_bonds(
             name_a="Si", name_b="O", dmin=0.0, dmax=0.20419
         )
-        self._strip_stray_atoms()
-        self._bridge_dangling_Os(self._oh_density, thickness)
-        self._identify_surface_sites(thickness)
-        self._adjust_stoichiometry()
+        adjacency = BondAdjacency.from_compound(self)
+        self._strip_stray_atoms(adjacency)
+        self._bridge_dangling_Os(self._oh_density, thickness, adjacency)
+        self._identify_surface_sites(thickness, adjacency)
+        self._adjust_stoichiometry(adjacency)
+        # The ports left by the removed O's are not reactive sites
+        remove_particles(self, ~adjacency.alive, ports=False)
+        self._add_surface_ports()
 
     def _cleave_interface(self, bulk_silica, tile_x, tile_y, thickness):
         """Carve interface from bulk silica.
@@ -82,38 +94,41 @@ class SilicaInterfaceCarve(mb.Compound):
         O_buffer = self._O_buffer
         z_dim = bulk_silica.get_boundingbox().lengths[2]
         tile_z = int(math.ceil((thickness + 2 * O_buffer) / z_dim))
-        bulk = mb.lib.recipes.TiledCompound(
-            bulk_silica, n_tiles=(tile_x, tile_y, tile_z)
-        )
+        # The slab is selected from a single column of bulk tiles, since the
+        # selection only depends on z, and only the kept atoms are tiled
+        column = TiledSurface(bulk_silica, n_tiles=(1, 1, tile_z))
+        names = column.names
+        z = column.xyz[:, 2]
+        keep = (
+            (names == "Si") & (O_buffer < z) & (z < thickness + O_buffer)
+        ) | ((names == "O") & (z < thickness + 2 * O_buffer))
+        slab = column.arrays().without_particles(np.flatnonzero(~keep))
+        slab = TiledSurface(slab, n_tiles=(tile_x, tile_y, 1))
+
+        xyz = slab.xyz
+        names = slab.names
 
         interface = mb.Compound(periodicity=(True, True, False))
-        for i, particle in enumerate(bulk.particles()):
-            if (
-                particle.name == "Si"
-                and O_buffer < particle.pos[2] < (thickness + O_buffer)
-            ) or (
-                particle.name == "O"
-                and particle.pos[2] < (thickness + 2 * O_buffer)
-            ):
-                interface_particle = mb.Compound(
-                    name=particle.name, pos=particle.pos, element=particle.name
-                )
-                interface.add(
-                    interface_particle, particle.name + "_{}".format(i)
-                )
+        interface.add(
+            [
+                mb.Compound(name=name, pos=pos, element=name)
+                for name, pos in zip(names, xyz)
+            ]
+        )
         self.add(interface)
 
-    def _strip_stray_atoms(self):
+    def _strip_stray_atoms(self, adjacency):
         """Remove stray atoms and surface pieces."""
-        components = self.bond_graph.connected_components()
-        major_component = max(components, key=len)
-        for atom in list(self.particles()):
-            if atom not in major_component:
-                self.remove(atom)
+        labels = adjacency.component_labels()
+        major_component = np.argmax(np.bincount(labels[labels >= 0]))
+        stray = np.flatnonzero(adjacency.alive & (labels != major_component))
+        adjacency.remove(stray)
 
-    def _bridge_dangling_Os(self, oh_density, thickness):
+    def _bridge_dangling_Os(self, oh_density, thickness, adjacency):
         """Form Si-O-Si bridges to yield desired density of reactive surface sites.
 
+        Warns if too few Si pairs are close enough to form every bridge.
+
         References
         ----------
         .. [1] Hartkamp, R., Siboulet, B., Dufreche, J.-F., Boasne, B.
@@ -124,71 +139,137 @@ class SilicaInterfaceCarve(mb.Compound):
         area = self.box.lengths[0] * self.box.lengths[1]
         target = int(oh_density * area)
 
-        surface_site_buffer = self._surface_site_buffer
-        dangling_Os = [
-            atom
-            for atom in self.particles()
-            if atom.name == "O"
-            and atom.pos[2] > surface_site_buffer
-            and len(list(self.bond_graph.neighbors(atom))) == 1
-        ]
+        names = adjacency.names
+        xyz = adjacency.xyz
 
+        dangling_Os = np.flatnonzero(
+            (names == "O")
+            & (xyz[:, 2] > self._surface_site_buffer)
+            & (adjacency.degree == 1)
+        )
         n_bridges = int((len(dangling_Os) - target) / 2)
+        if n_bridges <= 0:
+            return
+        silicons = adjacency.first_neighbors(dangling_Os)
 
-        for _ in range(n_bridges):
-            bridged = False
-            while not bridged:
-                O1 = random.choice(dangling_Os)
-                Si1 = list(self.bond_graph.neighbors(O1))[0]
-                for O2 in dangling_Os:
-                    if O2 == O1:
-                        continue
-                    Si2 = list(self.bond_graph.neighbors(O2))[0]
-                    if Si1 == Si2:
-                        continue
-                    if any(
-                        neigh in list(self.bond_graph.neighbors(Si2))
-                        for neigh in list(self.bond_graph.neighbors(Si1))
-                    ):
-                        continue
-                    r = self.min_periodic_distance(Si1.pos, Si2.pos)
-                    if r < 0.45:
-                        bridged = True
-                        self.add_bond((O1, Si2))
-                        dangling_Os.remove(O1)
-                        dangling_Os.remove(O2)
-                        self.remove(O2)
-                        break
-
-    def _identify_surface_sites(self, thickness):
-        """Label surface sites and add ports above them."""
+        # Si-Si pairs within 0.45 nm not sharing any neighbor
+        unique_si, si_of = np.unique(silicons, return_inverse=True)
+        pairs = _periodic_pairs(
+            xyz[unique_si], self.box.lengths, self.periodicity, 0.45
+        )
+        pairs = pairs[adjacency.shared_neighbors(unique_si[pairs]) == 0]
+
+        # Candidate partners of each dangling O, sorted by index
+        si_pairs = sparse.coo_matrix(
+            (
+                np.ones(2 * len(pairs)),
+                (pairs.T.ravel(), pairs[:, ::-1].T.ravel()),
+            ),
+            shape=(len(unique_si), len(unique_si)),
+        )
+        membership = sparse.csr_matrix(
+            (np.ones(len(dangling_Os)), (np.arange(len(dangling_Os)), si_of)),
+            shape=(len(dangling_Os), len(unique_si)),
+        )
+        candidates = (membership @ si_pairs @ membership.T).tocsr()
+        candidates.sort_indices()
+
+        # A bridge only changes the neighbors shared by its two Si, so each
+        # dangling O needs to be tried at most once, in random order.
+        available = np.ones(len(dangling_Os), dtype=bool)
+        bridged = set()
+        bridges = list()
+        order = list(range(len(dangling_Os)))
+        random.shuffle(order)
+        for i in order:
+            if len(bridges) == n_bridges:
+                break
+            if not available[i]:
+                continue
+            row = candidates.indices[
+                candidates.indptr[i] : candidates.indptr[i + 1]
+            ]
+            for j in row[available[row]]:
+                if (si_of[i], si_of[j]) not in bridged:
+                    bridges.append((i, j))
+                    bridged.update([(si_of[i], si_of[j]), (si_of[j], si_of[i])])
+                    available[[i, j]] = False
+                    break
+
+        if len(bridges) < n_bridges:
+            warn(
+                f"Only {len(bridges)} of {n_bridges} Si-O-Si bridges could be "
+                f"formed: the surface has {2 * (n_bridges - len(bridges))} "
+                f"more reactive sites than the target density of {oh_density} "
+                "sites/nm^2."
+            )
+
+        bridges = np.array(bridges, dtype=int).reshape(-1, 2)
+        new_bonds = np.stack(
+            [dangling_Os[bridges[:, 0]], silicons[bridges[:, 1]]], axis=1
+        )
+        removed = dangling_Os[bridges[:, 1]]
+        adjacency.add_bonds(new_bonds)
+        adjacency.remove(removed)
+
+        particles = adjacency.particles
+        for i, j in new_bonds:
+            self.add_bond((particles[i], particles[j]))
+
+    def _identify_surface_sites(self, thickness, adjacency):
+        """Rename the oxygens of the surface sites to O_Surface."""
         surface_site_buffer = self._surface_site_buffer
-        for atom in list(self.particles()):
-            if len(list(self.bond_graph.neighbors(atom))) == 1:
-                if atom.name == "O" and atom.pos[2] > surface_site_buffer:
-                    atom.name = "O_Surface"
-                    port = mb.Port(anchor=atom)
-                    port.spin(np.pi / 2, [1, 0, 0])
-                    port.translate(np.array([0.0, 0.0, 0.1]))
-                    self.add(
-                        port, "port_{}".format(len(self.referenced_ports()))
-                    )
-
-    def _adjust_stoichiometry(self):
+        sites = np.flatnonzero(
+            (adjacency.degree == 1)
+            & (adjacency.names == "O")
+            & (adjacency.xyz[:, 2] > surface_site_buffer)
+        )
+        adjacency.names[sites] = "O_Surface"
+        for i in sites:
+            adjacency.particles[i].name = "O_Surface"
+
+    def _add_surface_ports(self):
+        """Add ports above the surface sites."""
+        template = site_port()
+        template.spin(np.pi / 2, [1, 0, 0])
+        template.translate(np.array([0.0, 0.0, 0.1]))
+        add_site_ports(
+            self, list(self.particles_by_name("O_Surface")), template, "port_"
+        )
+
+    def _adjust_stoichiometry(self, adjacency):
         """Remove O's from underside of surface to yield a 2:1 Si:O ratio."""
-        num_O = len(list(self.particles_by_name("O")))
-        num_Si = len(list(self.particles_by_name("Si")))
-        n_deletions = num_O - 2 * num_Si
-
-        bottom_Os = [
-            atom
-            for atom in self.particles()
-            if atom.name == "O"
-            and atom.pos[2] < self._O_buffer
-            and len(list(self.bond_graph.neighbors(atom))) == 1
-        ]
-
-        for _ in range(n_deletions):
-            O1 = random.choice(bottom_Os)
-            bottom_Os.remove(O1)
-            self.remove(O1)
+        names = adjacency.names[adjacency.alive]
+        num_O = np.count_nonzero(names == "O")
+        num_Si = np.count_nonzero(names == "Si")
+        n_deletions = max(num_O - 2 * num_Si, 0)
+
+        bottom_Os = np.flatnonzero(
+            (adjacency.names == "O")
+            & (adjacency.xyz[:, 2] < self._O_buffer)
+            & (adjacency.degree == 1)
+        )
+
+        removed = random.sample(list(bottom_Os), n_deletions)
+        adjacency.remove(removed)
+
+
+def _periodic_pairs(xyz, lengths, periodicity, cutoff):
+    """Return the pairs of points closer than `cutoff`.
+
+    Distances follow the minimum image convention along the periodic
+    dimensions, like `Compound.min_periodic_distance`.
+
+    Returns
+    -------
+    pairs : np.ndarray, shape=(m, 2)
+        Indices of the close pairs, with i < j.
+    """
+    shifted = xyz - xyz.min(axis=0)
+    boxsize = np.where(
+        periodicity, lengths, shifted.max(axis=0) + cutoff + 1.0
+    ).astype(float)
+    wrapped = np.mod(shifted, boxsize)
+    wrapped[wrapped >= boxsize] = 0.0
+    tree = cKDTree(wrapped, boxsize=boxsize)
+    return tree.query_pairs(cutoff, output_type="ndarray").reshape(-1, 2)
@@ -2,6 +2,10 @@
 import mbuild as mb
 import numpy as np
 
+from surface_coatings.utils.lattice import lattice_arrays
+from surface_coatings.utils.sites import add_site_ports, site_port
+from surface_coatings.utils.tiling import TiledSurface
+
 
 class CrystalineSilicon(mb.Compound):
     """A block of crystaline silicon.
@@ -29,26 +33,20 @@ class CrystalineSilicon(mb.Compound):
             [0.75, 0.75, 0.75],
         ]
 
-        # define lattice object
-        diamond_lattice = mb.Lattice(
-            lattice_spacing=spacings,
-            angles=angles,
-            lattice_points={"A": points},
-        )
-
-        # define Compound
-        si = mb.Compound(name="Si", element="Si")
-
-        # populate lattice with compounds
-        si_lattice = diamond_lattice.populate(
-            compound_dict={"A": si}, x=x, y=y, z=z
-        )
-        si_lattice.periodicity = [True, True, False]
-        si_lattice.freud_generate_bonds(
-            name_a="Si", name_b="Si", dmin=0, dmax=0.236
-        )
+        # populate the diamond lattice with silicon, bonded from the basis
+        si_lattice = lattice_arrays(
+            spacings,
+            angles,
+            {"Si": points},
+            n_cells=[x, y, z],
+            elements={"Si": "Si"},
+            periodicity=(True, True, False),
+            bond_range=(0, 0.236),
+        ).to_compound()
         self.add(si_lattice)
         self.periodicity = si_lattice.periodicity
+        # The periods of the lattice, for tiling
+        self.box = si_lattice.box
 
 
 class SiliconInterface(mb.Compound):
@@ -67,9 +65,9 @@ class SiliconInterface(mb.Compound):
     def __init__(self, x, y, z, tile_x=1, tile_y=1, seed=12345):
         super(SiliconInterface, self).__init__()
         silicon = CrystalineSilicon(x=x, y=y, z=z)
-        tiled_compound = mb.lib.recipes.TiledCompound(
-            mb.clone(silicon), n_tiles=(tile_x, tile_y, 1)
-        )
+        tiled_compound = TiledSurface(
+            silicon, n_tiles=(tile_x, tile_y, 1)
+        ).to_compound()
         self.add(tiled_compound)
         self._identify_surface_sites()
         self.spin(np.pi, [0, 1, 0])
@@ -77,12 +75,11 @@ class SiliconInterface(mb.Compound):
 
     def _identify_surface_sites(self):
         """Identify and add port to silicon at the surface."""
-        for particle in list(self.particles()):
-            if np.isclose(particle.pos[2], 0):
-                label = f"Si_{len(self.referenced_ports())}"
-                self.add(
-                    mb.Port(
-                        anchor=particle, orientation=[0, 0, -1], separation=0.09
-                    ),
-                    label=label,
-                )
+        particles = list(self.particles())
+        sites = np.flatnonzero(np.isclose(self.xyz[:, 2], 0))
+        add_site_ports(
+            self,
+            [particles[i] for i in sites],
+            site_port(orientation=[0, 0, -1], separation=0.09),
+            "Si_",
+        )
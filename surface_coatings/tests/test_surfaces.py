@@ -1,12 +1,14 @@
+import warnings
+
 import mbuild as mb
+import numpy as np
 
 from surface_coatings.surfaces import (
+    AuLattice,
+    GrapheneSheet,
     SilicaInterface,
     SilicaInterfaceCarve,
     SiliconInterface,
-    GrapheneSheet,
-    AuLattice,
-
 )
 
 
@@ -30,3 +32,38 @@ class TestSystem(object):
     def test_au_interface(self):
         au_interface = AuLattice()
         assert au_interface.periodicity == (True, True, True)
+
+    def test_silica_interface_carve_stoichiometry(self):
+        silica_surface_carve = SilicaInterfaceCarve(tile_x=2, tile_y=2)
+        n_si = len(list(silica_surface_carve.particles_by_name("Si")))
+        n_o = len(list(silica_surface_carve.particles_by_name("O")))
+        n_sites = len(list(silica_surface_carve.particles_by_name("O_Surface")))
+        assert n_o == 2 * n_si
+        assert len(silica_surface_carve.available_ports()) == n_sites
+
+    def test_surface_site_labels(self):
+        silicon_surface = SiliconInterface(x=2, y=2, z=1)
+        labels = [
+            label
+            for label, port in silicon_surface.labels.items()
+            if isinstance(port, mb.Port)
+        ]
+        assert labels == [f"Si_{i}" for i in range(len(labels))]
+        anchors = {
+            id(port.anchor) for port in silicon_surface.referenced_ports()
+        }
+        assert len(anchors) == len(labels) > 0
+
+    def test_silica_interface_carve_bridges(self):
+        with warnings.catch_warnings():
+            # A shortfall of Si-O-Si bridges is reported as a warning
+            warnings.simplefilter("error")
+            first = SilicaInterfaceCarve(tile_x=2, tile_y=2, seed=7)
+        second = SilicaInterfaceCarve(tile_x=2, tile_y=2, seed=7)
+        assert np.array_equal(first.xyz, second.xyz)
+        assert first.n_bonds == second.n_bonds
+
+        # Each bridge removes two dangling O's, down to the target density
+        target = int(5.0 * first.box.lengths[0] * first.box.lengths[1])
+        n_sites = len(list(first.particles_by_name("O_Surface")))
+        assert target <= n_sites <= target + 1
@@ -0,0 +1,106 @@
+import mbuild as mb
+import numpy as np
+
+from surface_coatings.chains import Alkylsilane
+from surface_coatings.monolayer import Monolayer, MonolayerSpec
+from surface_coatings.screening import run_screen, screening_jobs
+from surface_coatings.surfaces import SilicaInterface, SilicaInterfaceCarve
+from surface_coatings.writers import write_gro, write_lammpsdata
+
+
+class TestSystem(object):
+    def test_batch_graft(self):
+        kwargs = dict(
+            surface=SilicaInterface(),
+            chains=Alkylsilane(chain_length=5),
+            n_chains=10,
+            rotate_chains=False,
+        )
+        reference = Monolayer(pattern=mb.Random2DPattern(10, seed=1), **kwargs)
+        batched = Monolayer(
+            pattern=mb.Random2DPattern(10, seed=1), batch_graft=True, **kwargs
+        )
+        assert batched.n_particles == reference.n_particles
+        assert batched.n_bonds == reference.n_bonds
+        assert np.allclose(batched.xyz, reference.xyz, atol=1e-6)
+
+        # The copies keep the sub-compounds and labels of the chain
+        def parts(compound):
+            return [
+                (type(part), part.name, sorted(part.labels))
+                for part in compound.successors()
+                if not isinstance(part, mb.Port) and not part.port_particle
+            ]
+
+        assert parts(batched) == parts(reference)
+
+    def test_monolayer_spec(self):
+        kwargs = dict(
+            surface=SilicaInterfaceCarve(),
+            chains=Alkylsilane(chain_length=5),
+            n_chains=10,
+        )
+        reference = Monolayer(pattern=mb.Random2DPattern(10, seed=1), **kwargs)
+        spec = MonolayerSpec(pattern=mb.Random2DPattern(10, seed=1), **kwargs)
+        assert spec.xyz.shape == (reference.n_particles, 3)
+        assert spec.bonds.shape[0] == reference.n_bonds
+        assert np.allclose(spec.xyz, reference.xyz, atol=1e-6)
+        assert spec.residue_offsets[-1] == reference.n_particles
+        assert spec.compound.n_particles == reference.n_particles
+
+    def test_default_backfill(self):
+        kwargs = dict(
+            surface=SilicaInterface(),
+            pattern=mb.Random2DPattern(10, seed=1),
+            chains=Alkylsilane(chain_length=5),
+            n_chains=10,
+        )
+        first, second = MonolayerSpec(**kwargs), MonolayerSpec(**kwargs)
+        # A hydrogen is built for each monolayer, not shared between them
+        assert first.backfill.name == "H"
+        assert first.backfill is not second.backfill
+
+    def test_writers(self, tmp_path):
+        kwargs = dict(
+            surface=SilicaInterfaceCarve(),
+            chains=Alkylsilane(chain_length=5),
+            n_chains=10,
+        )
+        monolayer = Monolayer(pattern=mb.Random2DPattern(10, seed=1), **kwargs)
+        spec = MonolayerSpec(pattern=mb.Random2DPattern(10, seed=1), **kwargs)
+        for system, name in [(monolayer, "compound"), (spec, "spec")]:
+            write_gro(system, tmp_path / f"{name}.gro", chunk_size=100)
+            write_lammpsdata(system, tmp_path / f"{name}.data", chunk_size=100)
+            lines = (tmp_path / f"{name}.gro").read_text().splitlines()
+            assert int(lines[1]) == monolayer.n_particles
+            assert len(lines) == monolayer.n_particles + 3
+            # The surface is the first residue, followed by one per chain
+            assert int(lines[-2][:5]) == spec.residue_offsets.shape[0] - 1
+            data = (tmp_path / f"{name}.data").read_text()
+            assert f"{monolayer.n_bonds} bonds" in data
+            # read_data rejects coefficient sections without coefficients
+            assert "Coeffs" not in data
+
+    def test_screening(self, tmp_path):
+        jobs = screening_jobs(["NH", "O"], ["Methyl"], n_chains=[2, 4])
+        assert len(jobs) == 4
+        assert len(set(job.seed for job in jobs)) == 4
+        extended = screening_jobs(["NH", "O", "Cresol"], ["Methyl"], [2, 4])
+        assert set(jobs) <= set(extended)
+
+        completed = list()
+        results = run_screen(
+            jobs[:1] + [jobs[1]._replace(side_chain="Unknown")],
+            tmp_path,
+            max_workers=2,
+            chain_kwargs=dict(buffer="silane"),
+            solvent_kwargs=dict(n_solvents=10),
+            callback=completed.append,
+        )
+        assert completed == results
+        errors = {result.name: result.error for result in results}
+        assert not errors[jobs[0].name]
+        assert "AttributeError" in errors[jobs[1].name]
+        assert (tmp_path / f"{jobs[0].name}.gro").exists()
+        report = (tmp_path / "report.csv").read_text().splitlines()
+        assert len(report) == 3
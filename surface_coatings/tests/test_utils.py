@@ -0,0 +1,434 @@
+import os
+import subprocess
+import sys
+
+import mbuild as mb
+import numpy as np
+import pytest
+from mbuild.lib.moieties import CH2
+from mbuild.lib.recipes import Polymer
+
+from surface_coatings.chains import Alkylsilane
+from surface_coatings.chains.nbdac_polymer import fmNBDAC
+from surface_coatings.molecules.one_port import OnePort
+from surface_coatings.monomers.mnbdac.side_chains import AminoPropyl, Methanol
+from surface_coatings.monomers.mnbdac.terminal_groups import Acetaldehyde
+from surface_coatings.surfaces import SiliconInterface
+from surface_coatings.utils import assets, smiles
+from surface_coatings.utils.bonds import BondAdjacency
+from surface_coatings.utils.cache import CompoundCache
+from surface_coatings.utils.grafting import match_sites
+from surface_coatings.utils.lattice import lattice_arrays
+from surface_coatings.utils.polymer import build_polymer
+from surface_coatings.utils.removal import remove_particles
+from surface_coatings.utils.smiles import load_smiles
+from surface_coatings.utils.templates import clear_templates
+from surface_coatings.utils.tiling import TiledSurface
+from surface_coatings.utils.utils import partition_pattern
+
+
+class TestUtils(object):
+    def test_partition_pattern(self):
+        pattern = mb.Random2DPattern(1000, seed=1)
+        subpatterns = partition_pattern(
+            pattern, fractions=[0.25, 0.25, 0.5], n_chains=1000, seed=42
+        )
+        assert [len(sub) for sub in subpatterns] == [250, 250, 500]
+        assert np.allclose(
+            np.sort(np.vstack([sub.points for sub in subpatterns]), axis=0),
+            np.sort(pattern.points, axis=0),
+        )
+
+        repeat = partition_pattern(
+            pattern, fractions=[0.25, 0.25, 0.5], n_chains=1000, seed=42
+        )
+        for sub, rep in zip(subpatterns, repeat):
+            assert np.allclose(sub.points, rep.points)
+
+        # Surplus points are dropped, orientations follow their points
+        pattern.orientations = {"normal": 2 * pattern.points}
+        subpatterns = partition_pattern(
+            pattern, fractions=[0.25, 0.75], n_chains=100, seed=42
+        )
+        assert [len(sub) for sub in subpatterns] == [25, 75]
+        for sub in subpatterns:
+            assert np.allclose(sub.orientations["normal"], 2 * sub.points)
+
+    def test_match_sites(self):
+        rng = np.random.default_rng(1)
+        box_lengths = np.array([3.0, 3.0, 5.0])
+        ports = rng.random((200, 3)) * box_lengths
+        points = rng.random((150, 3)) * box_lengths
+        for lengths in (None, box_lengths):
+            # Each point gets the closest port left by the earlier points
+            available = np.ones(len(ports), dtype=bool)
+            for point, site in zip(points, match_sites(points, ports, lengths)):
+                d = np.abs(point - ports)
+                if lengths is not None:
+                    d = np.where(d > lengths / 2, lengths - d, d)
+                distances = np.linalg.norm(d, axis=1)
+                distances[~available] = np.inf
+                assert site == np.argmin(distances)
+                available[site] = False
+        with pytest.raises(ValueError):
+            match_sites(ports, points)
+
+    def test_compound_cache(self, tmp_path):
+        cache = CompoundCache(directory=tmp_path)
+        reference = Alkylsilane(chain_length=5)
+        built = cache.build(Alkylsilane, chain_length=5)
+        loaded = cache.build(Alkylsilane, 5)
+        assert len(list(tmp_path.glob("*.npz"))) == 1
+        for chain in (built, loaded):
+            assert isinstance(chain, Alkylsilane)
+            assert _parts(chain) == _parts(reference)
+            assert sorted(chain.labels) == sorted(reference.labels)
+            assert chain.n_particles == reference.n_particles
+            assert chain.n_bonds == reference.n_bonds
+            assert np.allclose(chain.xyz, reference.xyz)
+            assert np.allclose(chain["down"].pos, reference["down"].pos)
+
+        cache.build(Alkylsilane, chain_length=6)
+        assert len(list(tmp_path.glob("*.npz"))) == 2
+        cache.max_size = 1
+        cache.evict()
+        assert len(list(tmp_path.glob("*.npz"))) == 0
+
+    def test_read_only_cache(self, tmp_path, monkeypatch):
+        cache = CompoundCache(directory=tmp_path)
+        (tmp_path / "corrupt.npz").write_bytes(b"not an archive")
+
+        def read_only(path, *args, **kwargs):
+            raise PermissionError(path)
+
+        monkeypatch.setattr(os, "remove", read_only)
+        monkeypatch.setattr(os, "utime", read_only)
+        assert cache.load("corrupt") is None
+        assert (tmp_path / "corrupt.npz").exists()
+
+    def test_surface_cache(self, tmp_path):
+        cache = CompoundCache(directory=tmp_path)
+        reference = SiliconInterface(x=2, y=2, z=1)
+        sites = [port.anchor.pos for port in reference.referenced_ports()]
+        for _ in range(2):
+            surface = cache.build(SiliconInterface, x=2, y=2, z=1)
+            assert isinstance(surface, SiliconInterface)
+            assert surface.periodicity == reference.periodicity
+            assert np.allclose(surface.xyz, reference.xyz)
+            assert np.allclose(
+                [port.anchor.pos for port in surface.referenced_ports()], sites
+            )
+        cache.build(SiliconInterface, x=2, y=2, z=2)
+        assert len(list(tmp_path.glob("SiliconInterface-*.npz"))) == 2
+
+        assert cache.invalidate(SiliconInterface, x=2, y=2, z=1) == 1
+        assert cache.invalidate(SiliconInterface, x=2, y=2, z=1) == 0
+        assert cache.invalidate(SiliconInterface) == 1
+        assert len(list(tmp_path.glob("*.npz"))) == 0
+
+    def test_templates(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(assets, "BUNDLE_PATH", str(tmp_path / "missing"))
+        calls = list()
+        load = mb.load
+
+        def counting_load(*args, **kwargs):
+            calls.append(args)
+            return load(*args, **kwargs)
+
+        monkeypatch.setattr(mb, "load", counting_load)
+        clear_templates()
+        first, second = OnePort("methyl"), OnePort(molecule="methyl")
+        assert len(calls) == 1
+        assert isinstance(second, OnePort)
+        assert second.n_particles == first.n_particles
+        assert second.n_bonds == first.n_bonds
+        assert np.allclose(second["down"].pos, first["down"].pos)
+
+        second.translate([1, 0, 0])
+        assert not np.allclose(second.xyz, first.xyz)
+
+    def test_asset_bundle(self, tmp_path, monkeypatch):
+        path = str(tmp_path / "assets.bundle")
+        monkeypatch.setattr(assets, "BUNDLE_PATH", path)
+        clear_templates()
+        reference = OnePort("amino")
+
+        builders = [(OnePort, {"molecule": "amino"}), (mb.Compound, {})]
+        keys = assets.compile_bundle(path, builders=builders)
+        assert len(keys) == 1
+        sources = assets.AssetBundle(path).entries[keys[0]]["sources"]
+        assert os.path.join("molecules", "one_port", "one_port.py") in sources
+
+        calls = list()
+        monkeypatch.setattr(
+            mb, "load", lambda *args, **kwargs: calls.append(args)
+        )
+        clear_templates()
+        bundled = OnePort(molecule="amino")
+        assert calls == []
+        assert isinstance(bundled, OnePort)
+        assert _parts(bundled) == _parts(reference)
+        assert [p.name for p in bundled.particles()] == [
+            p.name for p in reference.particles()
+        ]
+        assert np.allclose(bundled.xyz, reference.xyz)
+        assert bundled.n_bonds == reference.n_bonds
+        assert np.allclose(bundled["down"].pos, reference["down"].pos)
+
+    def test_template_compound_arguments(self, monkeypatch):
+        calls = list()
+        force_overlap = mb.force_overlap
+
+        def counting_force_overlap(*args, **kwargs):
+            calls.append(args)
+            return force_overlap(*args, **kwargs)
+
+        monkeypatch.setattr(mb, "force_overlap", counting_force_overlap)
+        clear_templates()
+        side_chains = [AminoPropyl(), Methanol()]
+        first = fmNBDAC(side_chains, terminal_groups=Acetaldehyde())
+        second = fmNBDAC([AminoPropyl(), Methanol()], Acetaldehyde())
+        assert len(calls) == 4
+        assert isinstance(second, fmNBDAC)
+        assert np.allclose(second.xyz, first.xyz)
+        assert "side" in side_chains[0].labels
+
+        fmNBDAC([Methanol(), AminoPropyl()], Acetaldehyde())
+        assert len(calls) == 8
+
+        # Copies keep the sub-compounds and labels of a fresh build
+        fresh = fmNBDAC.__new__(fmNBDAC)
+        fmNBDAC.__init__.__wrapped__(fresh, side_chains, Acetaldehyde())
+        assert _parts(second) == _parts(fresh)
+        assert sorted(second.labels) == sorted(fresh.labels)
+        assert np.allclose(second["up"].pos, fresh["up"].pos)
+
+    def test_load_smiles(self, tmp_path, monkeypatch):
+        calls = list()
+        load = mb.load
+
+        def counting_load(*args, **kwargs):
+            calls.append(args)
+            return load(*args, **kwargs)
+
+        monkeypatch.setattr(mb, "load", counting_load)
+        first = load_smiles("CCO", cache_dir=tmp_path)
+        second = load_smiles("CCO", cache_dir=tmp_path)
+        assert len(calls) == 1
+        assert second.n_bonds == first.n_bonds
+        assert np.allclose(second.xyz, first.xyz)
+
+        # Without RDKit, the stored geometry is still used
+        monkeypatch.setattr(smiles, "_toolkit_version", lambda: None)
+        assert np.allclose(
+            load_smiles("CCO", cache_dir=tmp_path).xyz, first.xyz
+        )
+        assert len(calls) == 1
+
+        monkeypatch.setattr(smiles, "_toolkit_version", lambda: "0.0.0")
+        load_smiles("CCO", cache_dir=tmp_path)
+        assert len(calls) == 2
+
+        # Versions are compared by number, not as strings
+        versions = ["2024.3.9", "2024.3.10", "2023.9.6", "None"]
+        assert max(versions, key=smiles._version_key) == "2024.3.10"
+
+    def test_lazy_imports(self):
+        code = (
+            "import sys, surface_coatings, surface_coatings.chains; "
+            "print([m for m in sys.modules if m.startswith("
+            "('surface_coatings.chains.', 'surface_coatings.monomers'))])"
+        )
+        output = subprocess.run(
+            [sys.executable, "-c", code],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout
+        assert output.strip() == "[]"
+
+    def test_bond_adjacency(self):
+        particles = [mb.Compound(name=name) for name in ["Si", "O", "O", "Si"]]
+        adjacency = BondAdjacency(particles, [(0, 1), (0, 2), (3, 2)])
+        assert list(adjacency.degree) == [2, 1, 2, 1]
+        assert list(adjacency.neighbors(0)) == [1, 2]
+        assert list(adjacency.shared_neighbors([(0, 3), (1, 3)])) == [1, 0]
+        assert len(set(adjacency.component_labels())) == 1
+
+        adjacency.remove([2])
+        assert list(adjacency.degree) == [1, 1, 0, 0]
+        labels = adjacency.component_labels()
+        assert labels[2] == -1 and labels[0] == labels[1] != labels[3]
+
+        adjacency.add_bonds([(1, 3)])
+        assert list(adjacency.first_neighbors([3])) == [1]
+
+    def test_remove_particles(self):
+        chain = mb.Compound(name="Chain")
+        carbons = [
+            mb.Compound(name="C", pos=[0.15 * i, 0, 0]) for i in range(5)
+        ]
+        chain.add(carbons)
+        for pair in zip(carbons[:-1], carbons[1:]):
+            chain.add_bond(pair)
+        chain.add(mb.Port(anchor=carbons[0]), "start")
+        chain.add(mb.Port(anchor=carbons[1]), "removed")
+
+        ports = remove_particles(chain, [4, 1], labels=["a", "b", "c"])
+        assert chain.name == "Chain"
+        assert chain.n_particles == 3
+        assert chain.n_bonds == 1
+        assert set(chain.labels) >= {"start", "a", "b", "c"}
+        assert "removed" not in chain.labels
+        assert [port.anchor for port in ports] == [chain[2], chain[0], chain[1]]
+        assert np.allclose(ports[0].center - chain[2].pos, [0.075, 0, 0])
+
+        mask = np.zeros(chain.n_particles, dtype=bool)
+        mask[0] = True
+        assert remove_particles(chain, mask, ports=False) == []
+        assert chain.n_particles == 2
+        with pytest.raises(ValueError):
+            remove_particles(chain, [0], labels=["a", "b"])
+
+    def test_lattice_arrays(self):
+        spacing = [0.2456, 0.2456, 0.335]
+        angles = [90.0, 90.0, 120.0]
+        basis = {"C": [[0, 0, 0], [2 / 3, 1 / 3, 0]], "O": [[0.5, 0.5, 0.5]]}
+        reference = mb.Lattice(
+            lattice_spacing=spacing, angles=angles, lattice_points=basis
+        ).populate(
+            compound_dict={name: mb.Compound(name=name) for name in basis},
+            x=3,
+            y=4.5,
+            z=2,
+        )
+        lattice = lattice_arrays(spacing, angles, basis, n_cells=[3, 4.5, 2])
+        assert np.allclose(lattice.xyz, reference.xyz)
+        assert list(lattice.names) == [p.name for p in reference.particles()]
+        assert np.allclose(lattice.box_lengths, reference.box.lengths)
+
+        wrapped = lattice_arrays(
+            spacing,
+            angles,
+            basis,
+            n_cells=[3, 4.5, 2],
+            wrap=(True, False, False),
+        )
+        assert np.all(wrapped.xyz[:, 0] >= 0)
+        assert np.allclose(wrapped.xyz[:, 1:], lattice.xyz[:, 1:])
+
+    def test_lattice_bonds(self):
+        points = [
+            [0, 0, 0],
+            [0.5, 0.5, 0],
+            [0.5, 0, 0.5],
+            [0, 0.5, 0.5],
+            [0.25, 0.25, 0.75],
+            [0.25, 0.75, 0.25],
+            [0.75, 0.25, 0.25],
+            [0.75, 0.75, 0.75],
+        ]
+        options = dict(
+            lattice_spacing=[0.54309] * 3,
+            angles=[90, 90, 90],
+            basis={"Si": points},
+            n_cells=[3, 2, 2],
+            periodicity=(True, True, False),
+        )
+        silicon = lattice_arrays(bond_range=(0, 0.236), **options)
+        reference = lattice_arrays(**options).to_compound()
+        reference.freud_generate_bonds(
+            name_a="Si", name_b="Si", dmin=0, dmax=0.236
+        )
+        index = {id(p): i for i, p in enumerate(reference.particles())}
+        bonds = {
+            tuple(sorted((index[id(a)], index[id(b)])))
+            for a, b in reference.bonds()
+        }
+        assert bonds == set(map(tuple, silicon.bonds.tolist()))
+        assert np.all(np.bincount(silicon.bonds.ravel()) >= 2)
+
+    def test_tiled_surface(self):
+        tile = lattice_arrays(
+            [0.3, 0.4, 0.5],
+            [90, 90, 90],
+            {"Si": [[0.5, 0.5, 0.5]]},
+            n_cells=[2, 1, 1],
+            periodicity=(True, True, False),
+        )
+        anchor = mb.Compound(pos=[0.0, 0.0, 0.0])
+        port = mb.Port(anchor=anchor)
+        tile = tile._replace(
+            port_labels=["site"],
+            port_anchors=[1],
+            port_xyz=port.xyz_with_ports[None],
+        )
+        tiled = TiledSurface(tile, n_tiles=(2, 3, 1))
+        arrays = tiled.arrays()
+        assert tiled.n_particles == arrays.n_particles == 12
+        assert np.allclose(tiled.xyz, arrays.xyz)
+        assert list(tiled.names) == list(arrays.names)
+        assert np.allclose(tiled.port_xyz, arrays.port_xyz)
+        assert np.array_equal(tiled.port_anchors, arrays.port_anchors)
+        assert np.allclose(tiled.box_lengths, [1.2, 1.2, 0.5])
+        assert np.allclose(tiled.image_xyz(5), arrays.xyz[10:])
+        with pytest.raises(ValueError):
+            TiledSurface(tile, n_tiles=(1, 1, 2))
+
+        # Ports of sub-compounds are kept, although not labelled in the tile
+        surface = mb.Compound(periodicity=(True, True, False))
+        for x in (0.1, 0.3):
+            site = mb.Compound(name="Site")
+            site.add(mb.Compound(name="Si", element="Si", pos=[x, 0.2, 0.2]))
+            site.add(mb.Port(anchor=site[0]), "up")
+            surface.add(site)
+        surface.box = mb.Box([0.5, 0.5, 0.5])
+        tiled = TiledSurface(surface, n_tiles=(2, 1, 1))
+        compound = tiled.to_compound()
+        assert len(compound.all_ports()) == 4
+        assert np.allclose(
+            np.sort(tiled.xyz[tiled.port_anchors, 0]), [0.1, 0.3, 0.6, 0.8]
+        )
+
+    def test_build_polymer(self):
+        reference = Polymer(monomers=[CH2(), CH2()])
+        reference.build(n=4, sequence="AAB", add_hydrogens=False)
+        polymer = build_polymer([CH2(), CH2()], n=4, sequence="AAB")
+        assert np.allclose(polymer.xyz, reference.xyz)
+        assert polymer.n_bonds == reference.n_bonds
+        assert len(polymer.children) == 12
+        for label in ["up", "down"]:
+            assert np.allclose(polymer[label].pos, reference[label].pos)
+        # The units keep the class and the parts of their monomer
+        units = [
+            unit for unit in reference.children if not isinstance(unit, mb.Port)
+        ]
+        assert [type(unit) for unit in polymer.children] == [
+            type(unit) for unit in units
+        ]
+        assert [
+            [child.name for child in unit.children] for unit in polymer.children
+        ] == [[child.name for child in unit.children] for unit in units]
+
+        # The repeated block "AAB" is detected in the sequence
+        repeated = build_polymer([CH2(), CH2()], n=2, sequence="AABAAB")
+        assert np.allclose(repeated.xyz, polymer.xyz)
+        assert repeated.n_bonds == polymer.n_bonds
+
+        # Blocks stamped from repeated sub-blocks match a unit by unit build
+        reference = Polymer(monomers=[CH2(), CH2(), CH2()])
+        reference.build(n=1, sequence="AABAABCC", add_hydrogens=False)
+        stamped = build_polymer([CH2(), CH2(), CH2()], 1, sequence="AABAABCC")
+        assert np.allclose(stamped.xyz, reference.xyz)
+        assert stamped.n_bonds == reference.n_bonds
+        with pytest.raises(ValueError):
+            build_polymer([CH2()], n=0)
+
+
+def _parts(compound):
+    """Return the class, name and labels of the sub-compounds of a compound."""
+    return [
+        (type(part), part.name, sorted(part.labels))
+        for part in compound.successors()
+        if not isinstance(part, mb.Port) and not part.port_particle
+    ]
@@ -0,0 +1,648 @@
+"""Struct-of-arrays representation of compounds."""
+import functools
+import importlib
+import itertools as it
+
+import ele
+import mbuild as mb
+import numpy as np
+
+
+class CompoundArrays(object):
+    """Compact, array-backed representation of a compound.
+
+    Only what is needed to simulate or rebuild a compound is kept: particle
+    positions, elements and names, bonds, and the ports referenced by the
+    compound. Particles are stored in the order of `Compound.particles()`.
+
+    Parameters
+    ----------
+    xyz : np.ndarray, shape=(n, 3)
+        Positions of the particles.
+    elements : np.ndarray, shape=(n,), dtype=np.uint8
+        Atomic number of each particle, 0 if it has no element.
+    name_codes : np.ndarray, shape=(n,), dtype=np.uint16
+        Index of the name of each particle in `name_table`.
+    name_table : tuple of str
+        The unique particle names.
+    bonds : np.ndarray, shape=(b, 2), dtype=np.int32
+        Indices of the bonded particle pairs.
+    port_labels : list of str, optional, default=None
+        Labels of the ports, empty for ports without a label.
+    port_anchors : np.ndarray, shape=(p,), dtype=np.int32, optional
+        Index of the anchor particle of each port, -1 if it has no anchor.
+    port_xyz : np.ndarray, shape=(p, 8, 3), optional
+        Positions of the port particles, "up" frame first.
+    box_lengths : np.ndarray, shape=(3,), optional, default=None
+        Lengths of the box of the compound.
+    periodicity : tuple of bool, optional, default=(False, False, False)
+        Periodicity of the compound.
+    name : str, optional, default="Compound"
+        Name of the compound.
+    hierarchy : Hierarchy, optional, default=None
+        The tree of sub-compounds the particles and ports belong to. Without
+        it, the arrays describe a flat compound.
+    """
+
+    def __init__(
+        self,
+        xyz,
+        elements,
+        name_codes,
+        name_table,
+        bonds,
+        port_labels=None,
+        port_anchors=None,
+        port_xyz=None,
+        box_lengths=None,
+        periodicity=(False, False, False),
+        name="Compound",
+        hierarchy=None,
+    ):
+        self.xyz = xyz
+        self.elements = np.asarray(elements, dtype=np.uint8)
+        self.name_codes = np.asarray(name_codes, dtype=np.uint16)
+        self.name_table = tuple(name_table)
+        self.bonds = np.asarray(bonds, dtype=np.int32).reshape(-1, 2)
+        self.port_labels = list(port_labels) if port_labels else list()
+        if port_anchors is None:
+            port_anchors = np.empty(0)
+        if port_xyz is None:
+            port_xyz = np.empty((0, 8, 3))
+        self.port_anchors = np.asarray(port_anchors, dtype=np.int32)
+        self.port_xyz = np.asarray(port_xyz, dtype=float).reshape(-1, 8, 3)
+        self.box_lengths = box_lengths
+        self.periodicity = tuple(periodicity)
+        self.name = name
+        self.hierarchy = hierarchy
+
+    @property
+    def n_particles(self):
+        """Number of particles, excluding ports."""
+        return self.xyz.shape[0]
+
+    @property
+    def names(self):
+        """Name of each particle."""
+        return np.asarray(self.name_table)[self.name_codes]
+
+    @classmethod
+    def from_compound(cls, compound, all_ports=False, hierarchy=False):
+        """Create the array representation of an mb.Compound.
+
+        Parameters
+        ----------
+        compound : mb.Compound
+            The compound to be converted. Its ports are those referenced by
+            its labels, as returned by `Compound.referenced_ports`.
+        all_ports : bool, optional, default=False
+            Also keep the ports of `compound` that are not referenced by its
+            labels, with an empty label.
+        hierarchy : bool, optional, default=False
+            Also record the sub-compounds of `compound` and the labels of its
+            parts, see `Hierarchy`. Implies `all_ports`.
+        """
+        particles = list(compound.particles())
+        index = {id(particle): i for i, particle in enumerate(particles)}
+        name_table, name_codes = np.unique(
+            [particle.name for particle in particles], return_inverse=True
+        )
+        bonds = [
+            (index[id(particle1)], index[id(particle2)])
+            for particle1, particle2 in compound.bonds()
+        ]
+
+        ports = dict()
+        for label, port in compound.labels.items():
+            if isinstance(port, mb.Port) and id(port) not in ports:
+                ports[id(port)] = (label, port)
+        if all_ports or hierarchy:
+            for port in compound.all_ports():
+                if id(port) not in ports:
+                    ports[id(port)] = ("", port)
+        port_anchors = [
+            index.get(id(port.anchor), -1) for _, port in ports.values()
+        ]
+        port_xyz = [port.xyz_with_ports for _, port in ports.values()]
+
+        box = compound.box
+        return cls(
+            xyz=np.array([particle.pos for particle in particles]),
+            elements=[
+                getattr(particle.element, "atomic_number", 0)
+                for particle in particles
+            ],
+            name_codes=name_codes,
+            name_table=name_table,
+            bonds=bonds,
+            port_labels=[label for label, _ in ports.values()],
+            port_anchors=port_anchors,
+            port_xyz=port_xyz,
+            box_lengths=None if box is None else np.array(box.lengths),
+            periodicity=compound.periodicity,
+            name=compound.name,
+            hierarchy=Hierarchy.from_compound(
+                compound, [port for _, port in ports.values()]
+            )
+            if hierarchy
+            else None,
+        )
+
+    def to_compound(self, name=None, compound=None):
+        """Create an mb.Compound from the arrays.
+
+        Parameters
+        ----------
+        name : str, optional, default=None
+            Name of the new compound. Defaults to `self.name`.
+        compound : mb.Compound, optional, default=None
+            An empty compound to be filled instead of creating a new one.
+
+        Returns
+        -------
+        compound : mb.Compound
+            A compound with the particles, bonds, ports, box and periodicity
+            stored in the arrays. Without `hierarchy`, it has one child per
+            particle.
+        """
+        if compound is None:
+            compound = mb.Compound(name=name or self.name)
+        particles = self.create_particles()
+        if self.hierarchy is None:
+            compound.add(particles)
+        else:
+            nodes = self.hierarchy.add_nodes(compound, particles)
+        for i, j in self.bonds:
+            compound.add_bond((particles[i], particles[j]))
+        ports = [
+            self.create_port(i, particles) for i in range(len(self.port_labels))
+        ]
+        if self.hierarchy is None:
+            for port, label in zip(ports, self.port_labels):
+                compound.add(port, label or None)
+        else:
+            self.hierarchy.add_ports(compound, nodes, ports, self.port_labels)
+
+        if self.box_lengths is not None:
+            compound.box = mb.Box(self.box_lengths)
+        compound.periodicity = self.periodicity
+        return compound
+
+    def create_particles(self):
+        """Create one mb.Compound per particle, without any bonds."""
+        symbols = {
+            code: ele.element_from_atomic_number(int(code)).symbol
+            for code in np.unique(self.elements)
+            if code
+        }
+        return [
+            mb.Compound(
+                name=self.name_table[code],
+                pos=pos,
+                element=symbols.get(element),
+            )
+            for pos, element, code in zip(
+                self.xyz.astype(float), self.elements, self.name_codes
+            )
+        ]
+
+    def create_port(self, index, particles):
+        """Create the port at `index`, anchored to one of `particles`."""
+        anchor = self.port_anchors[index]
+        port = mb.Port(anchor=particles[anchor] if anchor >= 0 else None)
+        port.xyz_with_ports = self.port_xyz[index]
+        return port
+
+    def port(self, label):
+        """Return the index of the port with a given label."""
+        return self.port_labels.index(label)
+
+    def without_ports(self, indices):
+        """Return a copy of the arrays without the ports at `indices`."""
+        keep = np.ones(len(self.port_labels), dtype=bool)
+        keep[np.asarray(indices, dtype=np.intp)] = False
+        return self._replace(
+            port_labels=[
+                label for label, kept in zip(self.port_labels, keep) if kept
+            ],
+            port_anchors=self.port_anchors[keep],
+            port_xyz=self.port_xyz[keep],
+            hierarchy=None
+            if self.hierarchy is None
+            else self.hierarchy.without_ports(keep),
+        )
+
+    def without_particles(self, indices):
+        """Return a copy of the arrays without the particles at `indices`.
+
+        The bonds and ports of the removed particles are dropped, and the
+        remaining particles keep their order.
+        """
+        keep = np.ones(self.n_particles, dtype=bool)
+        keep[np.asarray(indices, dtype=np.intp)] = False
+        new_index = np.cumsum(keep) - 1
+        bonds = self.bonds[keep[self.bonds].all(axis=1)]
+        anchored = self.port_anchors >= 0
+        kept_ports = ~anchored | keep[np.where(anchored, self.port_anchors, 0)]
+        return self._replace(
+            xyz=self.xyz[keep],
+            elements=self.elements[keep],
+            name_codes=self.name_codes[keep],
+            bonds=new_index[bonds],
+            port_labels=[
+                label
+                for label, kept in zip(self.port_labels, kept_ports)
+                if kept
+            ],
+            port_anchors=np.where(anchored, new_index[self.port_anchors], -1)[
+                kept_ports
+            ],
+            port_xyz=self.port_xyz[kept_ports],
+            hierarchy=None,
+        )
+
+    def copies(self, rotations, shifts):
+        """Return rigidly transformed copies of the arrays, concatenated.
+
+        Parameters
+        ----------
+        rotations : np.ndarray, shape=(n, 3, 3)
+            Rotation matrix of each copy.
+        shifts : np.ndarray, shape=(n, 3)
+            Translation of each copy, applied after the rotation.
+
+        Returns
+        -------
+        copies : CompoundArrays
+            The copies, one after another. Port labels are suffixed with the
+            index of their copy, unlabelled ports stay unlabelled.
+        """
+        n_copies = rotations.shape[0]
+        xyz = np.einsum("nij,mj->nmi", rotations, self.xyz) + shifts[:, None]
+        port_xyz = (
+            np.einsum("nij,pkj->npki", rotations, self.port_xyz)
+            + shifts[:, None, None]
+        )
+        offsets = np.arange(n_copies) * self.n_particles
+        port_anchors = np.where(
+            self.port_anchors >= 0,
+            self.port_anchors + offsets[:, None],
+            -1,
+        )
+        return self._replace(
+            xyz=xyz.reshape(-1, 3),
+            elements=np.tile(self.elements, n_copies),
+            name_codes=np.tile(self.name_codes, n_copies),
+            bonds=(self.bonds + offsets[:, None, None]).reshape(-1, 2),
+            port_labels=[
+                f"{label}_{i}" if label else ""
+                for i in range(n_copies)
+                for label in self.port_labels
+            ],
+            port_anchors=port_anchors.reshape(-1),
+            port_xyz=port_xyz.reshape(-1, 8, 3),
+            hierarchy=None,
+        )
+
+    def tile(self, n_tiles):
+        """Replicate the arrays periodically along the box vectors.
+
+        Like `mb.lib.recipes.TiledCompound`, bonds that cross a periodic
+        boundary of the tile are rewired to the neighboring tile.
+
+        Parameters
+        ----------
+        n_tiles : array-like of int, shape=(3,)
+            Number of tiles in each direction.
+
+        Returns
+        -------
+        tiled : CompoundArrays
+            The tiled arrays, tile by tile, in the order of
+            `itertools.product` over the three directions. Port labels are
+            suffixed with the index of their tile, unlabelled ports stay
+            unlabelled.
+        """
+        n_tiles = np.asarray(n_tiles, dtype=int)
+        lengths = np.asarray(self.box_lengths, dtype=float)
+        grid = np.array(list(it.product(*(range(n) for n in n_tiles))))
+        n_copies = grid.shape[0]
+        offsets = np.arange(n_copies) * self.n_particles
+
+        # Direction of the periodic image each bond partner is found in
+        delta = self.xyz[self.bonds[:, 1]] - self.xyz[self.bonds[:, 0]]
+        half = np.where(lengths > 0, lengths / 2, np.inf)
+        crossing = np.where(np.abs(delta) > half, np.sign(delta), 0)
+        partner_tiles = np.mod(
+            grid[:, None, :] - crossing[None, :, :].astype(int), n_tiles
+        )
+        partner_offsets = (
+            np.ravel_multi_index(
+                tuple(np.moveaxis(partner_tiles, -1, 0)), n_tiles
+            )
+            * self.n_particles
+        )
+        bonds = np.stack(
+            [
+                self.bonds[None, :, 0] + offsets[:, None],
+                self.bonds[None, :, 1] + partner_offsets,
+            ],
+            axis=-1,
+        )
+
+        shifts = grid * lengths
+        port_anchors = np.where(
+            self.port_anchors >= 0,
+            self.port_anchors + offsets[:, None],
+            -1,
+        )
+        return self._replace(
+            xyz=(self.xyz[None] + shifts[:, None]).reshape(-1, 3),
+            elements=np.tile(self.elements, n_copies),
+            name_codes=np.tile(self.name_codes, n_copies),
+            bonds=bonds.reshape(-1, 2),
+            port_labels=[
+                f"{label}_{i}" if label else ""
+                for i in range(n_copies)
+                for label in self.port_labels
+            ],
+            port_anchors=port_anchors.reshape(-1),
+            port_xyz=(self.port_xyz[None] + shifts[:, None, None]).reshape(
+                -1, 8, 3
+            ),
+            box_lengths=lengths * n_tiles,
+            hierarchy=None,
+        )
+
+    @classmethod
+    def concatenate(cls, arrays, name="Compound", bonds=None):
+        """Concatenate several arrays into one.
+
+        Parameters
+        ----------
+        arrays : list of CompoundArrays
+            The arrays to be concatenated, in order.
+        name : str, optional, default="Compound"
+            Name of the concatenated compound.
+        bonds : np.ndarray, shape=(b, 2), optional, default=None
+            Additional bonds between the concatenated arrays, as indices into
+            the concatenated particles.
+
+        Returns
+        -------
+        concatenated : CompoundArrays
+            The box and periodicity are taken from the first arrays.
+        """
+        offsets = np.cumsum([0] + [part.n_particles for part in arrays])
+        name_table = sorted(set().union(*(part.name_table for part in arrays)))
+        lookup = {name: i for i, name in enumerate(name_table)}
+        name_codes = [
+            np.array([lookup[name] for name in part.name_table])[
+                part.name_codes
+            ]
+            for part in arrays
+        ]
+        all_bonds = [
+            part.bonds + offset for part, offset in zip(arrays, offsets)
+        ]
+        if bonds is not None:
+            all_bonds.append(np.asarray(bonds).reshape(-1, 2))
+        return cls(
+            xyz=np.concatenate([part.xyz for part in arrays]),
+            elements=np.concatenate([part.elements for part in arrays]),
+            name_codes=np.concatenate(name_codes),
+            name_table=name_table,
+            bonds=np.concatenate(all_bonds),
+            port_labels=[
+                label for part in arrays for label in part.port_labels
+            ],
+            port_anchors=np.concatenate(
+                [
+                    np.where(
+                        part.port_anchors >= 0, part.port_anchors + offset, -1
+                    )
+                    for part, offset in zip(arrays, offsets)
+                ]
+            ),
+            port_xyz=np.concatenate([part.port_xyz for part in arrays]),
+            box_lengths=arrays[0].box_lengths,
+            periodicity=arrays[0].periodicity,
+            name=name,
+        )
+
+    def _replace(self, **kwargs):
+        """Return a copy of the arrays with some attributes replaced."""
+        attributes = dict(
+            xyz=self.xyz,
+            elements=self.elements,
+            name_codes=self.name_codes,
+            name_table=self.name_table,
+            bonds=self.bonds,
+            port_labels=self.port_labels,
+            port_anchors=self.port_anchors,
+            port_xyz=self.port_xyz,
+            box_lengths=self.box_lengths,
+            periodicity=self.periodicity,
+            name=self.name,
+            hierarchy=self.hierarchy,
+        )
+        attributes.update(kwargs)
+        return CompoundArrays(**attributes)
+
+
+class Hierarchy(object):
+    """The tree of sub-compounds of a compound, stored as flat arrays.
+
+    The nodes of the tree are the sub-compounds and particles of the compound
+    (ports excepted) in depth-first order, so that particles come in the
+    order of `Compound.particles()`. Each node is recreated under its parent
+    with the label it had there, in the form passed to `Compound.add` (e.g.,
+    "C[$]" for the members of the list label "C"). Sub-compounds are
+    recreated as instances of their class, without running its `__init__`,
+    and particles as plain compounds.
+
+    Each port is added to its parent with its label there. Ports labelled in
+    the root compound from deeper in the tree (e.g., with
+    `containment=False`) are also labelled in the root. Other labels
+    referencing parts that are not direct children are not kept.
+
+    Parameters
+    ----------
+    parents : np.ndarray, shape=(m,), dtype=np.int32
+        Index of the parent node of each node, -1 for the root compound.
+    kinds : np.ndarray, shape=(m,), dtype=np.int32
+        Index of the class of each sub-compound in `class_table`, -1 for the
+        particles.
+    class_table : tuple of str
+        The classes of the sub-compounds, as "module:qualname".
+    group_names : list of str
+        Name of each sub-compound, in the order of the nodes.
+    label_codes : np.ndarray, shape=(m,), dtype=np.int32
+        Index of the label of each node in `label_table`.
+    label_table : tuple of str
+        The unique labels, empty for nodes without a label.
+    port_parents : np.ndarray, shape=(p,), dtype=np.int32
+        Index of the parent node of each port, -1 for the root compound.
+    port_parent_labels : list of str
+        Label of each port in its parent, empty if it has none.
+    """
+
+    def __init__(
+        self,
+        parents,
+        kinds,
+        class_table,
+        group_names,
+        label_codes,
+        label_table,
+        port_parents,
+        port_parent_labels,
+    ):
+        self.parents = np.asarray(parents, dtype=np.int32)
+        self.kinds = np.asarray(kinds, dtype=np.int32)
+        self.class_table = tuple(class_table)
+        self.group_names = list(group_names)
+        self.label_codes = np.asarray(label_codes, dtype=np.int32)
+        self.label_table = tuple(label_table)
+        self.port_parents = np.asarray(port_parents, dtype=np.int32)
+        self.port_parent_labels = list(port_parent_labels)
+
+    @classmethod
+    def from_compound(cls, compound, ports):
+        """Record the hierarchy of `compound` and of its `ports`, in order."""
+        parents, kinds, group_names, labels = list(), list(), list(), list()
+        classes = dict()
+        index = {id(compound): -1}
+        child_labels = {id(compound): _child_labels(compound)}
+
+        def visit(parent):
+            for child in parent.children:
+                if isinstance(child, mb.Port):
+                    continue
+                index[id(child)] = len(parents)
+                parents.append(index[id(parent)])
+                labels.append(child_labels[id(parent)].get(id(child), ""))
+                if child.children:
+                    path = (
+                        f"{type(child).__module__}:{type(child).__qualname__}"
+                    )
+                    kinds.append(classes.setdefault(path, len(classes)))
+                    group_names.append(child.name)
+                    child_labels[id(child)] = _child_labels(child)
+                    visit(child)
+                else:
+                    kinds.append(-1)
+
+        visit(compound)
+        label_table = dict()
+        label_codes = [
+            label_table.setdefault(label, len(label_table)) for label in labels
+        ]
+        return cls(
+            parents=parents,
+            kinds=kinds,
+            class_table=list(classes),
+            group_names=group_names,
+            label_codes=label_codes,
+            label_table=list(label_table),
+            port_parents=[index.get(id(port.parent), -1) for port in ports],
+            port_parent_labels=[
+                child_labels.get(id(port.parent), dict()).get(id(port), "")
+                for port in ports
+            ],
+        )
+
+    def add_nodes(self, compound, particles):
+        """Add the sub-compounds and `particles` to `compound`.
+
+        Returns
+        -------
+        nodes : list of mb.Compound
+            The nodes, in order.
+        """
+        nodes = list()
+        group_names = iter(self.group_names)
+        particles = iter(particles)
+        for parent, kind, code in zip(
+            self.parents, self.kinds, self.label_codes
+        ):
+            if kind < 0:
+                node = next(particles)
+            else:
+                node_class = _compound_class(self.class_table[kind])
+                node = node_class.__new__(node_class)
+                mb.Compound.__init__(node, name=next(group_names))
+            label = self.label_table[code]
+            (compound if parent < 0 else nodes[parent]).add(node, label or None)
+            nodes.append(node)
+        return nodes
+
+    def add_ports(self, compound, nodes, ports, port_labels):
+        """Add `ports` to their parent among `nodes`, and label them.
+
+        Parameters
+        ----------
+        port_labels : list of str
+            Labels of the ports in the root compound, see `CompoundArrays`.
+        """
+        for port, parent, label, root_label in zip(
+            ports, self.port_parents, self.port_parent_labels, port_labels
+        ):
+            (compound if parent < 0 else nodes[parent]).add(port, label or None)
+            if root_label and (parent >= 0 or root_label != label):
+                compound.add(port, root_label, containment=False)
+
+    def without_ports(self, keep):
+        """Return a copy of the hierarchy with the ports where `keep`."""
+        return Hierarchy(
+            **dict(
+                self.to_dict(),
+                port_parents=self.port_parents[keep],
+                port_parent_labels=[
+                    label
+                    for label, kept in zip(self.port_parent_labels, keep)
+                    if kept
+                ],
+            )
+        )
+
+    def to_dict(self):
+        """Return the arguments of the hierarchy, by name."""
+        return dict(
+            parents=self.parents,
+            kinds=self.kinds,
+            class_table=self.class_table,
+            group_names=self.group_names,
+            label_codes=self.label_codes,
+            label_table=self.label_table,
+            port_parents=self.port_parents,
+            port_parent_labels=self.port_parent_labels,
+        )
+
+
+def _child_labels(compound):
+    """Return the label of each direct child, as passed to `Compound.add`."""
+    labels = dict()
+    for label, value in compound.labels.items():
+        if isinstance(value, list):
+            for part in value:
+                if part.parent is compound:
+                    labels.setdefault(id(part), f"{label}[$]")
+        elif value.parent is compound:
+            labels.setdefault(id(value), label)
+    return labels
+
+
+@functools.lru_cache(maxsize=None)
+def _compound_class(path):
+    """Return the class of a sub-compound, mb.Compound if unavailable."""
+    module, _, qualname = path.partition(":")
+    try:
+        node_class = importlib.import_module(module)
+        for name in qualname.split("."):
+            node_class = getattr(node_class, name)
+    except (ImportError, AttributeError):
+        return mb.Compound
+    if isinstance(node_class, type) and issubclass(node_class, mb.Compound):
+        return node_class
+    return mb.Compound
@@ -0,0 +1,361 @@
+"""Compiled bundle of the templates built from structure files.
+
+The structure files shipped with the package (pdb and mol2) remain the
+source of truth. `compile_bundle` builds every template that loads one of
+them and stores the resulting `CompoundArrays` (positions, elements, names,
+bonds, ports and hierarchy, as left by the builder) in a single indexed
+binary file. At runtime, the `template` registry reads entries from the
+memory-mapped bundle instead of parsing the files, as long as the files are
+unchanged and the bundle was compiled with the installed mbuild.
+
+The bundle is not built by setup.py, which would rarely have mbuild in an
+isolated build environment. It is compiled before building a release (see
+"Packaged data" in README.md) with::
+
+    python -m surface_coatings.utils.assets
+"""
+import contextlib
+import functools
+import hashlib
+import inspect
+import json
+import os
+import sys
+
+import mbuild as mb
+import numpy as np
+
+from surface_coatings.utils.arrays import CompoundArrays, Hierarchy
+
+# Bump when the layout of the bundle changes
+BUNDLE_VERSION = 2
+
+PACKAGE_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BUNDLE_PATH = os.path.join(PACKAGE_ROOT, "assets.bundle")
+
+_FIELDS = {
+    "xyz": ("particles", np.float64),
+    "elements": ("particles", np.uint8),
+    "name_codes": ("particles", np.uint16),
+    "bonds": ("bonds", np.int32),
+    "port_anchors": ("ports", np.int32),
+    "port_xyz": ("ports", np.float64),
+}
+_ALIGNMENT = 64
+
+
+class AssetBundle(object):
+    """A memory-mapped bundle of compiled templates.
+
+    The file starts with the length of a JSON header (8 bytes, little
+    endian), followed by the header and by one array per field of
+    `CompoundArrays`, with the entries one after another. The header holds
+    the location of each array and, for each entry, its slices of the arrays,
+    its names, port labels, box, hierarchy, and the hashes of its source
+    files.
+
+    Parameters
+    ----------
+    path : str
+        Path of the bundle.
+    """
+
+    def __init__(self, path):
+        with open(path, "rb") as f:
+            size = int.from_bytes(f.read(8), "little")
+            header = json.loads(f.read(size).decode())
+        self.path = path
+        self.version = header["version"]
+        self.mbuild_version = header["mbuild"]
+        self.entries = header["entries"]
+        self.fields = {
+            name: np.memmap(
+                path,
+                dtype=np.dtype(dtype),
+                mode="r",
+                offset=offset,
+                shape=tuple(shape),
+            )
+            if np.prod(shape)
+            else np.empty(shape, dtype=dtype)
+            for name, (dtype, shape, offset) in header["fields"].items()
+        }
+
+    def arrays(self, key):
+        """Return the `CompoundArrays` of an entry, as views of the bundle."""
+        entry = self.entries[key]
+        views = {
+            name: self.fields[name][slice(*entry[extent])]
+            for name, (extent, _) in _FIELDS.items()
+        }
+        return CompoundArrays(
+            name_table=entry["name_table"],
+            port_labels=entry["port_labels"],
+            box_lengths=None
+            if entry["box_lengths"] is None
+            else np.array(entry["box_lengths"]),
+            periodicity=entry["periodicity"],
+            name=entry["name"],
+            hierarchy=Hierarchy(**entry["hierarchy"]),
+            **views,
+        )
+
+    def is_current(self, key):
+        """Return whether the source files of an entry are unchanged.
+
+        The sources are the structure files loaded by the builder and the
+        modules defining it.
+
+        Missing source files are not checked.
+        """
+        for path, digest in self.entries[key]["sources"].items():
+            path = os.path.join(PACKAGE_ROOT, path)
+            if os.path.isfile(path) and _file_digest(path) != digest:
+                return False
+        return True
+
+
+def bundled(cls, arguments):
+    """Return the bundled template of a builder, or None.
+
+    Parameters
+    ----------
+    cls : type
+        The templated builder.
+    arguments : tuple of (str, object)
+        Its arguments, by name, defaults included.
+
+    Returns
+    -------
+    arrays : CompoundArrays or None
+        None if there is no usable bundle, no entry for these arguments, or
+        if a source file of the entry has changed since it was compiled.
+    """
+    bundle = _open_bundle(BUNDLE_PATH)
+    key = bundle_key(cls, arguments)
+    if bundle is None or key not in bundle.entries:
+        return None
+    if not bundle.is_current(key):
+        return None
+    return bundle.arrays(key)
+
+
+def bundle_key(cls, arguments):
+    """Return the bundle key of a builder and its arguments, or None."""
+    try:
+        return json.dumps(
+            [cls.__module__, cls.__qualname__, [list(a) for a in arguments]]
+        )
+    except TypeError:
+        return None
+
+
+def asset_builders():
+    """Return the templated builders to compile, with their arguments.
+
+    Builders that do not load any structure file (e.g., built from SMILES)
+    are skipped by `compile_bundle`.
+    """
+    from surface_coatings.molecules.one_port import OnePort
+    from surface_coatings.monomers import (
+        MPC,
+        SBMA,
+        VBC,
+        AzPMA,
+        HexylAcetate,
+        Methacrylate,
+        TriazoleBiotin,
+    )
+    from surface_coatings.monomers.mnbdac import side_chains, terminal_groups
+
+    pdbs = os.path.join(PACKAGE_ROOT, "molecules", "one_port", "pdbs")
+    builders = [
+        (OnePort, {"molecule": os.path.splitext(name)[0]})
+        for name in sorted(os.listdir(pdbs))
+        if name.endswith(".pdb")
+    ]
+    for cls in (
+        AzPMA,
+        HexylAcetate,
+        MPC,
+        Methacrylate,
+        SBMA,
+        TriazoleBiotin,
+        VBC,
+    ):
+        builders.append((cls, dict()))
+    for module in (side_chains, terminal_groups):
+        builders.extend(
+            (getattr(module, name), dict()) for name in module.__all__
+        )
+    return builders
+
+
+def compile_bundle(path=BUNDLE_PATH, builders=None):
+    """Build the templates loading structure files and write their bundle.
+
+    Parameters
+    ----------
+    path : str, optional, default=BUNDLE_PATH
+        Path of the bundle, the one shipped with the package by default.
+    builders : list of (type, dict), optional, default=None
+        Templated builders and their arguments, `asset_builders()` if None.
+
+    Returns
+    -------
+    keys : list of str
+        The keys of the compiled entries.
+    """
+    if builders is None:
+        builders = asset_builders()
+
+    parts = list()
+    entries = dict()
+    counts = {"particles": 0, "bonds": 0, "ports": 0}
+    for cls, kwargs in builders:
+        build = getattr(cls.__init__, "__wrapped__", cls.__init__)
+        prototype = cls.__new__(cls)
+        bound = inspect.signature(build).bind(prototype, **kwargs)
+        bound.apply_defaults()
+        key = bundle_key(cls, tuple(bound.arguments.items())[1:])
+        sources = list()
+        with _recording_loads(sources):
+            build(prototype, **kwargs)
+        if key is None or not sources:
+            continue
+        # The builders are sources too, with the classes they derive from
+        sources.extend(_class_sources(cls))
+
+        arrays = CompoundArrays.from_compound(prototype, hierarchy=True)
+        sizes = {
+            "particles": arrays.n_particles,
+            "bonds": len(arrays.bonds),
+            "ports": len(arrays.port_labels),
+        }
+        entry = {
+            extent: [counts[extent], counts[extent] + size]
+            for extent, size in sizes.items()
+        }
+        entry.update(
+            name_table=list(arrays.name_table),
+            port_labels=arrays.port_labels,
+            box_lengths=None
+            if arrays.box_lengths is None
+            else np.asarray(arrays.box_lengths).tolist(),
+            periodicity=[bool(p) for p in arrays.periodicity],
+            name=arrays.name,
+            hierarchy={
+                name: value.tolist() if isinstance(value, np.ndarray) else value
+                for name, value in arrays.hierarchy.to_dict().items()
+            },
+            sources={
+                os.path.relpath(source, PACKAGE_ROOT): _file_digest(source)
+                for source in sources
+            },
+        )
+        entries[key] = entry
+        parts.append(arrays)
+        for extent, size in sizes.items():
+            counts[extent] += size
+
+    fields = {
+        name: np.concatenate(
+            [np.asarray(getattr(part, name), dtype=dtype) for part in parts]
+        )
+        if parts
+        else np.empty(0, dtype=dtype)
+        for name, (_, dtype) in _FIELDS.items()
+    }
+    _write_bundle(path, fields, entries)
+    _open_bundle.cache_clear()
+    return list(entries)
+
+
+@functools.lru_cache(maxsize=None)
+def _open_bundle(path):
+    """Open a bundle once per process, None if missing or outdated."""
+    try:
+        bundle = AssetBundle(path)
+    except (OSError, ValueError, KeyError):
+        return None
+    if bundle.version != BUNDLE_VERSION or bundle.mbuild_version != str(
+        mb.__version__
+    ):
+        return None
+    return bundle
+
+
+def _write_bundle(path, fields, entries):
+    """Write the header and the arrays of a bundle."""
+    layout = dict()
+    header = {
+        "version": BUNDLE_VERSION,
+        "mbuild": str(mb.__version__),
+        "fields": layout,
+        "entries": entries,
+    }
+    # The offsets depend on the header size, which depends on the offsets
+    start = 0
+    while True:
+        offset = start
+        for name, array in fields.items():
+            offset = -(-offset // _ALIGNMENT) * _ALIGNMENT
+            layout[name] = [array.dtype.str, list(array.shape), offset]
+            offset += array.nbytes
+        encoded = json.dumps(header).encode()
+        data_start = -(-(8 + len(encoded)) // _ALIGNMENT) * _ALIGNMENT
+        if data_start <= start:
+            break
+        start = data_start
+
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(len(encoded).to_bytes(8, "little"))
+        f.write(encoded)
+        for name, array in fields.items():
+            f.write(b"\0" * (layout[name][2] - f.tell()))
+            f.write(np.ascontiguousarray(array).tobytes())
+    os.replace(tmp_path, path)
+
+
+@contextlib.contextmanager
+def _recording_loads(sources):
+    """Record the files loaded by `mb.load` relative to a module."""
+    load = mb.load
+
+    def recording_load(filename_or_object, *args, **kwargs):
+        module = kwargs.get("relative_to_module")
+        if module and isinstance(filename_or_object, str):
+            directory = os.path.dirname(sys.modules[module].__file__)
+            sources.append(
+                os.path.normpath(os.path.join(directory, filename_or_object))
+            )
+        return load(filename_or_object, *args, **kwargs)
+
+    mb.load = recording_load
+    try:
+        yield sources
+    finally:
+        mb.load = load
+
+
+def _class_sources(cls):
+    """Return the source files of a class and its bases in the package."""
+    paths = list()
+    for base in cls.__mro__:
+        module = sys.modules.get(base.__module__)
+        path = os.path.abspath(getattr(module, "__file__", None) or "")
+        if path.startswith(PACKAGE_ROOT + os.sep) and path not in paths:
+            paths.append(path)
+    return paths
+
+
+def _file_digest(path):
+    """Return the sha256 of a file."""
+    with open(path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+if __name__ == "__main__":
+    keys = compile_bundle()
+    print(f"Compiled {len(keys)} templates into {BUNDLE_PATH}")
@@ -0,0 +1,106 @@
+"""Array snapshot of the bonds of a compound."""
+import numpy as np
+from scipy import sparse
+from scipy.sparse.csgraph import connected_components
+
+
+class BondAdjacency(object):
+    """Compressed-sparse-row adjacency of the particles of a compound.
+
+    Built once from the bond graph, then queried with array operations and
+    updated in place as bonds are added and particles removed, instead of
+    asking the bond graph for the neighbors of one particle at a time.
+    Particles keep their index once removed, with no bonds and
+    `alive` set to False.
+
+    Parameters
+    ----------
+    particles : list of mb.Compound
+        The particles, in the order of `Compound.particles()`.
+    bonds : np.ndarray, shape=(b, 2)
+        Indices of the bonded particle pairs.
+    xyz : np.ndarray, shape=(n, 3), optional, default=None
+        Positions of the particles, read from the particles if None.
+    """
+
+    def __init__(self, particles, bonds, xyz=None):
+        self.particles = particles
+        self.names = np.array(
+            [particle.name for particle in particles], dtype=object
+        )
+        if xyz is None:
+            xyz = np.array([particle.pos for particle in particles])
+        self.xyz = np.asarray(xyz, dtype=float).reshape(-1, 3)
+        self.alive = np.ones(len(particles), dtype=bool)
+        self.matrix = sparse.csr_matrix(
+            (len(particles), len(particles)), dtype=np.int8
+        )
+        self.add_bonds(bonds)
+
+    @classmethod
+    def from_compound(cls, compound):
+        """Create the adjacency of all the particles of `compound`."""
+        particles = list(compound.particles())
+        index = {id(particle): i for i, particle in enumerate(particles)}
+        bonds = [
+            (index[id(particle1)], index[id(particle2)])
+            for particle1, particle2 in compound.bonds()
+        ]
+        return cls(particles, bonds, xyz=compound.xyz)
+
+    @property
+    def degree(self):
+        """Number of bonds of each particle."""
+        return np.diff(self.matrix.indptr)
+
+    def neighbors(self, i):
+        """Return the indices of the particles bonded to particle `i`."""
+        return self.matrix.indices[
+            self.matrix.indptr[i] : self.matrix.indptr[i + 1]
+        ]
+
+    def first_neighbors(self, indices):
+        """Return the first neighbor of each particle at `indices`.
+
+        All the particles at `indices` must have at least one bond.
+        """
+        return self.matrix.indices[self.matrix.indptr[np.asarray(indices)]]
+
+    def shared_neighbors(self, pairs):
+        """Return the number of neighbors shared by each pair of particles."""
+        pairs = np.asarray(pairs, dtype=int).reshape(-1, 2)
+        shared = self.matrix[pairs[:, 0]].multiply(self.matrix[pairs[:, 1]])
+        return np.asarray(shared.sum(axis=1)).ravel().astype(int)
+
+    def component_labels(self):
+        """Return the connected component of each particle, -1 if removed."""
+        _, labels = connected_components(self.matrix, directed=False)
+        labels[~self.alive] = -1
+        return labels
+
+    def add_bonds(self, bonds):
+        """Add bonds between pairs of particle indices."""
+        bonds = np.asarray(bonds, dtype=int).reshape(-1, 2)
+        n = len(self.particles)
+        added = sparse.csr_matrix(
+            (
+                np.ones(2 * len(bonds), dtype=np.int8),
+                (
+                    np.r_[bonds[:, 0], bonds[:, 1]],
+                    np.r_[bonds[:, 1], bonds[:, 0]],
+                ),
+            ),
+            shape=(n, n),
+        )
+        self.matrix = self.matrix + added
+        # Bonds are not weighted, duplicates count once
+        self.matrix.data[:] = 1
+        self.matrix.sort_indices()
+
+    def remove(self, indices):
+        """Remove the particles at `indices` and all of their bonds."""
+        self.alive[np.asarray(indices, dtype=int)] = False
+        keep = sparse.diags(self.alive.astype(np.int8), dtype=np.int8)
+        self.matrix = (keep @ self.matrix @ keep).tocsr()
+        self.matrix.eliminate_zeros()
+        self.matrix.sort_indices()
@@ -0,0 +1,322 @@
+"""Persistent, content-addressed cache of built compounds."""
+import hashlib
+import inspect
+import json
+import os
+import tempfile
+import zipfile
+
+import mbuild as mb
+import numpy as np
+
+from surface_coatings import __version__
+from surface_coatings.utils.arrays import CompoundArrays, Hierarchy
+
+# Bump when the cached layout or any cached builder changes its output
+CACHE_VERSION = 3
+
+
+class CompoundCache(object):
+    """An on-disk cache of compounds keyed on their builder and arguments.
+
+    Each entry is the `CompoundArrays` of a built compound (positions,
+    elements, names, bonds, ports, box, periodicity and hierarchy of
+    sub-compounds) stored as one npz file, named after the builder and a
+    hash of the builder, its normalized arguments, `CACHE_VERSION` and the
+    surface_coatings and mbuild versions.
+    Compound arguments (e.g., monomers or side chains) are hashed by content.
+    When the cache grows beyond `max_size`, the least recently used entries
+    are removed. Entries can also be removed explicitly with `invalidate`.
+
+    Parameters
+    ----------
+    directory : str, optional, default=None
+        Directory of the cache. Defaults to the `SURFACE_COATINGS_CACHE_DIR`
+        environment variable if set, otherwise `~/.cache/surface_coatings`.
+    max_size : int, optional, default=2**30
+        Maximum total size of the cache, in bytes.
+    """
+
+    def __init__(self, directory=None, max_size=2**30):
+        if directory is None:
+            directory = os.environ.get(
+                "SURFACE_COATINGS_CACHE_DIR",
+                os.path.join(
+                    os.path.expanduser("~"), ".cache", "surface_coatings"
+                ),
+            )
+        self.directory = str(directory)
+        self.max_size = max_size
+
+    def build(self, builder, *args, **kwargs):
+        """Build a compound, loading it from the cache if possible.
+
+        The returned compound is an instance of `builder` holding the cached
+        sub-compounds, particles, bonds and ports, with their labels (see
+        `Hierarchy` in `surface_coatings.utils.arrays`). Cache hits and
+        misses return the same structure.
+
+        Parameters
+        ----------
+        builder : type
+            A subclass of mb.Compound, e.g., a chain (Alkylsilane, pNBDAC,
+            SilanePolymer, VBCPolymer) or a surface (SilicaInterfaceCarve,
+            SiliconInterface, SilicaInterface, GrapheneSheet, AuLattice).
+            Its output must only depend on its arguments, including any
+            seed.
+        *args, **kwargs
+            The arguments passed to `builder`.
+
+        Returns
+        -------
+        compound : builder
+        """
+        key = self.key(builder, *args, **kwargs)
+        arrays = self.load(key)
+        if arrays is None:
+            arrays = CompoundArrays.from_compound(
+                builder(*args, **kwargs), hierarchy=True
+            )
+            self.store(key, arrays)
+
+        compound = builder.__new__(builder)
+        mb.Compound.__init__(compound, name=arrays.name)
+        return arrays.to_compound(compound=compound)
+
+    def key(self, builder, *args, **kwargs):
+        """Return the cache key of `builder(*args, **kwargs)`."""
+        arguments = inspect.signature(builder).bind(*args, **kwargs)
+        arguments.apply_defaults()
+        payload = [
+            CACHE_VERSION,
+            __version__,
+            mb.__version__,
+            builder.__module__,
+            builder.__qualname__,
+            _normalize(dict(arguments.arguments)),
+        ]
+        digest = hashlib.sha256(
+            json.dumps(payload, sort_keys=True).encode()
+        ).hexdigest()
+        return f"{builder.__qualname__}-{digest}"
+
+    def path(self, key):
+        """Return the path of the cache entry of `key`."""
+        return os.path.join(self.directory, f"{key}.npz")
+
+    def load(self, key):
+        """Return the `CompoundArrays` cached under `key`, or None."""
+        path = self.path(key)
+        try:
+            with np.load(path, allow_pickle=False) as data:
+                arrays = CompoundArrays(
+                    xyz=data["xyz"],
+                    elements=data["elements"],
+                    name_codes=data["name_codes"],
+                    name_table=data["name_table"].tolist(),
+                    bonds=data["bonds"],
+                    port_labels=data["port_labels"].tolist(),
+                    port_anchors=data["port_anchors"],
+                    port_xyz=data["port_xyz"],
+                    box_lengths=data["box_lengths"]
+                    if data["box_lengths"].size
+                    else None,
+                    periodicity=data["periodicity"].tolist(),
+                    name=str(data["name"]),
+                    hierarchy=_load_hierarchy(data),
+                )
+        except FileNotFoundError:
+            return None
+        except (OSError, KeyError, ValueError, zipfile.BadZipFile):
+            # A corrupted or outdated entry is rebuilt
+            self._remove(path)
+            return None
+        try:
+            os.utime(path)
+        except OSError:
+            # A read-only store, e.g., shipped with the package
+            pass
+        return arrays
+
+    def store(self, key, arrays):
+        """Cache `arrays` under `key`, then evict entries beyond `max_size`."""
+        os.makedirs(self.directory, exist_ok=True)
+        hierarchy = dict()
+        if arrays.hierarchy is not None:
+            hierarchy = {
+                f"hierarchy_{name}": np.asarray(value)
+                if isinstance(value, np.ndarray)
+                else np.array(value, dtype=str)
+                for name, value in arrays.hierarchy.to_dict().items()
+            }
+        with tempfile.NamedTemporaryFile(
+            dir=self.directory, suffix=".tmp", delete=False
+        ) as f:
+            np.savez(
+                f,
+                xyz=arrays.xyz,
+                elements=arrays.elements,
+                name_codes=arrays.name_codes,
+                name_table=np.array(arrays.name_table, dtype=str),
+                bonds=arrays.bonds,
+                port_labels=np.array(arrays.port_labels, dtype=str),
+                port_anchors=arrays.port_anchors,
+                port_xyz=arrays.port_xyz,
+                box_lengths=np.empty(0)
+                if arrays.box_lengths is None
+                else arrays.box_lengths,
+                periodicity=np.array(arrays.periodicity, dtype=bool),
+                name=np.array(arrays.name),
+                **hierarchy,
+            )
+        os.replace(f.name, self.path(key))
+        self.evict()
+
+    def evict(self):
+        """Remove the least recently used entries beyond `max_size`."""
+        entries = list()
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith(".npz"):
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_size:
+                break
+            self._remove(path)
+            total -= size
+
+    def invalidate(self, builder, *args, **kwargs):
+        """Remove cached entries of a builder.
+
+        Parameters
+        ----------
+        builder : type
+            The builder whose entries are removed.
+        *args, **kwargs
+            If given, only the entry of `builder(*args, **kwargs)` is
+            removed. Otherwise, every entry of `builder` is removed, whatever
+            its arguments.
+
+        Returns
+        -------
+        n_removed : int
+            Number of entries removed.
+        """
+        if args or kwargs:
+            paths = [self.path(self.key(builder, *args, **kwargs))]
+        elif os.path.isdir(self.directory):
+            prefix = f"{builder.__qualname__}-"
+            paths = [
+                entry.path
+                for entry in os.scandir(self.directory)
+                if entry.name.startswith(prefix) and entry.name.endswith(".npz")
+            ]
+        else:
+            paths = list()
+        return sum(self._remove(path) for path in paths)
+
+    def clear(self):
+        """Remove every entry of the cache."""
+        if os.path.isdir(self.directory):
+            for entry in os.scandir(self.directory):
+                if entry.name.endswith(".npz"):
+                    self._remove(entry.path)
+
+    @staticmethod
+    def _remove(path):
+        """Remove a cache entry, if it still exists and the store is writable.
+
+        Entries of a read-only store, e.g., shipped with the package, are
+        kept and skipped by `load`.
+        """
+        try:
+            os.remove(path)
+        except OSError:
+            return False
+        return True
+
+
+def cached_build(builder, *args, **kwargs):
+    """Build a compound through the default `CompoundCache`.
+
+    See `CompoundCache.build`. The cache directory can be changed with the
+    `SURFACE_COATINGS_CACHE_DIR` environment variable.
+    """
+    return CompoundCache().build(builder, *args, **kwargs)
+
+
+def fingerprint(compound):
+    """Return a hash of the content of a compound.
+
+    The hash covers the class, particle names, elements and positions
+    (rounded to 1e-6 nm), bonds and labelled ports of the compound.
+    """
+    return arrays_fingerprint(
+        CompoundArrays.from_compound(compound), type(compound).__qualname__
+    )
+
+
+def arrays_fingerprint(arrays, kind=""):
+    """Return a hash of the content of `CompoundArrays`, see `fingerprint`.
+
+    Parameters
+    ----------
+    arrays : CompoundArrays
+        The arrays to be hashed.
+    kind : str, optional, default=""
+        Also hashed, e.g., the class of the compound.
+    """
+    bonds = np.sort(arrays.bonds, axis=1)
+    digest = hashlib.sha256()
+    digest.update(kind.encode())
+    digest.update(json.dumps(list(arrays.name_table)).encode())
+    digest.update(json.dumps(arrays.port_labels).encode())
+    for array in (
+        np.round(arrays.xyz, 6) + 0.0,
+        arrays.elements,
+        arrays.name_codes,
+        bonds[np.lexsort(bonds.T[::-1])],
+        arrays.port_anchors,
+        np.round(arrays.port_xyz, 6) + 0.0,
+    ):
+        digest.update(np.ascontiguousarray(array).tobytes())
+    return digest.hexdigest()
+
+
+def _load_hierarchy(data):
+    """Return the `Hierarchy` stored in an npz entry, None if it has none."""
+    if "hierarchy_parents" not in data.files:
+        return None
+    fields = {
+        name[len("hierarchy_") :]: data[name]
+        for name in data.files
+        if name.startswith("hierarchy_")
+    }
+    return Hierarchy(
+        **{
+            name: value.tolist() if value.dtype.kind == "U" else value
+            for name, value in fields.items()
+        }
+    )
+
+
+def _normalize(value):
+    """Convert a builder argument to a JSON-serializable value."""
+    if isinstance(value, mb.Compound):
+        return {"compound": fingerprint(value)}
+    if isinstance(value, (list, tuple)):
+        return [_normalize(item) for item in value]
+    if isinstance(value, dict):
+        return {str(key): _normalize(item) for key, item in value.items()}
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if isinstance(value, np.generic):
+        return value.item()
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    raise TypeError(f"Cannot build a cache key from {value!r}.")
@@ -0,0 +1,79 @@
+"""Array-native bounding computations shared by the monolayer builders."""
+import numpy as np
+
+
+class Extents(object):
+    """Cached particle positions and extents of compounds.
+
+    Positions are read once per compound with `Compound.xyz` and reused by
+    every later query, until the compound is moved through `translate` or
+    `spin` (or explicitly invalidated). Builders should create one instance
+    per construction so that compounds moved outside of it are not served
+    stale positions.
+    """
+
+    def __init__(self):
+        self._xyz = dict()
+
+    def xyz(self, compound):
+        """Return the particle positions of `compound`, excluding ports."""
+        key = id(compound)
+        if key not in self._xyz:
+            self._xyz[key] = (compound, compound.xyz)
+        return self._xyz[key][1]
+
+    def bounds(self, compound, indices=None):
+        """Return the minimum and maximum coordinates of `compound`.
+
+        Parameters
+        ----------
+        compound : mb.Compound
+            The compound to bound.
+        indices : array-like of int, optional, default=None
+            If provided, only bound the particles at these indices.
+
+        Returns
+        -------
+        mins, maxs : np.ndarray, shape=(3,)
+        """
+        xyz = self.xyz(compound)
+        if indices is not None:
+            xyz = xyz[np.asarray(indices)]
+        return xyz.min(axis=0), xyz.max(axis=0)
+
+    def lengths(self, *compounds):
+        """Return the lengths of the bounding box of one or more compounds.
+
+        Like `Compound.get_boundingbox`, dimensions without any extent are
+        given a length of 0.1 nm.
+        """
+        bounds = [self.bounds(compound) for compound in compounds]
+        mins = np.min([mins for mins, _ in bounds], axis=0)
+        maxs = np.max([maxs for _, maxs in bounds], axis=0)
+        lengths = maxs - mins
+        lengths[np.isclose(lengths, 0)] = 0.1
+        return lengths
+
+    def translate(self, compound, by):
+        """Translate `compound` and update the cached positions."""
+        compound.translate(by)
+        for key, (cached, xyz) in list(self._xyz.items()):
+            if cached is compound or compound in cached.ancestors():
+                self._xyz[key] = (cached, xyz + np.asarray(by))
+            elif cached in compound.ancestors():
+                del self._xyz[key]
+
+    def spin(self, compound, theta, around):
+        """Spin `compound` and drop the cached positions it affects."""
+        compound.spin(theta, around)
+        self.invalidate(compound)
+
+    def invalidate(self, compound):
+        """Drop the cached positions of `compound`, its parts and parents."""
+        for key, (cached, _) in list(self._xyz.items()):
+            if (
+                cached is compound
+                or compound in cached.ancestors()
+                or cached in compound.ancestors()
+            ):
+                del self._xyz[key]
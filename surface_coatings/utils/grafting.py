@@ -0,0 +1,422 @@
+"""Batched attachment of chains to the ports of a host compound."""
+import mbuild as mb
+import numpy as np
+from scipy.spatial import cKDTree
+
+from surface_coatings.utils.arrays import CompoundArrays
+
+
+class GraftedChains(object):
+    """Copies of a guest compound placed onto a set of host ports.
+
+    The copies are only stored as rigid transforms of the guest until
+    `materialize` is called, so no compound hierarchy is cloned while the
+    placement is computed.
+
+    Parameters
+    ----------
+    guest : mb.Compound
+        The compound prototype being placed.
+    guest_port_name : str
+        The label of the port on `guest` that is attached to the host.
+    host_ports : list of mb.Port
+        The host port each copy is attached to.
+    rotations : np.ndarray, shape=(n, 3, 3)
+    shifts : np.ndarray, shape=(n, 3)
+        The transform of each copy: a point `x` of `guest` is placed at
+        `rotations @ x + shifts`.
+    """
+
+    def __init__(self, guest, guest_port_name, host_ports, rotations, shifts):
+        self.guest = guest
+        self.guest_port_name = guest_port_name
+        self.host_ports = host_ports
+        self.rotations = rotations
+        self.shifts = shifts
+
+    def __len__(self):
+        return len(self.host_ports)
+
+    @property
+    def xyz(self):
+        """Positions of the particles of each copy, excluding ports."""
+        return (
+            np.einsum("nij,mj->nmi", self.rotations, self.guest.xyz)
+            + self.shifts[:, None, :]
+        )
+
+    def materialize(self):
+        """Create the placed copies and bond them to the host.
+
+        The copies are created from the arrays of the guest, with its
+        hierarchy and labels (see `CompoundArrays.to_compound`), rather than
+        cloned one by one.
+
+        Returns
+        -------
+        guests : list of mb.Compound
+            The placed copies of the guest, to be added to the host's root.
+        """
+        arrays = CompoundArrays.from_compound(self.guest, hierarchy=True)
+        guest_port = arrays.port(self.guest_port_name)
+        anchor = int(arrays.port_anchors[guest_port])
+        # The attached port is used up by the bond to the host
+        arrays = arrays.without_ports([guest_port])
+        xyz = (
+            np.einsum("nij,mj->nmi", self.rotations, arrays.xyz)
+            + self.shifts[:, None, :]
+        )
+        port_xyz = (
+            np.einsum("nij,pkj->npki", self.rotations, arrays.port_xyz)
+            + self.shifts[:, None, None, :]
+        )
+
+        guest_class = type(self.guest)
+        guests = list()
+        for host_port, copy_xyz, copy_port_xyz in zip(
+            self.host_ports, xyz, port_xyz
+        ):
+            new_guest = guest_class.__new__(guest_class)
+            mb.Compound.__init__(new_guest, name=arrays.name)
+            arrays._replace(xyz=copy_xyz, port_xyz=copy_port_xyz).to_compound(
+                compound=new_guest
+            )
+            guest_anchor = new_guest[anchor]
+            bond = (guest_anchor, host_port.anchor)
+            guest_anchor.parent.add_bond(bond)
+            host_port.anchor.parent.add_bond(bond)
+            guests.append(new_guest)
+
+        if self.host_ports:
+            self.host_ports[0].root.remove(self.host_ports)
+        return guests
+
+
+def graft_chains(
+    pattern,
+    guest,
+    guest_port_name="down",
+    host=None,
+    backfill=None,
+    backfill_port_name="up",
+    scale=True,
+    materialize=True,
+):
+    """Attach copies of a guest compound to the ports of a host in one batch.
+
+    This is a drop-in replacement for `mb.Pattern.apply_to_compound`. Instead
+    of cloning the guest and calling `force_overlap` once per site, the guest
+    coordinates are expressed relative to its port once, and all copies are
+    placed with a single stack of rigid transforms, one per host port.
+
+    Parameters
+    ----------
+    pattern : mb.Pattern
+        Points at which the guests are attached. The pattern is not modified.
+    guest : mb.Compound
+        The compound prototype to be attached to the host.
+    guest_port_name : str, optional, default="down"
+        The name of the port located on `guest` to attach to the host.
+    host : mb.Compound
+        A compound with available ports to attach copies of `guest` to.
+    backfill : mb.Compound, optional, default=None
+        A compound to attach to the remaining available ports of `host`.
+    backfill_port_name : str, optional, default="up"
+        The name of the port located on `backfill` to attach to the host.
+    scale : bool, optional, default=True
+        Scale the points in the pattern to the lengths of the bounding box of
+        `host` and shift them by its minimum coordinates.
+    materialize : bool, optional, default=True
+        If True, return the placed copies as compounds bonded to the host.
+        Otherwise, return `GraftedChains` holding only their coordinates.
+
+    Returns
+    -------
+    guests : list of mb.Compound or GraftedChains
+        The guests attached to the host.
+    backfills : list of mb.Compound or GraftedChains
+        The backfills attached to the remaining ports of the host.
+    """
+    host_ports = host.available_ports()
+    points = np.array(pattern.points, dtype=float)
+    n_ports = len(host_ports)
+    assert n_ports >= points.shape[0], "Not enough ports for pattern."
+    if guest_port_name not in guest.labels:
+        raise ValueError(f"No port named {guest_port_name} in {guest}.")
+
+    if scale:
+        points = points * host.get_boundingbox().lengths
+        points += host.xyz.min(axis=0)
+
+    port_positions = np.array([port["up"]["middle"].pos for port in host_ports])
+    box_lengths = None if host.box is None else np.array(host.box.lengths)
+    used = match_sites(points, port_positions, box_lengths)
+    available = np.ones(n_ports, dtype=bool)
+    available[used] = False
+
+    guests = _place_copies(
+        guest, guest_port_name, [host_ports[i] for i in used]
+    )
+    backfills = list()
+    if backfill:
+        if backfill_port_name not in backfill.labels:
+            raise ValueError(
+                f"No port named {backfill_port_name} in {backfill}."
+            )
+        backfills = _place_copies(
+            backfill,
+            backfill_port_name,
+            [host_ports[i] for i in np.flatnonzero(available)],
+        )
+
+    if not materialize:
+        return guests, backfills
+    return guests.materialize(), backfills.materialize() if backfill else []
+
+
+def _place_copies(guest, guest_port_name, host_ports):
+    """Compute the transforms placing copies of `guest` on `host_ports`."""
+    guest_port = guest.labels[guest_port_name]
+    if not host_ports:
+        return GraftedChains(
+            guest, guest_port_name, [], np.empty((0, 3, 3)), np.empty((0, 3))
+        )
+
+    host_frames = np.array([port["up"].xyz_with_ports for port in host_ports])
+    host_anchors = np.array([port.anchor.pos for port in host_ports])
+    rotations, shifts = port_transforms(
+        guest_port.xyz_with_ports,
+        guest_port.anchor.pos,
+        host_frames,
+        host_anchors,
+    )
+    return GraftedChains(guest, guest_port_name, host_ports, rotations, shifts)
+
+
+def match_sites(points, port_positions, box_lengths=None):
+    """Assign each point to its closest port that is still unused.
+
+    Points are matched in order, as in `mb.Pattern.apply_to_compound`: each
+    point gets the closest port not taken by an earlier point. The closest
+    ports of all points are queried at once from a k-d tree, and the points
+    are assigned in batches, up to the first one whose port is taken by an
+    earlier point of the batch. Only the points whose port got taken are
+    queried again, from a tree rebuilt with the available ports once half of
+    its ports are taken.
+
+    Parameters
+    ----------
+    points : np.ndarray, shape=(n, 3)
+        The points to be matched.
+    port_positions : np.ndarray, shape=(m, 3)
+        The positions of the candidate ports.
+    box_lengths : np.ndarray, shape=(3,), optional, default=None
+        Lengths of a periodic box. If given, distances follow the minimum
+        image convention, like `Compound.min_periodic_distance`.
+
+    Returns
+    -------
+    used : np.ndarray, shape=(n,), dtype=int
+        Index of the port assigned to each point.
+    """
+    n_points = points.shape[0]
+    n_ports = port_positions.shape[0]
+    if n_points > n_ports:
+        raise ValueError("Not enough ports for pattern.")
+    used = np.empty(n_points, dtype=np.intp)
+    if not n_points:
+        return used
+
+    xyz = np.concatenate([points, port_positions])
+    shifted = xyz - xyz.min(axis=0)
+    if box_lengths is None:
+        boxsize = None
+    else:
+        boxsize = np.asarray(box_lengths, dtype=float)
+        shifted = np.mod(shifted, boxsize)
+        shifted[shifted >= boxsize] = 0.0
+    queries = shifted[:n_points]
+    positions = shifted[n_points:]
+
+    available = np.ones(n_ports, dtype=bool)
+    tree_ports = np.arange(n_ports)
+    tree = cKDTree(positions, boxsize=boxsize)
+    candidates = _closest_available(tree, tree_ports, queries, available)
+    pending = np.arange(n_points)
+    while len(pending):
+        # The points before the first repeated candidate get their candidate
+        _, first = np.unique(candidates, return_index=True)
+        repeated = np.ones(len(pending), dtype=bool)
+        repeated[first] = False
+        stop = np.argmax(repeated) if repeated.any() else len(pending)
+        used[pending[:stop]] = candidates[:stop]
+        available[candidates[:stop]] = False
+
+        pending, candidates = pending[stop:], candidates[stop:]
+        taken = ~available[candidates]
+        if not taken.any():
+            continue
+        if 2 * available[tree_ports].sum() < len(tree_ports):
+            tree_ports = np.flatnonzero(available)
+            tree = cKDTree(positions[tree_ports], boxsize=boxsize)
+        candidates[taken] = _closest_available(
+            tree, tree_ports, queries[pending[taken]], available
+        )
+    return used
+
+
+def _closest_available(tree, tree_ports, queries, available):
+    """Return the index of the closest available port of each query point.
+
+    `tree` holds the positions of the ports `tree_ports`, which include every
+    available port. Among ports at the same distance, the lowest index is
+    used.
+    """
+    closest = np.empty(len(queries), dtype=np.intp)
+    pending = np.arange(len(queries))
+    k = 1
+    while len(pending):
+        k = min(2 * k, tree.n)
+        distances, neighbors = tree.query(queries[pending], k=k)
+        distances = distances.reshape(len(pending), -1)
+        neighbors = tree_ports[neighbors.reshape(len(pending), -1)]
+        free = available[neighbors]
+        found = free.any(axis=1)
+        if k == tree.n and not found.all():
+            raise ValueError("Not enough ports for pattern.")
+
+        distances = np.where(free, distances, np.inf)[found]
+        ties = distances == distances.min(axis=1)[:, None]
+        closest[pending[found]] = np.where(
+            ties, neighbors[found], len(available)
+        ).min(axis=1)
+        pending = pending[~found]
+    return closest
+
+
+def port_transforms(port_xyz, anchor, host_frames, host_anchors):
+    """Compute the rigid transforms attaching one port to many host ports.
+
+    Like `force_overlap`, either the "up" or the "down" frame of the port is
+    matched to the "up" frame of each host port, whichever places the two
+    anchors further apart.
+
+    Parameters
+    ----------
+    port_xyz : np.ndarray, shape=(8, 3)
+        Positions of the port particles, "up" frame first.
+    anchor : np.ndarray, shape=(3,)
+        Position of the anchor of the port.
+    host_frames : np.ndarray, shape=(n, 4, 3)
+        Positions of the "up" frame particles of each host port.
+    host_anchors : np.ndarray, shape=(n, 3)
+        Positions of the anchors of the host ports.
+
+    Returns
+    -------
+    rotations : np.ndarray, shape=(n, 3, 3)
+    shifts : np.ndarray, shape=(n, 3)
+        A point `x` is placed at `rotations @ x + shifts`.
+    """
+    placements = list()
+    for frame in (port_xyz[:4], port_xyz[4:]):
+        rotations, origin, targets = rigid_transforms(frame, host_frames)
+        shifts = targets - origin @ np.swapaxes(rotations, 1, 2)
+        anchors = anchor @ np.swapaxes(rotations, 1, 2) + shifts
+        distances = np.linalg.norm(anchors - host_anchors, axis=-1)
+        placements.append((rotations, shifts, distances))
+
+    use_down = placements[1][2] > placements[0][2]
+    rotations = np.where(
+        use_down[:, None, None], placements[1][0], placements[0][0]
+    )
+    shifts = np.where(use_down[:, None], placements[1][1], placements[0][1])
+    return rotations, shifts
+
+
+def rigid_transforms(source, targets):
+    """Compute the rigid transforms mapping one point set onto many.
+
+    Parameters
+    ----------
+    source : np.ndarray, shape=(k, 3)
+        The point set to be moved.
+    targets : np.ndarray, shape=(n, k, 3)
+        The point sets `source` is mapped onto.
+
+    Returns
+    -------
+    rotations : np.ndarray, shape=(n, 3, 3)
+        The rotation matrices of the transforms.
+    origin : np.ndarray, shape=(3,)
+        The centroid of `source`.
+    translations : np.ndarray, shape=(n, 3)
+        The centroids of `targets`. A point `x` is mapped onto
+        `rotations @ (x - origin) + translations`.
+    """
+    origin = source.mean(axis=0)
+    translations = targets.mean(axis=1)
+    covariance = np.einsum(
+        "ki,nkj->nij", source - origin, targets - translations[:, None, :]
+    )
+    u, _, vt = np.linalg.svd(covariance)
+    v = np.swapaxes(vt, 1, 2)
+    ut = np.swapaxes(u, 1, 2)
+    # Flip the last singular vector where needed to avoid reflections
+    v[:, :, 2] *= np.sign(np.linalg.det(v @ ut))[:, None]
+    return v @ ut, origin, translations
+
+
+def spin_chains(chains, thetas, around=(0, 0, 1)):
+    """Spin each chain about its first particle in one vectorized pass.
+
+    Equivalent to calling `chain.spin(theta, around, anchor=chain[0])` for
+    every chain, but all rotations are applied to a single stacked
+    coordinate array.
+
+    Parameters
+    ----------
+    chains : list of mb.Compound
+        The chains to be rotated.
+    thetas : array-like, shape=(n,)
+        The rotation angle (in radians) of each chain.
+    around : array-like, shape=(3,), optional, default=(0, 0, 1)
+        The rotation axis shared by all chains.
+    """
+    if not chains:
+        return
+    coords = [chain.xyz_with_ports for chain in chains]
+    counts = np.array([len(xyz) for xyz in coords])
+    owners = np.repeat(np.arange(len(chains)), counts)
+    anchors = np.array([chain[0].pos for chain in chains])[owners]
+
+    rotations = rotation_matrices(thetas, around)
+    xyz = np.einsum(
+        "nij,nj->ni", rotations[owners], np.concatenate(coords) - anchors
+    )
+    xyz += anchors
+    for chain, new_xyz in zip(chains, np.split(xyz, np.cumsum(counts)[:-1])):
+        chain.xyz_with_ports = new_xyz
+
+
+def rotation_matrices(thetas, around):
+    """Compute the rotation matrices of several angles about one axis.
+
+    Parameters
+    ----------
+    thetas : array-like, shape=(n,)
+        The rotation angles in radians.
+    around : array-like, shape=(3,)
+        The rotation axis.
+
+    Returns
+    -------
+    rotations : np.ndarray, shape=(n, 3, 3)
+    """
+    thetas = np.asarray(thetas, dtype=float)
+    x, y, z = np.asarray(around, dtype=float) / np.linalg.norm(around)
+    cross = np.array([[0, -z, y], [z, 0, -x], [-y, x, 0]])
+    outer = np.outer([x, y, z], [x, y, z])
+    cos = np.cos(thetas)[:, None, None]
+    sin = np.sin(thetas)[:, None, None]
+    return cos * np.eye(3) + sin * cross + (1 - cos) * outer
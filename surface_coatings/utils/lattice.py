@@ -0,0 +1,159 @@
+"""Array-native replication of crystal lattices."""
+import ele
+import mbuild as mb
+import numpy as np
+
+from surface_coatings.utils.arrays import CompoundArrays
+
+
+def lattice_arrays(
+    lattice_spacing,
+    angles,
+    basis,
+    n_cells,
+    elements=None,
+    wrap=(False, False, False),
+    periodicity=(False, False, False),
+    bond_range=None,
+):
+    """Replicate the basis of a lattice with array operations.
+
+    The particles are those `mb.Lattice.populate` creates, in the same order
+    (by basis name, then basis point, then cell), but as one coordinate
+    array instead of one cloned compound per lattice point.
+
+    Parameters
+    ----------
+    lattice_spacing : array-like, shape=(3,)
+        Lattice spacings, as in `mb.Lattice`.
+    angles : array-like, shape=(3,)
+        Lattice angles in degrees, as in `mb.Lattice`.
+    basis : dict
+        Fractional coordinates of the lattice points of each particle name.
+    n_cells : array-like of int, shape=(3,)
+        Number of cells in each direction, truncated to integers like in
+        `mb.Lattice.populate`.
+    elements : dict, optional, default=None
+        Element symbol of each particle name. Particles without an element
+        if None.
+    wrap : tuple of bool, optional, default=(False, False, False)
+        Directions along which the particles are wrapped into the box.
+    periodicity : tuple of bool, optional, default=(False, False, False)
+        Periodicity of the lattice. Bonds cross the box boundaries along
+        periodic directions.
+    bond_range : tuple of float, optional, default=None
+        Particles at a distance `dmin <= d < dmax` of each other are bonded,
+        as with `Compound.freud_generate_bonds`, whatever their names. The
+        bonds are derived from the basis and the cell indices, without any
+        distance search over the particles. `dmax` cannot exceed the lattice
+        spacings. No bonds if None.
+
+    Returns
+    -------
+    arrays : CompoundArrays
+        The particles, with box lengths of `lattice_spacing` times `n_cells`.
+    """
+    spacing = np.asarray(lattice_spacing, dtype=float)
+    n_cells = np.array([int(n) for n in n_cells])
+    if np.any(n_cells < 1):
+        raise ValueError("Number of cells must be at least 1.")
+    vectors = mb.Lattice(
+        lattice_spacing=spacing, angles=list(angles)
+    ).lattice_vectors
+    # Normalized lattice vectors scaled by the spacings, as in populate
+    transform = (vectors / np.linalg.norm(vectors, axis=1)[:, None]) * spacing
+
+    cells = np.indices(n_cells).reshape(3, -1).T
+    names = list(basis)
+    points = [np.asarray(basis[name], dtype=float) for name in names]
+    basis_points = np.concatenate(points)
+    fractional = basis_points[:, None, :] + cells[None, :, :]
+    xyz = fractional.reshape(-1, 3) @ transform
+
+    bonds = np.empty((0, 2), dtype=int)
+    if bond_range is not None:
+        bonds = _lattice_bonds(
+            basis_points, transform, n_cells, periodicity, *bond_range
+        )
+
+    box_lengths = spacing * n_cells
+    wrap = np.asarray(wrap, dtype=bool)
+    xyz[:, wrap] = np.mod(xyz[:, wrap], box_lengths[wrap])
+
+    counts = [len(point) * len(cells) for point in points]
+    elements = elements or dict()
+    atomic_numbers = [
+        ele.element_from_symbol(elements[name]).atomic_number
+        if elements.get(name)
+        else 0
+        for name in names
+    ]
+    return CompoundArrays(
+        xyz=xyz,
+        elements=np.repeat(atomic_numbers, counts),
+        name_codes=np.repeat(np.arange(len(names)), counts),
+        name_table=names,
+        bonds=bonds,
+        box_lengths=box_lengths,
+        periodicity=periodicity,
+    )
+
+
+def _lattice_bonds(basis_points, transform, n_cells, periodicity, dmin, dmax):
+    """Return the bonds of a lattice from the neighbors of its basis points.
+
+    The particle of basis point `i` in cell `c` has index
+    `i * n_cells.prod() + ravel(c)`, as in `lattice_arrays`.
+    """
+    if dmax > np.linalg.norm(transform, axis=1).min():
+        raise ValueError(
+            "Bonds longer than a lattice spacing cannot be derived from the "
+            "nearest cells."
+        )
+    # Stencil: basis point j in the cell at `offset` from the cell of i
+    offsets = np.indices((3, 3, 3)).reshape(3, -1).T - 1
+    delta = (
+        basis_points[None, :, None, :]
+        + offsets[None, None, :, :]
+        - basis_points[:, None, None, :]
+    ) @ transform
+    distances = np.linalg.norm(delta, axis=-1)
+    # Each bond is kept from one of its two particles only: offset k and
+    # 26 - k are opposite, 13 is the cell itself
+    points = np.arange(len(basis_points))
+    forward = (points[:, None] < points[None, :])[:, :, None] | (
+        (points[:, None] == points[None, :])[:, :, None]
+        & (np.arange(len(offsets)) > len(offsets) // 2)
+    )
+    stencil = np.argwhere(
+        forward & (distances >= dmin) & (distances < dmax) & (distances > 0)
+    )
+
+    cells = np.indices(n_cells).reshape(3, -1).T
+    n_total = len(cells)
+    periodic = np.asarray(periodicity, dtype=bool)
+    bonds = list()
+    for i, j, k in stencil:
+        neighbors = cells + offsets[k]
+        inside = np.all(
+            periodic | ((neighbors >= 0) & (neighbors < n_cells)), axis=1
+        )
+        neighbors = np.mod(neighbors[inside], n_cells)
+        bonds.append(
+            np.stack(
+                [
+                    i * n_total + np.flatnonzero(inside),
+                    j * n_total
+                    + np.ravel_multi_index(tuple(neighbors.T), n_cells),
+                ],
+                axis=1,
+            )
+        )
+    if not bonds:
+        return np.empty((0, 2), dtype=int)
+    # Periodic images of a bond coincide along directions with few cells
+    bonds = np.sort(np.concatenate(bonds), axis=1)
+    bonds = bonds[bonds[:, 0] != bonds[:, 1]]
+    n_particles = len(basis_points) * n_total
+    keys = np.unique(bonds[:, 0] * n_particles + bonds[:, 1])
+    return np.stack([keys // n_particles, keys % n_particles], axis=1)
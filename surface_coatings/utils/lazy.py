@@ -0,0 +1,40 @@
+"""Lazy attribute loading for the package namespaces."""
+import importlib
+import sys
+
+
+def attach(package_name, exports):
+    """Create the module-level hooks importing exported names on first use.
+
+    Parameters
+    ----------
+    package_name : str
+        The `__name__` of the package.
+    exports : dict
+        Map of each exported name to the (relative) module defining it.
+
+    Returns
+    -------
+    __getattr__ : callable
+        Module `__getattr__` importing the defining module on first access.
+    __dir__ : callable
+        Module `__dir__` listing the exported names.
+    __all__ : list of str
+        The exported names.
+    """
+
+    def __getattr__(name):
+        if name not in exports:
+            raise AttributeError(
+                f"module {package_name!r} has no attribute {name!r}"
+            )
+        module = importlib.import_module(exports[name], package_name)
+        value = getattr(module, name)
+        # Later accesses bypass __getattr__
+        setattr(sys.modules[package_name], name, value)
+        return value
+
+    def __dir__():
+        return sorted(set(vars(sys.modules[package_name])) | set(exports))
+
+    return __getattr__, __dir__, sorted(exports)
@@ -0,0 +1,326 @@
+"""Vectorized construction of linear polymers."""
+from collections import OrderedDict
+
+import mbuild as mb
+import numpy as np
+
+from surface_coatings.utils.arrays import CompoundArrays
+from surface_coatings.utils.cache import arrays_fingerprint
+from surface_coatings.utils.grafting import port_transforms
+
+# Arrays of the blocks of units already built, by content, least recently
+# used first
+_BLOCKS = OrderedDict()
+_MAX_BLOCKS = 256
+
+
+def build_polymer(
+    monomers,
+    n,
+    sequence="A",
+    end_groups=None,
+    port_labels=("up", "down"),
+    name="Polymer",
+):
+    """Connect copies of monomers in a sequence, without `force_overlap`.
+
+    This is a drop-in replacement for `mb.lib.recipes.Polymer.build` with
+    `add_hydrogens=False`. Rather than cloning and aligning each repeat unit
+    onto the previous one, the shortest block repeated along the sequence is
+    built once, and kept for later calls: the transform from one unit to the
+    next is computed once per pair of consecutive monomers, from their ports,
+    and accumulated along the block. Copies of the block are then placed by
+    accumulating the transform from one block to the next, and the
+    particles, bonds and ports of the whole chain are created in one pass.
+    The block is itself stamped from its runs of repeated sub-blocks, found
+    greedily from its start (e.g., "AABAABCC" is built from two copies of
+    "AAB", itself two "A" and a "B", followed by two "C"). The most recently
+    used blocks are kept, up to `_MAX_BLOCKS`.
+
+    Each repeat unit is recreated from the arrays of its monomer, with its
+    class, sub-compounds and labels (see `CompoundArrays.to_compound`), and
+    labelled "monomer[$]" in the polymer.
+
+    Parameters
+    ----------
+    monomers : mb.Compound or list of mb.Compound
+        The monomers to be connected.
+    n : int
+        Number of repeats of the sequence.
+    sequence : str, optional, default="A"
+        A string of characters where each unique character represents one
+        monomer. Characters are assigned to monomers in the order given by
+        `sorted()`, as in `Polymer.build`.
+    end_groups : list of mb.Compound (len 2), optional, default=None
+        Compounds attached by their "up" port to the head and the tail of
+        the chain. The unused ends are labelled with `port_labels` in the
+        polymer.
+    port_labels : tuple of str, optional, default=("up", "down")
+        Labels of the ports of the monomers. The first port of each unit is
+        attached to the second port of the previous unit.
+    name : str, optional, default="Polymer"
+        Name of the polymer.
+
+    Returns
+    -------
+    polymer : mb.Compound
+    """
+    if isinstance(monomers, mb.Compound):
+        monomers = [monomers]
+    templates, sequence_units = _sequence_units(monomers, sequence, port_labels)
+    if n < 1:
+        raise ValueError("n must be 1 or more")
+    # The chain is stamped from copies of the shortest repeated block
+    block_units = sequence_units[: _period(sequence_units)]
+    block = _block_arrays(templates, block_units, port_labels)
+    blocks = np.zeros(n * len(sequence_units) // len(block_units), dtype=int)
+    rotations, shifts = unit_transforms([block], blocks, port_labels)
+    chain = _chain_arrays([block], blocks, rotations, shifts, port_labels)
+    units = np.tile(block_units, len(blocks))
+
+    # Each unit is recreated from its monomer, with the chain positions and
+    # without the ports bonded to its neighbors
+    variants = dict()
+    monomer_units = list()
+    particles = list()
+    offsets = [0]
+    port_start = 0
+    for k, i in enumerate(units):
+        used = (k > 0, k < len(units) - 1)
+        if (i, used) not in variants:
+            template = templates[i]
+            ends = [template.port(label) for label in port_labels]
+            variants[i, used] = template.without_ports(
+                [port for port, is_used in zip(ends, used) if is_used]
+            )
+        unit_arrays = variants[i, used]
+        offsets.append(offsets[-1] + unit_arrays.n_particles)
+        port_stop = port_start + len(unit_arrays.port_labels)
+        unit_cls = type(monomers[i])
+        unit = unit_cls.__new__(unit_cls)
+        mb.Compound.__init__(unit, name=unit_arrays.name)
+        unit_arrays._replace(
+            xyz=chain.xyz[offsets[-2] : offsets[-1]],
+            port_xyz=chain.port_xyz[port_start:port_stop],
+        ).to_compound(compound=unit)
+        particles.extend(unit.particles())
+        monomer_units.append(unit)
+        port_start = port_stop
+
+    polymer = mb.Compound(name=name)
+    polymer.add(monomer_units, "monomer[$]")
+    # Only the bonds between units are left, the others come with the units
+    owners = np.searchsorted(offsets, chain.bonds, side="right") - 1
+    for i, j in chain.bonds[owners[:, 0] != owners[:, 1]]:
+        polymer.add_bond((particles[i], particles[j]))
+
+    # The ends of the chain, as hoisted by `Polymer.build`
+    head_tail = [
+        monomer_units[0][port_labels[0]],
+        monomer_units[-1][port_labels[1]],
+    ]
+    for port, end_group, label in zip(
+        head_tail, end_groups or [None, None], port_labels
+    ):
+        if end_group is None:
+            polymer.add(port, label, containment=False)
+        else:
+            polymer.add(end_group)
+            mb.force_overlap(end_group, end_group.labels["up"], port)
+    return polymer
+
+
+def unit_transforms(templates, units, port_labels=("up", "down")):
+    """Compute the placement of every repeat unit of a chain.
+
+    Parameters
+    ----------
+    templates : list of CompoundArrays
+        The monomers, with their ports.
+    units : np.ndarray, shape=(n,), dtype=int
+        Index of the monomer of each unit in `templates`, along the chain.
+    port_labels : tuple of str, optional, default=("up", "down")
+        The first port of each unit is attached to the second port of the
+        previous unit.
+
+    Returns
+    -------
+    rotations : np.ndarray, shape=(n, 3, 3)
+    shifts : np.ndarray, shape=(n, 3)
+        A point `x` of a monomer is placed at `rotations @ x + shifts` in its
+        unit. The first unit stays in place.
+    """
+    # Transform of monomer b attached after monomer a, in the frame of a
+    steps = np.zeros((len(templates), len(templates), 4, 4))
+    steps[..., 3, 3] = 1
+    heads = [template.port(port_labels[0]) for template in templates]
+    tails = [template.port(port_labels[1]) for template in templates]
+    host_frames = np.array(
+        [t.port_xyz[tail, :4] for t, tail in zip(templates, tails)]
+    )
+    host_anchors = np.array(
+        [t.xyz[t.port_anchors[tail]] for t, tail in zip(templates, tails)]
+    )
+    for b, (template, head) in enumerate(zip(templates, heads)):
+        rotations, shifts = port_transforms(
+            template.port_xyz[head],
+            template.xyz[template.port_anchors[head]],
+            host_frames,
+            host_anchors,
+        )
+        steps[:, b, :3, :3] = rotations
+        steps[:, b, :3, 3] = shifts
+
+    units = np.asarray(units, dtype=int)
+    poses = np.empty((len(units), 4, 4))
+    poses[0] = np.eye(4)
+    poses[1:] = steps[units[:-1], units[1:]]
+    # Inclusive scan of the matrix products, in log2(n) batched steps
+    shift = 1
+    while shift < len(poses):
+        poses[shift:] = poses[:-shift] @ poses[shift:]
+        shift *= 2
+    return poses[:, :3, :3], poses[:, :3, 3]
+
+
+def _sequence_units(monomers, sequence, port_labels):
+    """Return the templates of the monomers and the monomer of each unit."""
+    unique_seq_ids = sorted(set(sequence))
+    if len(monomers) != len(unique_seq_ids):
+        raise ValueError(
+            "Number of monomers passed to `Polymer` class must match number "
+            "of unique entries in the specified sequence."
+        )
+    templates = list()
+    for monomer in monomers:
+        for label in port_labels:
+            if not isinstance(monomer.labels.get(label), mb.Port):
+                raise ValueError(f"No port named {label} in {monomer}.")
+        templates.append(CompoundArrays.from_compound(monomer, hierarchy=True))
+
+    seq_map = {seq_id: i for i, seq_id in enumerate(unique_seq_ids)}
+    return templates, np.array([seq_map[seq_id] for seq_id in sequence])
+
+
+def _period(units):
+    """Return the length of the shortest block repeated along `units`."""
+    for period in range(1, len(units)):
+        if len(units) % period == 0 and np.array_equal(
+            units, np.tile(units[:period], len(units) // period)
+        ):
+            return period
+    return len(units)
+
+
+def _runs(units):
+    """Split `units` into runs of a repeated block, greedily from the start.
+
+    At each position, the block whose consecutive repeats cover the most
+    units is taken, the shortest one in case of a tie.
+
+    Returns
+    -------
+    runs : list of (np.ndarray, int)
+        The block of each run and its number of repeats.
+    """
+    runs = list()
+    start = 0
+    while start < len(units):
+        best_period, best_count = 1, 1
+        for period in range(1, (len(units) - start) // 2 + 1):
+            block = units[start : start + period]
+            count = 1
+            while np.array_equal(
+                units[start + count * period : start + (count + 1) * period],
+                block,
+            ):
+                count += 1
+            if count > 1 and period * count > best_period * best_count:
+                best_period, best_count = period, count
+        runs.append((units[start : start + best_period], best_count))
+        start += best_period * best_count
+    return runs
+
+
+def _block_arrays(templates, units, port_labels):
+    """Return the arrays of a block of units, built once per content.
+
+    The block has the head port of its first unit and the tail port of its
+    last unit, so that copies of it are connected like monomers. Blocks with
+    repeated sub-blocks are stamped from copies of them, see `_runs`.
+    """
+    key = (
+        tuple(arrays_fingerprint(template) for template in templates),
+        tuple(units),
+        tuple(port_labels),
+    )
+    block = _BLOCKS.get(key)
+    if block is not None:
+        _BLOCKS.move_to_end(key)
+        return block
+
+    runs = _runs(units)
+    if all(count == 1 for _, count in runs):
+        rotations, shifts = unit_transforms(templates, units, port_labels)
+        block = _chain_arrays(templates, units, rotations, shifts, port_labels)
+    else:
+        sub_blocks = dict()
+        for sub_units, _ in runs:
+            sub_blocks.setdefault(tuple(sub_units), sub_units)
+        index = {sub_units: i for i, sub_units in enumerate(sub_blocks)}
+        sub_blocks = [
+            _block_arrays(templates, sub_units, port_labels)
+            for sub_units in sub_blocks.values()
+        ]
+        blocks = np.array(
+            [index[tuple(sub_units)] for sub_units, count in runs]
+        ).repeat([count for _, count in runs])
+        rotations, shifts = unit_transforms(sub_blocks, blocks, port_labels)
+        block = _chain_arrays(
+            sub_blocks, blocks, rotations, shifts, port_labels
+        )
+    _BLOCKS[key] = block
+    while len(_BLOCKS) > _MAX_BLOCKS:
+        _BLOCKS.popitem(last=False)
+    return block
+
+
+def _chain_arrays(templates, units, rotations, shifts, port_labels):
+    """Place the units and connect them into the arrays of one chain."""
+    parts = [None] * len(units)
+    for i, template in enumerate(templates):
+        placed = np.flatnonzero(units == i)
+        xyz = np.einsum("nij,mj->nmi", rotations[placed], template.xyz)
+        xyz += shifts[placed, None]
+        port_xyz = np.einsum(
+            "nij,pkj->npki", rotations[placed], template.port_xyz
+        )
+        port_xyz += shifts[placed, None, None]
+        for unit, unit_xyz, unit_port_xyz in zip(placed, xyz, port_xyz):
+            parts[unit] = template._replace(
+                xyz=unit_xyz, port_xyz=unit_port_xyz
+            )
+
+    offsets = np.cumsum([0] + [part.n_particles for part in parts])
+    port_offsets = np.cumsum([0] + [len(part.port_labels) for part in parts])
+    heads = np.array([t.port(port_labels[0]) for t in templates])[units]
+    tails = np.array([t.port(port_labels[1]) for t in templates])[units]
+    head_anchors = np.array(
+        [t.port_anchors[t.port(port_labels[0])] for t in templates]
+    )[units]
+    tail_anchors = np.array(
+        [t.port_anchors[t.port(port_labels[1])] for t in templates]
+    )[units]
+    # Each tail is bonded to the head of the next unit, both ports are used
+    bonds = np.stack(
+        [
+            tail_anchors[:-1] + offsets[:-2],
+            head_anchors[1:] + offsets[1:-1],
+        ],
+        axis=1,
+    )
+    used = np.concatenate(
+        [tails[:-1] + port_offsets[:-2], heads[1:] + port_offsets[1:-1]]
+    )
+
+    return CompoundArrays.concatenate(parts, bonds=bonds).without_ports(used)
@@ -0,0 +1,103 @@
+"""Removal of many particles of a compound at once."""
+import mbuild as mb
+import numpy as np
+
+from surface_coatings.utils.arrays import CompoundArrays
+
+
+def remove_particles(compound, selection, labels=None, ports=True):
+    """Remove particles from a compound in one pass.
+
+    `Compound.remove` updates the hierarchy, the bond graph and the ports
+    once per removed particle, at a cost growing with the size of the
+    compound. Here, the compound is converted to `CompoundArrays`, the
+    selected particles and their bonds are dropped with array operations, and
+    the compound is refilled once, flat, like a template. Its labelled ports
+    are kept, unless anchored to a removed particle.
+
+    As with `Compound.remove`, a port is added to each kept particle for each
+    of its bonds to a removed particle, pointing towards the removed particle
+    at half the bond length.
+
+    Parameters
+    ----------
+    compound : mb.Compound
+        The compound to remove particles from, without a parent.
+    selection : array-like of int or bool
+        Indices of the particles to be removed, in the order of
+        `compound.particles()`, or a boolean mask over them.
+    labels : list of str, optional, default=None
+        Labels of the new ports, in the order they are returned. The new
+        ports are labelled "port[$]" if None.
+    ports : bool, optional, default=True
+        Add ports to the particles bonded to the removed particles.
+
+    Returns
+    -------
+    new_ports : list of mb.Port
+        One port per broken bond, ordered by removed particle (in the order
+        of `selection`), then by index of the kept particle.
+    """
+    if compound.parent is not None:
+        raise ValueError(
+            f"Particles can only be removed from a root compound, "
+            f"{compound} is part of {compound.root}."
+        )
+    arrays = CompoundArrays.from_compound(compound, all_ports=True)
+    indices = _selection_indices(selection, arrays.n_particles)
+
+    # Broken bonds as (removed, kept) pairs, in order of removal
+    rank = np.full(arrays.n_particles, -1)
+    rank[indices] = np.arange(len(indices))
+    removed = rank[arrays.bonds] >= 0
+    broken = arrays.bonds[removed.sum(axis=1) == 1]
+    swap = rank[broken[:, 1]] >= 0
+    broken[swap] = broken[swap, ::-1]
+    broken = broken[np.lexsort((broken[:, 1], rank[broken[:, 0]]))]
+
+    if not ports:
+        broken = broken[:0]
+    if labels is None:
+        labels = ["port[$]"] * len(broken)
+    elif len(labels) != len(broken):
+        raise ValueError(
+            f"{len(labels)} labels given for {len(broken)} new ports."
+        )
+
+    mb.Compound.__init__(compound, name=arrays.name)
+    arrays.without_particles(indices).to_compound(compound=compound)
+
+    particles = list(compound.particles())
+    new_index = np.cumsum(rank < 0) - 1
+    bond_vectors = arrays.xyz[broken[:, 0]] - arrays.xyz[broken[:, 1]]
+    separations = np.linalg.norm(bond_vectors, axis=1) / 2
+    new_ports = list()
+    for kept, vector, separation, label in zip(
+        broken[:, 1], bond_vectors, separations, labels
+    ):
+        port = mb.Port(
+            anchor=particles[new_index[kept]],
+            orientation=vector,
+            separation=separation,
+        )
+        compound.add(port, label)
+        new_ports.append(port)
+    return new_ports
+
+
+def _selection_indices(selection, n_particles):
+    """Return the unique indices selected by an index array or a mask."""
+    selection = np.asarray(selection)
+    if selection.dtype == bool:
+        if selection.shape != (n_particles,):
+            raise ValueError(
+                f"Mask of shape {selection.shape} given for "
+                f"{n_particles} particles."
+            )
+        return np.flatnonzero(selection)
+    indices = selection.astype(np.intp).reshape(-1)
+    if np.any((indices < -n_particles) | (indices >= n_particles)):
+        raise ValueError(f"Particle indices out of range [0, {n_particles}).")
+    indices = np.mod(indices, n_particles)
+    _, first = np.unique(indices, return_index=True)
+    return indices[np.sort(first)]
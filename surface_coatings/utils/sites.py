@@ -0,0 +1,62 @@
+"""Ports of the binding sites of surfaces."""
+import mbuild as mb
+import numpy as np
+
+
+def site_port(orientation=None, separation=0):
+    """Create the port of a site anchored at the origin.
+
+    Parameters
+    ----------
+    orientation : array-like, shape=(3,), optional, default=None
+        Orientation of the port, as in `mb.Port`.
+    separation : float, optional, default=0
+        Distance of the port from the origin, as in `mb.Port`.
+
+    Returns
+    -------
+    port : mb.Port
+        The port `mb.Port(anchor, orientation, separation)` would create for
+        an anchor located at the origin.
+    """
+    anchor = mb.Compound(pos=[0.0, 0.0, 0.0])
+    port = mb.Port(
+        anchor=anchor, orientation=orientation, separation=separation
+    )
+    port.anchor = None
+    return port
+
+
+def add_site_ports(compound, anchors, template, prefix="port_"):
+    """Add a copy of a site port to each anchor.
+
+    All the ports have the geometry of `template` relative to their anchor,
+    and are labelled with `prefix` followed by consecutive numbers, starting
+    from the number of ports already referenced by `compound`.
+
+    Parameters
+    ----------
+    compound : mb.Compound
+        The compound the ports are added to.
+    anchors : list of mb.Compound
+        The particles of the sites, in the order of the labels.
+    template : mb.Port
+        The port of a site anchored at the origin, e.g., from `site_port`.
+    prefix : str, optional, default="port_"
+        Prefix of the labels.
+
+    Returns
+    -------
+    ports : list of mb.Port
+        The new ports, in the order of `anchors`.
+    """
+    start = len(compound.referenced_ports())
+    positions = np.array([anchor.pos for anchor in anchors]).reshape(-1, 3)
+    xyz = template.xyz_with_ports[None] + positions[:, None]
+    ports = list()
+    for i, (anchor, port_xyz) in enumerate(zip(anchors, xyz)):
+        port = mb.Port(anchor=anchor)
+        port.xyz_with_ports = port_xyz
+        compound.add(port, f"{prefix}{start + i}")
+        ports.append(port)
+    return ports
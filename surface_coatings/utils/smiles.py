@@ -0,0 +1,123 @@
+"""Stored geometries of molecules embedded from SMILES."""
+import hashlib
+import importlib.metadata
+import importlib.util
+import os
+import re
+
+import mbuild as mb
+
+from surface_coatings.utils.arrays import CompoundArrays
+from surface_coatings.utils.cache import CompoundCache
+
+# Bump when the stored layout or the embedding changes
+STORE_VERSION = 1
+
+# Geometries shipped with the package, populated by running this module before
+# building a release (see "Packaged data" in README.md)
+PACKAGE_STORE = os.path.join(os.path.dirname(__file__), "geometries")
+
+
+def load_smiles(smiles, cache_dir=None):
+    """Load a molecule from a SMILES string, embedding it only when needed.
+
+    The geometry is read from the store shipped with the package, then from
+    the user cache (see `CompoundCache`), for the installed version of RDKit.
+    Only if neither has it, the molecule is embedded with `mb.load` and added
+    to the user cache. Without RDKit, any stored geometry of the SMILES is
+    used.
+
+    Parameters
+    ----------
+    smiles : str
+        The SMILES string of the molecule.
+    cache_dir : str, optional, default=None
+        Directory of the user cache, see `CompoundCache`.
+
+    Returns
+    -------
+    compound : mb.Compound
+        A flat compound with the particles (in the order of `mb.load`) and
+        bonds of the molecule.
+    """
+    toolkit = _toolkit_version()
+    prefix = _prefix(smiles)
+    user_cache = CompoundCache(cache_dir)
+    for store in (CompoundCache(PACKAGE_STORE), user_cache):
+        arrays = _load(store, prefix, toolkit)
+        if arrays is not None:
+            return arrays.to_compound()
+
+    arrays = CompoundArrays.from_compound(mb.load(smiles, smiles=True))
+    user_cache.store(f"{prefix}{toolkit}", arrays)
+    return arrays.to_compound()
+
+
+def store_smiles(smiles, directory=PACKAGE_STORE):
+    """Embed a molecule with RDKit and add it to a geometry store.
+
+    Parameters
+    ----------
+    smiles : str
+        The SMILES string of the molecule.
+    directory : str, optional, default=PACKAGE_STORE
+        Directory of the store, the one shipped with the package by default.
+    """
+    arrays = CompoundArrays.from_compound(mb.load(smiles, smiles=True))
+    CompoundCache(directory).store(
+        f"{_prefix(smiles)}{_toolkit_version()}", arrays
+    )
+
+
+def _prefix(smiles):
+    """Return the prefix of the store entries of a SMILES string."""
+    digest = hashlib.sha256(f"{STORE_VERSION}:{smiles}".encode()).hexdigest()
+    return f"smiles-{digest}-"
+
+
+def _load(store, prefix, toolkit):
+    """Return the stored arrays of an embedding, or None.
+
+    Any toolkit version is accepted if `toolkit` is None, the most recent
+    one first.
+    """
+    if toolkit is not None:
+        return store.load(f"{prefix}{toolkit}")
+    if not os.path.isdir(store.directory):
+        return None
+    keys = [
+        entry.name[: -len(".npz")]
+        for entry in os.scandir(store.directory)
+        if entry.name.startswith(prefix) and entry.name.endswith(".npz")
+    ]
+    if not keys:
+        return None
+    return store.load(
+        max(keys, key=lambda key: _version_key(key[len(prefix) :]))
+    )
+
+
+def _version_key(version):
+    """Return a key ordering version strings, e.g., "2024.3.10" > "2024.3.9"."""
+    return tuple(int(number) for number in re.findall(r"\d+", version))
+
+
+def _toolkit_version():
+    """Return the version of RDKit, None if it is not installed."""
+    try:
+        return importlib.metadata.version("rdkit")
+    except importlib.metadata.PackageNotFoundError:
+        pass
+    if importlib.util.find_spec("rdkit") is None:
+        return None
+    import rdkit
+
+    return rdkit.__version__
+
+
+if __name__ == "__main__":
+    from surface_coatings.monomers import mNBDAC
+    from surface_coatings.monomers.mnbdac.side_chains import NH
+
+    for builder in (mNBDAC, NH):
+        store_smiles(builder.smiles)
@@ -0,0 +1,79 @@
+"""In-process registry of parsed monomer and moiety templates."""
+import functools
+import inspect
+
+import mbuild as mb
+
+from surface_coatings.utils.arrays import CompoundArrays
+from surface_coatings.utils.assets import bundled
+from surface_coatings.utils.cache import fingerprint
+
+_TEMPLATES = dict()
+
+
+def template(cls):
+    """Build the structure of a compound class once per set of arguments.
+
+    The decorated `__init__` (which typically loads a structure file, removes
+    atoms and adds ports) runs only the first time the class is instantiated
+    with a given set of arguments. The processed structure is registered as a
+    `CompoundArrays` template, and every instance, including the first one, is
+    filled with a copy of the template: sub-compounds, particles, bonds, box
+    and ports, with their labels (see `Hierarchy` in
+    `surface_coatings.utils.arrays`).
+    Templates compiled in the asset bundle (see `surface_coatings.utils.assets`)
+    are read from it instead, unless their structure files have changed.
+
+    Compound arguments (e.g., side chains) are compared by content, see
+    `fingerprint`, so equal compounds built separately share a template.
+    Arguments that cannot be hashed bypass the registry.
+
+    Parameters
+    ----------
+    cls : type
+        A subclass of mb.Compound whose `__init__` only depends on its
+        arguments.
+    """
+    build = cls.__init__
+    signature = inspect.signature(build)
+
+    @functools.wraps(build)
+    def __init__(self, *args, **kwargs):
+        arguments = signature.bind(self, *args, **kwargs)
+        arguments.apply_defaults()
+        arguments = tuple(arguments.arguments.items())[1:]
+        key = (cls, tuple((name, _key(value)) for name, value in arguments))
+        try:
+            arrays = _TEMPLATES.get(key)
+        except TypeError:
+            build(self, *args, **kwargs)
+            return
+
+        if arrays is None:
+            arrays = bundled(cls, arguments)
+            if arrays is not None:
+                _TEMPLATES[key] = arrays
+        if arrays is None:
+            prototype = cls.__new__(cls)
+            build(prototype, *args, **kwargs)
+            arrays = CompoundArrays.from_compound(prototype, hierarchy=True)
+            _TEMPLATES[key] = arrays
+        mb.Compound.__init__(self, name=arrays.name)
+        arrays.to_compound(compound=self)
+
+    cls.__init__ = __init__
+    return cls
+
+
+def _key(value):
+    """Return the registry key of an argument, by content for compounds."""
+    if isinstance(value, mb.Compound):
+        return fingerprint(value)
+    if isinstance(value, (list, tuple)):
+        return (type(value), tuple(_key(item) for item in value))
+    return value
+
+
+def clear_templates():
+    """Remove every registered template, e.g., after editing a structure."""
+    _TEMPLATES.clear()
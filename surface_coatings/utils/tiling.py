@@ -0,0 +1,115 @@
+"""Periodic tiling of surfaces without copying the tile."""
+import itertools as it
+
+import mbuild as mb
+import numpy as np
+
+from surface_coatings.utils.arrays import CompoundArrays
+
+
+class TiledSurface(object):
+    """A periodic surface stored as one tile and the offsets of its images.
+
+    Unlike `mb.lib.recipes.TiledCompound`, which clones the whole hierarchy
+    of the tile once per image, only the arrays of the tile are kept.
+    Positions of the images are computed on access, and a flat compound is
+    only created by `to_compound`, e.g., when chains are attached.
+
+    Parameters
+    ----------
+    tile : mb.Compound or CompoundArrays
+        The tile. Its box lengths are the periods of the tiling, or the
+        lengths of its bounding box if it has no box. Every port of a
+        compound tile is kept, including unlabelled ports and ports of its
+        sub-compounds.
+    n_tiles : array-like of int, shape=(3,)
+        Number of tiles in each direction. The tile must be periodic along
+        every direction with more than one tile.
+    """
+
+    def __init__(self, tile, n_tiles):
+        if isinstance(tile, mb.Compound):
+            tile = CompoundArrays.from_compound(tile, all_ports=True)
+        if tile.box_lengths is None:
+            tile = tile._replace(box_lengths=np.ptp(tile.xyz, axis=0))
+        n_tiles = np.asarray(n_tiles, dtype=int)
+        if np.any(n_tiles < 1):
+            raise ValueError("Number of tiles must be positive.")
+        if np.any((n_tiles > 1) & ~np.asarray(tile.periodicity, dtype=bool)):
+            raise ValueError(
+                "Tile not periodic in at least one of the specified "
+                "dimensions."
+            )
+        self.tile = tile
+        self.n_tiles = n_tiles
+
+    @property
+    def n_images(self):
+        """Number of images of the tile."""
+        return int(np.prod(self.n_tiles))
+
+    @property
+    def n_particles(self):
+        """Number of particles of the tiled surface."""
+        return self.n_images * self.tile.n_particles
+
+    @property
+    def offsets(self):
+        """Translation of each image, in the order of `itertools.product`."""
+        grid = np.array(list(it.product(*(range(n) for n in self.n_tiles))))
+        return grid * np.asarray(self.tile.box_lengths, dtype=float)
+
+    @property
+    def box_lengths(self):
+        """Box lengths of the tiled surface."""
+        return np.asarray(self.tile.box_lengths, dtype=float) * self.n_tiles
+
+    @property
+    def periodicity(self):
+        """Periodicity of the tiled surface."""
+        return self.tile.periodicity
+
+    @property
+    def xyz(self):
+        """Positions of all particles, image after image."""
+        return (self.tile.xyz[None] + self.offsets[:, None]).reshape(-1, 3)
+
+    @property
+    def names(self):
+        """Name of all particles, image after image."""
+        return np.tile(self.tile.names, self.n_images)
+
+    @property
+    def port_xyz(self):
+        """Positions of the port particles of all images, image after image."""
+        return (self.tile.port_xyz[None] + self.offsets[:, None, None]).reshape(
+            -1, 8, 3
+        )
+
+    @property
+    def port_anchors(self):
+        """Index of the anchor particle of each port, -1 if it has none."""
+        anchors = self.tile.port_anchors[None] + (
+            np.arange(self.n_images)[:, None] * self.tile.n_particles
+        )
+        return np.where(self.tile.port_anchors >= 0, anchors, -1).reshape(-1)
+
+    def image_xyz(self, index):
+        """Return the positions of the particles of one image."""
+        return self.tile.xyz + self.offsets[index]
+
+    def arrays(self):
+        """Return the `CompoundArrays` of the whole tiled surface.
+
+        Bonds crossing a periodic boundary of the tile are rewired to the
+        neighboring image and port labels are suffixed with the index of
+        their image, see `CompoundArrays.tile`.
+        """
+        return self.tile.tile(self.n_tiles)
+
+    def to_compound(self, name=None, compound=None):
+        """Create a flat mb.Compound of the tiled surface.
+
+        See `CompoundArrays.to_compound` for the parameters.
+        """
+        return self.arrays().to_compound(name=name, compound=compound)
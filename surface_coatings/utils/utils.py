@@ -1,22 +1,82 @@
-import numpy as np
 import mbuild as mb
+import numpy as np
+
+from surface_coatings.utils.extents import Extents
 
 
 def boundary_positions(compounds):
-    xs, ys, zs = list(), list(), list()
+    """Return the minimum and maximum coordinates of one or more compounds.
+
+    Parameters
+    ----------
+    compounds : mb.Compound or list of mb.Compound
+        The compounds to bound together.
+
+    Returns
+    -------
+    minima, maxima : np.ndarray, shape=(3,)
+    """
     if isinstance(compounds, mb.Compound):
-        for part in compounds.particles():
-            xs.append(part.pos[0])
-            ys.append(part.pos[1])
-            zs.append(part.pos[2])
-    elif isinstance(compounds, (list, tuple)):
-        for molecule in compounds:
-            for part in molecule.particles():
-                xs.append(part.pos[0])
-                ys.append(part.pos[1])
-                zs.append(part.pos[2])
-
-    minima = (min(xs), min(ys), min(zs))
-    maxima = (max(xs), max(ys), max(zs))
-    return np.array(minima), np.array(maxima)
+        compounds = [compounds]
+    extents = Extents()
+    mins, maxs = zip(*(extents.bounds(compound) for compound in compounds))
+    return np.min(mins, axis=0), np.max(maxs, axis=0)
+
+
+def partition_pattern(pattern, fractions, n_chains, seed=12345):
+    """Split the points of a pattern among several chain types.
+
+    All chain types are assigned in a single shuffled permutation of the
+    pattern points, so the cost is linear in the number of points and the
+    same seed always yields the same assignment.
+
+    Parameters
+    ----------
+    pattern : mb.Pattern
+        The pattern to be partitioned. It is not modified.
+    fractions : list of float
+        The fraction of `n_chains` assigned to each chain type. The last
+        chain type receives at most its own share of the points left over
+        by the others, any surplus point is dropped.
+    n_chains : int
+        The total number of chains to be attached.
+    seed : int, optional, default=12345
+        Seed for the random number generator.
+
+    Returns
+    -------
+    subpatterns : list of mb.Pattern
+        One pattern per entry in `fractions`, with the orientations of its
+        points.
+    """
+    points = np.asarray(pattern.points)
+    n_points = points.shape[0]
+    counts = [int(round(fraction * n_chains)) for fraction in fractions]
+    if sum(counts[:-1]) > n_points:
+        raise ValueError(
+            f"Pattern has {n_points} points, which is not enough to place "
+            f"{sum(counts[:-1])} chains."
+        )
+    counts[-1] = min(counts[-1], n_points - sum(counts[:-1]))
+
+    rng = np.random.default_rng(seed)
+    # Points beyond the total count are left unassigned
+    assignment = np.full(n_points, -1, dtype=np.intp)
+    assignment[rng.permutation(n_points)[: sum(counts)]] = np.repeat(
+        np.arange(len(counts)), counts
+    )
 
+    orientations = getattr(pattern, "orientations", None) or dict()
+    subpatterns = list()
+    for i in range(len(counts)):
+        mask = assignment == i
+        subpatterns.append(
+            mb.Pattern(
+                points=points[mask],
+                orientations={
+                    label: np.asarray(vectors)[mask]
+                    for label, vectors in orientations.items()
+                },
+            )
+        )
+    return subpatterns
@@ -0,0 +1,404 @@
+"""Streaming writers for coated-surface systems.
+
+The writers stream the particles of a system residue by residue and write
+them in chunks, instead of converting the whole system to ParmEd or GMSO
+with `Compound.save`. Residues are derived from the builder structure: the
+tiled surface of each monolayer, each grafted chain, each backfill and each
+solvent molecule.
+"""
+import itertools as it
+from collections import namedtuple
+
+import ele
+import mbuild as mb
+import numpy as np
+from mbuild.utils.io import import_
+
+from surface_coatings.monolayer import DualMonolayer, MonolayerSpec
+from surface_coatings.solvated_monolayer import (
+    SolvatedDualMonolayer,
+    SolvatedMonolayer,
+)
+from surface_coatings.utils.extents import Extents
+
+_Chunk = namedtuple(
+    "_Chunk",
+    [
+        "start",
+        "residue_ids",
+        "residue_names",
+        "names",
+        "elements",
+        "ids",
+        "xyz",
+    ],
+)
+
+
+def write_gro(system, filename, chunk_size=100000):
+    """Write a coated-surface system to a GRO file.
+
+    Parameters
+    ----------
+    system : mb.Compound or MonolayerSpec
+        The system to be written, e.g., a Monolayer, DualMonolayer,
+        SolvatedMonolayer or SolvatedDualMonolayer.
+    filename : str
+        Path of the GRO file.
+    chunk_size : int, optional, default=100000
+        Number of particles formatted before each write.
+    """
+    with open(filename, "w") as f:
+        f.write(f"{_name(system)} written by surface_coatings\n")
+        f.write(f"{_n_particles(system)}\n")
+        for chunk in _chunks(system, chunk_size):
+            f.writelines(
+                "%5d%-5s%5s%5d%8.3f%8.3f%8.3f\n"
+                % (
+                    residue_id % 100000,
+                    residue_name[:5],
+                    name[:5],
+                    (chunk.start + i + 1) % 100000,
+                    *pos,
+                )
+                for i, (residue_id, residue_name, name, pos) in enumerate(
+                    zip(
+                        chunk.residue_ids,
+                        chunk.residue_names,
+                        chunk.names,
+                        chunk.xyz,
+                    )
+                )
+            )
+        f.write("%10.5f%10.5f%10.5f\n" % tuple(_box_lengths(system)))
+
+
+def write_lammpsdata(system, filename, chunk_size=100000):
+    """Write a coated-surface system to a LAMMPS data file.
+
+    The file uses `real` units (Angstrom) and the `molecular` atom style.
+    Atom types are assigned by particle name and bond types by the pair of
+    bonded atom types. Each residue is written as its own molecule.
+
+    Only the topology is written: the file has no force field sections, so
+    `pair_style`/`pair_coeff` and `bond_style`/`bond_coeff` must be given in
+    the LAMMPS input script. The atom type names are written as comments of
+    the Masses section and the bond type names as comments of the header.
+
+    Parameters
+    ----------
+    system : mb.Compound or MonolayerSpec
+        The system to be written, e.g., a Monolayer, DualMonolayer,
+        SolvatedMonolayer or SolvatedDualMonolayer.
+    filename : str
+        Path of the LAMMPS data file.
+    chunk_size : int, optional, default=100000
+        Number of particles or bonds formatted before each write.
+    """
+    type_names, masses, type_ids, bonds = _topology(system, chunk_size)
+    bond_type_names, bond_type_ids = _bond_types(bonds, type_ids, type_names)
+
+    mins, maxs = _bounds(system)
+    lengths = np.maximum(_box_lengths(system), maxs - mins)
+    with open(filename, "w") as f:
+        f.write(f"{_name(system)} written by surface_coatings\n\n")
+        f.write(f"{len(type_ids)} atoms\n")
+        f.write(f"{len(bonds)} bonds\n")
+        f.write(f"{len(type_names)} atom types\n")
+        f.write(f"{len(bond_type_names)} bond types\n")
+        for i, name in enumerate(bond_type_names):
+            f.write(f"# bond type {i + 1} {name}\n")
+        f.write("\n")
+        for lo, length, dim in zip(mins * 10, lengths * 10, "xyz"):
+            f.write(f"{lo:.6f} {lo + length:.6f} {dim}lo {dim}hi\n")
+
+        f.write("\nMasses\n\n")
+        for i, (name, mass) in enumerate(zip(type_names, masses)):
+            f.write(f"{i + 1} {mass:.6f} # {name}\n")
+
+        f.write("\nAtoms # molecular\n\n")
+        for chunk in _chunks(system, chunk_size):
+            stop = chunk.start + len(chunk.xyz)
+            f.writelines(
+                "%d %d %d %.6f %.6f %.6f\n"
+                % (i + 1, residue_id, type_id + 1, *pos)
+                for i, residue_id, type_id, pos in zip(
+                    range(chunk.start, stop),
+                    chunk.residue_ids,
+                    type_ids[chunk.start : stop],
+                    chunk.xyz * 10,
+                )
+            )
+
+        if len(bonds):
+            f.write("\nBonds\n\n")
+            for start in range(0, len(bonds), chunk_size):
+                f.writelines(
+                    "%d %d %d %d\n" % (i + 1, bond_type + 1, *(bond + 1))
+                    for i, bond_type, bond in zip(
+                        range(start, start + chunk_size),
+                        bond_type_ids[start : start + chunk_size],
+                        bonds[start : start + chunk_size],
+                    )
+                )
+
+
+def write_gsd(system, filename, chunk_size=100000):
+    """Write a coated-surface system to a GSD file.
+
+    Positions are gathered chunk by chunk into a single float32 array and
+    centered in the box, as expected by HOOMD-blue. Particle types are
+    assigned by particle name and bond types by the pair of bonded types.
+
+    Parameters
+    ----------
+    system : mb.Compound or MonolayerSpec
+        The system to be written, e.g., a Monolayer, DualMonolayer,
+        SolvatedMonolayer or SolvatedDualMonolayer.
+    filename : str
+        Path of the GSD file.
+    chunk_size : int, optional, default=100000
+        Number of particles gathered at a time.
+    """
+    gsd_hoomd = import_("gsd.hoomd")
+    type_names, _, type_ids, bonds = _topology(system, chunk_size)
+    bond_type_names, bond_type_ids = _bond_types(bonds, type_ids, type_names)
+
+    position = np.empty((len(type_ids), 3), dtype=np.float32)
+    for chunk in _chunks(system, chunk_size):
+        position[chunk.start : chunk.start + len(chunk.xyz)] = chunk.xyz
+    mins, maxs = _bounds(system)
+    position -= ((mins + maxs) / 2).astype(np.float32)
+
+    if hasattr(gsd_hoomd, "Frame"):
+        frame, mode = gsd_hoomd.Frame(), "w"
+    else:
+        frame, mode = gsd_hoomd.Snapshot(), "wb"
+    frame.configuration.step = 0
+    frame.configuration.dimensions = 3
+    frame.configuration.box = [*_box_lengths(system), 0, 0, 0]
+    frame.particles.N = len(type_ids)
+    frame.particles.types = list(type_names)
+    frame.particles.typeid = type_ids
+    frame.particles.position = position
+    frame.bonds.N = len(bonds)
+    frame.bonds.types = list(bond_type_names)
+    frame.bonds.typeid = bond_type_ids
+    frame.bonds.group = bonds
+    with gsd_hoomd.open(filename, mode) as f:
+        f.append(frame)
+
+
+def _residues(compound):
+    """Yield the residues of a builder system, in particle order."""
+    if "tiled_surface" in compound.labels:
+        # A monolayer: the surface, followed by its chains and backfills
+        yield compound["tiled_surface"]
+        for child in compound.children:
+            if child is not compound["tiled_surface"] and not isinstance(
+                child, mb.Port
+            ):
+                yield child
+    elif isinstance(
+        compound, (DualMonolayer, SolvatedMonolayer, SolvatedDualMonolayer)
+    ):
+        for child in compound.children:
+            if not isinstance(child, mb.Port):
+                yield from _residues(child)
+    elif any(child.children for child in compound.children):
+        # A container of molecules, e.g., a box of solvent
+        for child in compound.children:
+            if not isinstance(child, mb.Port):
+                yield child
+    else:
+        yield compound
+
+
+def _chunks(system, chunk_size):
+    """Yield the particles of a system in chunks of about `chunk_size`."""
+    if isinstance(system, MonolayerSpec):
+        arrays = system.arrays
+        offsets = system.residue_offsets
+        residue_names = np.asarray(system.residue_names)
+        for start in range(0, arrays.n_particles, chunk_size):
+            stop = min(start + chunk_size, arrays.n_particles)
+            residue_ids = np.searchsorted(
+                offsets, np.arange(start, stop), side="right"
+            )
+            yield _Chunk(
+                start,
+                residue_ids,
+                residue_names[residue_ids - 1],
+                np.asarray(arrays.name_table)[arrays.name_codes[start:stop]],
+                arrays.elements[start:stop],
+                None,
+                arrays.xyz[start:stop],
+            )
+        return
+
+    start = 0
+    buffer = _Chunk(start, *(list() for _ in range(6)))
+    for residue_id, residue in enumerate(_residues(system), 1):
+        for particle in residue.particles():
+            buffer.residue_ids.append(residue_id)
+            buffer.residue_names.append(residue.name)
+            buffer.names.append(particle.name)
+            buffer.elements.append(
+                getattr(particle.element, "atomic_number", 0)
+            )
+            buffer.ids.append(id(particle))
+            buffer.xyz.append(particle.pos)
+        if len(buffer.xyz) >= chunk_size:
+            yield _finish_chunk(buffer)
+            start += len(buffer.xyz)
+            buffer = _Chunk(start, *(list() for _ in range(6)))
+    if buffer.xyz:
+        yield _finish_chunk(buffer)
+
+
+def _finish_chunk(buffer):
+    """Convert the per-particle fields of a buffered chunk to arrays."""
+    return buffer._replace(
+        elements=np.array(buffer.elements, dtype=np.uint8),
+        ids=np.array(buffer.ids, dtype=np.uint64),
+        xyz=np.array(buffer.xyz),
+    )
+
+
+def _topology(system, chunk_size):
+    """Return the atom types and bonds of a system.
+
+    The particles are read chunk by chunk, so the only whole-system arrays
+    are the type ids and bonds, plus the sorted particle ids used to find
+    the indices of bonded particles in a compound.
+
+    Returns
+    -------
+    type_names : list of str
+        Particle names of the atom types, sorted.
+    masses : list of float
+        Masses of the atom types.
+    type_ids : np.ndarray, shape=(n,), dtype=np.int32
+        Atom type of each particle.
+    bonds : np.ndarray, shape=(m, 2), dtype=np.int32
+        Bonds as pairs of particle indices.
+    """
+    if isinstance(system, MonolayerSpec):
+        arrays = system.arrays
+        elements = np.zeros(len(arrays.name_table), dtype=np.uint8)
+        elements[arrays.name_codes] = arrays.elements
+        type_names, elements, type_ids = _number_types(
+            list(arrays.name_table), elements, arrays.name_codes
+        )
+        return type_names, _masses(elements), type_ids, system.bonds
+
+    n_particles = _n_particles(system)
+    type_ids = np.empty(n_particles, dtype=np.int32)
+    ids = np.empty(n_particles, dtype=np.uint64)
+    types = dict()
+    elements = list()
+    for chunk in _chunks(system, chunk_size):
+        stop = chunk.start + len(chunk.xyz)
+        for name, element in zip(chunk.names, chunk.elements):
+            if name not in types:
+                types[name] = len(types)
+                elements.append(element)
+        type_ids[chunk.start : stop] = [types[name] for name in chunk.names]
+        ids[chunk.start : stop] = chunk.ids
+
+    type_names, elements, type_ids = _number_types(
+        list(types), np.array(elements, dtype=np.uint8), type_ids
+    )
+
+    order = np.argsort(ids)
+    ids = ids[order]
+    bonds = [np.empty((0, 2), dtype=np.int32)]
+    pairs = iter(system.bonds())
+    while True:
+        bonded = np.fromiter(
+            (
+                id(particle)
+                for pair in it.islice(pairs, chunk_size)
+                for particle in pair
+            ),
+            dtype=np.uint64,
+        )
+        if not bonded.size:
+            break
+        bonds.append(order[np.searchsorted(ids, bonded)].reshape(-1, 2))
+    bonds = np.concatenate(bonds).astype(np.int32)
+    return type_names, _masses(elements), type_ids, bonds
+
+
+def _number_types(names, elements, type_ids):
+    """Number the atom types by name, leaving out the unused ones.
+
+    Parameters
+    ----------
+    names : list of str
+        Name of each type.
+    elements : np.ndarray, shape=(t,)
+        Atomic number of each type.
+    type_ids : np.ndarray, shape=(n,)
+        Type of each particle.
+
+    Returns
+    -------
+    names, elements, type_ids
+        The same, with the types in the order of their names.
+    """
+    used = np.flatnonzero(np.bincount(type_ids, minlength=len(names)))
+    order = sorted(used, key=lambda i: names[i])
+    rank = np.full(len(names), -1, dtype=np.int32)
+    rank[order] = np.arange(len(order))
+    return (
+        [names[i] for i in order],
+        elements[order],
+        rank[np.asarray(type_ids)],
+    )
+
+
+def _masses(elements):
+    """Return the masses of atomic numbers, 1.0 for unknown elements."""
+    return [
+        ele.element_from_atomic_number(int(element)).mass if element else 1.0
+        for element in elements
+    ]
+
+
+def _bond_types(bonds, type_ids, type_names):
+    """Return the bond type names and per-bond type ids."""
+    pairs = np.sort(type_ids[bonds], axis=1).reshape(-1, 2)
+    unique_pairs, bond_type_ids = np.unique(pairs, axis=0, return_inverse=True)
+    bond_type_names = [
+        f"{type_names[i]}-{type_names[j]}" for i, j in unique_pairs
+    ]
+    return bond_type_names, bond_type_ids.reshape(-1).astype(np.int32)
+
+
+def _n_particles(system):
+    """Return the number of particles of a system."""
+    if isinstance(system, MonolayerSpec):
+        return system.arrays.n_particles
+    return system.n_particles
+
+
+def _name(system):
+    """Return the name of a system."""
+    if isinstance(system, MonolayerSpec):
+        return system.arrays.name
+    return system.name
+
+
+def _bounds(system):
+    """Return the minimum and maximum coordinates of a system."""
+    if isinstance(system, MonolayerSpec):
+        return system.xyz.min(axis=0), system.xyz.max(axis=0)
+    return Extents().bounds(system)
+
+
+def _box_lengths(system):
+    """Return the box lengths of a system, or its bounding box lengths."""
+    if system.box is not None:
+        return np.asarray(system.box.lengths)
+    return Extents().lengths(system)